@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Per-frame data access benchmark for the replay
+Compares the previous pandas row lookups of update_frame/calculate_speed
+(iloc[frame], iloc[frame - 1], cum_dist.iloc[frame]) with the precomputed
+FrameCache arrays, and times a full headless update_frame.
+
+Usage:
+  python benchmarks/bench_frame_access.py [uwb_data/uwb_positions_xxx.csv] [--frames 2000]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'replay'))
+
+from movement_replay import UWBHexagonReplaySystem
+
+
+def legacy_frame_data(df, frame_idx):
+    """Per-frame data as update_frame read it from the DataFrame before the cache"""
+    current_row = df.iloc[frame_idx]
+    prev_row = df.iloc[frame_idx - 1]
+    dx = current_row['x'] - prev_row['x']
+    dy = current_row['y'] - prev_row['y']
+    dt = (current_row['timestamp'] - prev_row['timestamp']).total_seconds()
+    speed = min(np.sqrt(dx ** 2 + dy ** 2) / dt, 8.0) if dt > 0 else 0.0
+    elapsed = (current_row['timestamp'] - df['timestamp'].iloc[0]).total_seconds()
+    total_distance = df['cum_dist'].iloc[frame_idx]
+    return current_row['x'], current_row['y'], speed, elapsed, total_distance
+
+
+def cached_frame_data(frames, frame_idx):
+    """Per-frame data as update_frame reads it from the FrameCache"""
+    return (frames.x[frame_idx], frames.y[frame_idx], frames.speed[frame_idx],
+            frames.elapsed_s[frame_idx], frames.cum_dist[frame_idx])
+
+
+def time_per_frame(func, frame_indices):
+    t0 = time.perf_counter()
+    for frame_idx in frame_indices:
+        func(frame_idx)
+    return (time.perf_counter() - t0) / len(frame_indices) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-frame timing before/after the replay frame cache')
+    parser.add_argument('csv_file', nargs='?', help='Position CSV (default: largest uwb_data session)')
+    parser.add_argument('--frames', type=int, default=2000, help='Frames to time')
+    args = parser.parse_args()
+
+    csv_file = args.csv_file
+    if csv_file is None:
+        pattern = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uwb_data', 'uwb_positions_*.csv')
+        csv_file = max(glob.glob(pattern), key=os.path.getsize)
+
+    # No timeline cache: the legacy access path needs the processed DataFrame
+    replay = UWBHexagonReplaySystem(csv_file, use_cache=False)
+    n = replay.total_frames
+    frame_indices = np.linspace(1, n - 1, min(args.frames, n - 1)).astype(int)
+
+    before = time_per_frame(lambda i: legacy_frame_data(replay.df, i), frame_indices)
+    after = time_per_frame(lambda i: cached_frame_data(replay.frames, i), frame_indices)
+    update = time_per_frame(replay.update_frame, frame_indices)
+
+    print(f"\nFRAME ACCESS BENCHMARK ({os.path.basename(csv_file)}, {n} frames)")
+    print("=" * 60)
+    print(f"Data fetch, pandas rows (before): {before:9.2f} us/frame")
+    print(f"Data fetch, FrameCache (after):   {after:9.2f} us/frame  ({before / after:.0f}x faster)")
+    print(f"Full update_frame (no draw):      {update:9.2f} us/frame")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
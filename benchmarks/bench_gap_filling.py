@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Gap filling benchmark: Hermite vs GPR vs hold
+Hides segments of measured samples and compares how well (and how fast)
+each gap-filling mode of the replay reconstructs them.
+
+Usage:
+  python benchmarks/bench_gap_filling.py                       # all uwb_data sessions
+  python benchmarks/bench_gap_filling.py uwb_data/uwb_positions_xxx.csv --gaps 50
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'replay'))
+
+from movement_replay import build_gap_jobs, find_gaps, hermite_fill_gaps, predict_gap_batch
+
+CONTEXT_SAMPLES = 10
+MAX_SPEED = 7.0
+
+
+def make_held_out_mask(n_samples, n_gaps, min_len, max_len, rng):
+    """Hide n_gaps random segments, each with measured context on both sides."""
+    valid = np.ones(n_samples, dtype=bool)
+    for _ in range(n_gaps * 20):
+        if (~valid).sum() and len(find_gaps(valid)) >= n_gaps:
+            break
+        length = rng.integers(min_len, max_len + 1)
+        start = rng.integers(CONTEXT_SAMPLES + 1, n_samples - length - 2)
+        # Keep the context before and the sample after the gap measured
+        if valid[start - CONTEXT_SAMPLES - 1:start + length + 2].all():
+            valid[start:start + length] = False
+    return valid
+
+
+def fill_hold(timeline_ms, positions, valid, gaps):
+    filled = positions.copy()
+    for start, end in gaps:
+        filled[start:end] = filled[start - 1]
+    return filled
+
+
+def fill_hermite(timeline_ms, positions, valid, gaps):
+    filled, _ = hermite_fill_gaps(timeline_ms, positions.copy(), valid, gaps, MAX_SPEED)
+    return filled
+
+
+def fill_gpr(timeline_ms, positions, valid, gaps):
+    filled = positions.copy()
+    job_gaps, jobs = build_gap_jobs(timeline_ms, positions, valid, gaps, CONTEXT_SAMPLES)
+    predictions, _ = predict_gap_batch(jobs, None, MAX_SPEED)
+    for (start, end), pred in zip(job_gaps, predictions):
+        if pred:
+            filled[start:end] = pred
+    return filled
+
+
+def benchmark_file(csv_file, n_gaps, min_len, max_len, seed):
+    df = pd.read_csv(csv_file, usecols=['timestamp', 'x', 'y'])
+    df = df.dropna()
+    if len(df) < 4 * (CONTEXT_SAMPLES + max_len):
+        return None
+
+    timestamps = pd.to_datetime(df['timestamp'])
+    timeline_ms = ((timestamps - timestamps.iloc[0]).dt.total_seconds() * 1000).to_numpy(dtype=np.float64)
+    # Collector timestamps can repeat: spread duplicates so every sample has its own time
+    timeline_ms = timeline_ms + np.arange(len(timeline_ms)) * 1e-3
+    truth = df[['x', 'y']].to_numpy(dtype=np.float64)
+
+    rng = np.random.default_rng(seed)
+    valid = make_held_out_mask(len(truth), n_gaps, min_len, max_len, rng)
+    gaps = find_gaps(valid)
+    hidden = ~valid
+
+    positions = truth.copy()
+    positions[hidden] = np.nan
+
+    results = {}
+    for name, fill in (('hold', fill_hold), ('hermite', fill_hermite), ('gpr', fill_gpr)):
+        t0 = time.perf_counter()
+        filled = fill(timeline_ms, positions, valid, gaps)
+        elapsed = time.perf_counter() - t0
+        errors = np.hypot(*(filled[hidden] - truth[hidden]).T)
+        errors = errors[~np.isnan(errors)]
+        results[name] = (np.sqrt(np.mean(errors ** 2)), elapsed)
+
+    return len(gaps), int(hidden.sum()), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare gap-filling accuracy and runtime on held-out segments')
+    parser.add_argument('files', nargs='*', help='Position CSV files (default: uwb_data/uwb_positions_*.csv)')
+    parser.add_argument('--gaps', type=int, default=20, help='Held-out segments per file')
+    parser.add_argument('--min-len', type=int, default=3, help='Minimum held-out segment length (samples)')
+    parser.add_argument('--max-len', type=int, default=12, help='Maximum held-out segment length (samples)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        '..', 'uwb_data', 'uwb_positions_*.csv')))
+
+    print(f"{'File':<40} | {'Gaps':>5} | {'Frames':>6} | {'Mode':<8} | {'RMSE (cm)':>9} | {'Time (ms)':>10}")
+    print("-" * 95)
+
+    totals = {}
+    for csv_file in files:
+        outcome = benchmark_file(csv_file, args.gaps, args.min_len, args.max_len, args.seed)
+        if outcome is None:
+            continue
+        n_gaps, n_frames, results = outcome
+        for name, (rmse, elapsed) in results.items():
+            print(f"{os.path.basename(csv_file):<40} | {n_gaps:>5} | {n_frames:>6} | {name:<8} | "
+                  f"{rmse * 100:>9.2f} | {elapsed * 1000:>10.2f}")
+            sq_err, seconds, frames = totals.get(name, (0.0, 0.0, 0))
+            totals[name] = (sq_err + rmse ** 2 * n_frames, seconds + elapsed, frames + n_frames)
+
+    print("-" * 95)
+    for name, (sq_err, seconds, frames) in totals.items():
+        if frames:
+            print(f"{'TOTAL':<40} | {'':>5} | {frames:>6} | {name:<8} | "
+                  f"{np.sqrt(sq_err / frames) * 100:>9.2f} | {seconds * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
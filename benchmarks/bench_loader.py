@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Position file loading benchmark: plain pandas vs the shared typed loader
+Loads every session with the pattern the scripts used before
+(pd.read_csv without dtypes + pd.to_datetime with format inference) and
+with position_loader (declared dtypes, fixed-width timestamp fast path,
+column projection), checking that both give the same values.
+
+Usage:
+  python benchmarks/bench_loader.py                               # all uwb_data sessions
+  python benchmarks/bench_loader.py uwb_data/uwb_positions_xxx.csv --runs 5
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uwb_data'))
+
+from position_loader import estimate_memory_mb, load_positions
+
+PROJECTED_COLUMNS = ['timestamp', 'tag_id', 'x', 'y']
+
+
+def load_plain(csv_file):
+    """Loading as the analysis scripts did it (object strings, inferred format)"""
+    df = pd.read_csv(csv_file)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+METHODS = [
+    ('pandas (inferred)', load_plain),
+    ('typed loader', lambda csv_file: load_positions(csv_file)),
+    ('typed, projected', lambda csv_file: load_positions(csv_file, columns=PROJECTED_COLUMNS)),
+]
+
+
+def best_time(function, csv_file, runs):
+    """Best wall time of several runs and the result of the last one"""
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = function(csv_file)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def same_values(plain, typed):
+    """True if the typed load matches the plain one (floats at float32 precision)"""
+    if len(plain) != len(typed):
+        return False
+    if len(typed) == 0:
+        return True  # Header-only file (plain pandas reads object columns)
+    for col in typed.columns:
+        if col not in plain.columns:
+            continue
+        expected, actual = plain[col].to_numpy(), typed[col].to_numpy()
+        if np.issubdtype(actual.dtype, np.floating):
+            if not np.allclose(expected, actual, rtol=1e-6, atol=1e-6, equal_nan=True):
+                return False
+        elif not (expected == actual).all():
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Loading time of position files: plain pandas vs position_loader')
+    parser.add_argument('files', nargs='*', help='Position CSVs (default: every uwb_data session)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per file and method (best time reported)')
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        '..', 'uwb_data', 'uwb_positions_*.csv')))
+    if not files:
+        print("No position files found")
+        return
+
+    totals = {label: 0.0 for label, _ in METHODS}
+    memory = {label: 0.0 for label, _ in METHODS}
+    total_rows = 0
+    total_mb = 0.0
+    mismatches = []
+
+    print(f"\nLOADER BENCHMARK ({len(files)} files, best of {args.runs})")
+    print("=" * 96)
+    print(f"{'File':<36} {'Rows':>9} " + " ".join(f"{label:>16}" for label, _ in METHODS))
+    for csv_file in files:
+        results = {}
+        for label, function in METHODS:
+            elapsed, results[label] = best_time(function, csv_file, args.runs)
+            totals[label] += elapsed
+            memory[label] += estimate_memory_mb(results[label])
+            results[label + ' time'] = elapsed
+
+        plain = results[METHODS[0][0]]
+        if not all(same_values(plain, results[label]) for label, _ in METHODS[1:]):
+            mismatches.append(os.path.basename(csv_file))
+        total_rows += len(plain)
+        total_mb += os.path.getsize(csv_file) / (1024 * 1024)
+        print(f"{os.path.basename(csv_file):<36} {len(plain):>9} " +
+              " ".join(f"{results[label + ' time'] * 1000:>13.1f} ms" for label, _ in METHODS))
+
+    print("-" * 96)
+    baseline = totals[METHODS[0][0]]
+    print(f"Total: {total_rows} rows, {total_mb:.1f} MB on disk")
+    for label, _ in METHODS:
+        speedup = baseline / totals[label] if totals[label] > 0 else float('nan')
+        print(f"  {label:<18} {totals[label]:7.3f} s | {total_rows / max(totals[label], 1e-9) / 1e6:6.2f} M rows/s | "
+              f"{memory[label]:8.1f} MB in memory | x{speedup:.2f}")
+    print(f"Values identical: {'yes' if not mismatches else 'NO (' + ', '.join(mismatches) + ')'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup time benchmark for movement_replay.py
+Runs the entry point in fresh interpreters with `python -X importtime`,
+reporting the wall time of a --report run, the slowest imports and
+whether the heavy optional dependencies (matplotlib GUI, sklearn) were
+loaded at all.
+
+Usage:
+  python benchmarks/bench_startup.py [uwb_data/uwb_positions_xxx.csv] [--runs 5] [--top 10]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+REPLAY_SCRIPT = os.path.join(ROOT, 'replay', 'movement_replay.py')
+
+# Dependencies that only some features need
+HEAVY_MODULES = ['matplotlib.pyplot', 'matplotlib.widgets', 'sklearn', 'sklearn.gaussian_process', 'scipy']
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        Dict {module: (self_us, cumulative_us, depth)}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def run_timed(args):
+    """Run a command in a fresh interpreter with -X importtime, returns (seconds, stderr)"""
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - t0, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup time and import cost of movement_replay.py')
+    parser.add_argument('csv_file', nargs='?', help='Position CSV for --report (default: smallest uwb_data session)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per measurement (median reported)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    csv_file = args.csv_file
+    if csv_file is None:
+        csv_file = min(glob.glob(os.path.join(ROOT, 'uwb_data', 'uwb_positions_*.csv')), key=os.path.getsize)
+
+    # (label, command, import depth of the modules the entry point imports directly)
+    measurements = [
+        ('import movement_replay', ['-c', f"import sys; sys.path.insert(0, {os.path.dirname(REPLAY_SCRIPT)!r}); "
+                                          "import movement_replay"], 1),
+        ('--report (small file)', [REPLAY_SCRIPT, csv_file, '--report'], 0),
+    ]
+
+    print(f"\nSTARTUP BENCHMARK ({os.path.basename(csv_file)}, {args.runs} runs)")
+    print("=" * 70)
+    for label, command, entry_depth in measurements:
+        times = []
+        for _ in range(args.runs):
+            elapsed, stderr = run_timed(command)
+            times.append(elapsed)
+        modules = parse_importtime(stderr)
+
+        print(f"\n{label}: {statistics.median(times) * 1000:7.0f} ms wall (median), "
+              f"{sum(us for us, _, _ in modules.values()) / 1000:6.0f} ms in imports")
+
+        top_level = sorted(((cum, name) for name, (_, cum, depth) in modules.items() if depth == entry_depth), reverse=True)
+        for cumulative_us, name in top_level[:args.top]:
+            print(f"   {cumulative_us / 1000:7.1f} ms  {name}")
+
+        loaded = [name for name in HEAVY_MODULES if name in modules]
+        print(f"   Heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
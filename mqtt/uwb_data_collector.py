@@ -20,6 +20,10 @@ import signal
 import sys
 from threading import Lock
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uwb_data'))
+
+from time_index import TimeIndexWriter, timestamp_ms
+
 # ===== OPTIMIZED CONFIGURATIONS =====
 DEFAULT_BROKERS = [
     ("127.0.0.1", "Local Test")
@@ -53,6 +57,7 @@ class UWBDataCollector:
         # File handles
         self.ranging_handle = None
         self.positions_handle = None
+        self.time_index = None
         
         # Thread safety
         self.file_lock = Lock()
@@ -101,10 +106,14 @@ class UWBDataCollector:
             # print(f"Ranging file: {os.path.basename(self.ranging_file)}")
             
             # Positions file (for replay)
-            self.positions_handle = open(self.positions_file, 'w', buffering=1) 
+            # newline='\n': rows are written byte-exact so the time index offsets hold on every OS
+            self.positions_handle = open(self.positions_file, 'w', buffering=1, newline='\n')
             self.positions_handle.write(self.POSITIONS_HEADER + '\n')
             print(f"Positions file: {os.path.basename(self.positions_file)}")
             
+            # Time index (time -> byte offset) written while appending, for windowed loads
+            self.time_index = TimeIndexWriter(self.positions_file, len(self.POSITIONS_HEADER) + 1)
+            
         except Exception as e:
             print(f"Error creating files: {e}")
             sys.exit(1)
@@ -282,8 +291,11 @@ class UWBDataCollector:
                         anchor_distances.get('6', 0),
                         device_timestamp
                     ]
+                    line = ','.join(str(v) for v in row) + '\n'
                     with self.file_lock:
-                        self.positions_handle.write(','.join(str(v) for v in row) + '\n')
+                        self.positions_handle.write(line)
+                        if self.time_index:
+                            self.time_index.add_row(timestamp_ms(dt_timestamp), len(line.encode('utf-8')))
                         
         except Exception as e:
             print(f"Error position data: {e}")
@@ -382,6 +394,9 @@ class UWBDataCollector:
             self.positions_handle.close()
             print(f"Positions closed: {os.path.basename(self.positions_file)}")
             
+        if self.time_index:
+            self.time_index.close()
+            
         self.print_statistics()
         print("Collector stopped correctly")
 
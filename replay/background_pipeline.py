@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Background processing for the UWB replay
+Runs the filtering pipeline on a worker thread so the replay window opens
+at once and stays responsive while a session is (re)processed. The worker
+publishes its progress and a decimated preview of the raw trajectory; the
+GUI thread polls them on every animation tick and swaps in the processed
+timeline when it is ready.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class BackgroundPipeline:
+    """
+    One processing job at a time on a daemon thread.
+
+    The worker only writes the progress, preview and result attributes;
+    every matplotlib call stays on the GUI thread, which collects them
+    with poll() and take_preview().
+    """
+
+    def __init__(self, preview_points=2000):
+        """
+        Args:
+            preview_points: Maximum points of the raw trajectory preview
+        """
+        self.preview_points = preview_points
+        self.label = ''
+        self.progress = (0.0, '')
+        self.preview = None
+        self.started_at = None
+        self._thread = None
+        self._result = None
+        self._error = None
+
+    def busy(self):
+        """True while a job runs or its result has not been collected"""
+        return self._thread is not None
+
+    def submit(self, job, label='Processing'):
+        """
+        Start job() on the worker thread.
+
+        Returns:
+            False if another job is still running
+        """
+        if self.busy():
+            return False
+        self._result = None
+        self._error = None
+        self.preview = None
+        self.label = label
+        self.progress = (0.0, label)
+        self.started_at = time.perf_counter()
+        # Daemon: closing the window never waits for a long reprocess
+        self._thread = threading.Thread(target=self._run, args=(job,), name='replay-pipeline', daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, job):
+        try:
+            self._result = job()
+        except Exception as e:
+            self._error = e
+
+    def report(self, fraction, message):
+        """Worker side: fraction done in [0, 1] and the current stage"""
+        self.progress = (float(fraction), message)
+
+    def set_preview(self, x, y):
+        """Worker side: raw trajectory for the preview, decimated to preview_points"""
+        step = max(1, -(-len(x) // self.preview_points))
+        self.preview = (np.asarray(x[::step]), np.asarray(y[::step]))
+
+    def take_preview(self):
+        """GUI side: the pending preview (returned once) or None"""
+        preview, self.preview = self.preview, None
+        return preview
+
+    def poll(self):
+        """
+        GUI side: collect a finished job.
+
+        Returns:
+            (done, result, error); done is True only once per job
+        """
+        if self._thread is None or self._thread.is_alive():
+            return False, None, None
+        self._thread = None
+        return True, self._result, self._error
+
+    def wait(self, timeout=None):
+        """Block until the running job finishes (headless use)"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def elapsed_s(self):
+        """Seconds since the current (or last) job started"""
+        return time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+
+    def status_text(self, width=20):
+        """Progress line for the on-screen indicator"""
+        fraction, message = self.progress
+        filled = int(round(np.clip(fraction, 0.0, 1.0) * width))
+        return (f"{message}  [{'#' * filled}{'.' * (width - filled)}] "
+                f"{fraction * 100:3.0f}%  {self.elapsed_s():.1f}s")
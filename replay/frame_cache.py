@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Precomputed per-frame data for the UWB replay
+Struct-of-arrays view of a processed timeline, so drawing a frame only
+needs O(1) array indexing instead of pandas row lookups.
+"""
+
+import numpy as np
+
+from zones import time_in_zones, zone_transitions
+
+# Speed classification (ASCII compatible icons)
+SPEED_CLASS_LABELS = ["[WALK] WALKING", "[JOG]  JOGGING", "[RUN]  RUNNING", "[SPRINT] SPRINT"]
+SPEED_CLASS_LIMITS = [1.0, 3.0, 5.0]  # m/s
+
+
+def compute_playback_speeds(x, y, elapsed_s, max_realistic_speed=8.0, verbose=False):
+    """
+    Instantaneous speed of every frame, as shown during playback.
+
+    Speeds above max_realistic_speed are clamped and changes of more than
+    50% between consecutive frames are smoothed (70% previous, 30% new).
+
+    Args:
+        x, y: Position arrays (meters)
+        elapsed_s: Frame times in seconds
+        max_realistic_speed: Physical speed limit in m/s
+        verbose: Report how many frames had unrealistic speeds
+
+    Returns:
+        float64 array of speeds in m/s (0 for the first frame)
+    """
+    n = len(x)
+    speeds = np.zeros(n)
+    if n < 2:
+        return speeds
+
+    distances = np.hypot(np.diff(x), np.diff(y))
+    dts = np.diff(elapsed_s)
+    raw = np.divide(distances, dts, out=np.zeros(n - 1), where=dts > 0)
+
+    if verbose:
+        extreme = int((raw > max_realistic_speed * 2).sum())
+        if extreme:
+            print(f"   [SPEED WARNING] {extreme} frames with unrealistic speed → limited to {max_realistic_speed} m/s")
+
+    clamped = np.minimum(raw, max_realistic_speed).tolist()
+    valid_dt = (dts > 0).tolist()
+
+    # Smoothing depends on the previous smoothed value: sequential pass
+    last_speed = None
+    for i in range(n - 1):
+        if not valid_dt[i]:
+            continue
+        speed = clamped[i]
+        if last_speed is not None:
+            # Avoid jumps >50% between consecutive frames
+            if abs(speed - last_speed) / max(last_speed, 0.1) > 0.5:
+                speed = 0.7 * last_speed + 0.3 * speed
+        speeds[i + 1] = speed
+        last_speed = speed
+
+    return speeds
+
+
+def classify_speeds(speeds):
+    """Index into SPEED_CLASS_LABELS for every speed"""
+    return np.digitize(speeds, SPEED_CLASS_LIMITS).astype(np.int8)
+
+
+class FrameCache:
+    """
+    Contiguous NumPy arrays with everything update_frame needs per frame.
+
+    x, y and the derived stats belong to the focus tag; tag_xy holds the
+    position of every tag on the same timeline, shape (frames, tags, 2).
+    zone_changes (frames where the zone changes) and zone_time_s (seconds
+    per zone) are precomputed with zone_id.
+    """
+    # Arrays in the order they are stored on disk
+    ARRAY_NAMES = ['x', 'y', 'elapsed_s', 'clock_s', 'step_dist', 'cum_dist',
+                   'speed', 'speed_class', 'zone_id', 'tag_xy', 'zone_changes', 'zone_time_s']
+
+    def __init__(self, arrays, zone_names, tag_ids, focus_tag):
+        """
+        Args:
+            arrays: Dict with one array per name in ARRAY_NAMES (may be np.memmap)
+            zone_names: Zone label for each zone index
+            tag_ids: Tag id of each column of tag_xy
+            focus_tag: Tag id that x, y and the stats belong to
+        """
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.zone_names = list(zone_names)
+        self.tag_ids = [int(tag) for tag in tag_ids]
+        self.focus_tag = int(focus_tag)
+
+    @classmethod
+    def from_dataframe(cls, df, zone_ids, zone_names, tag_xy=None, tag_ids=None,
+                       max_realistic_speed=8.0, verbose=False):
+        """
+        Build the cache from a processed timeline.
+
+        Args:
+            df: Interpolated DataFrame of the focus tag (timestamp, x, y, tag_id, step_dist, cum_dist)
+            zone_ids: Zone index of every frame
+            zone_names: Zone label for each zone index
+            tag_xy: (frames, tags, 2) positions of all tags (default: only the focus tag)
+            tag_ids: Tag id of each column of tag_xy
+            max_realistic_speed: Speed limit in m/s for the displayed speed
+            verbose: Report clamped speeds
+        """
+        timestamps = df['timestamp']
+        start = timestamps.iloc[0]
+
+        x = np.ascontiguousarray(df['x'].to_numpy(dtype=np.float64))
+        y = np.ascontiguousarray(df['y'].to_numpy(dtype=np.float64))
+        elapsed_s = np.ascontiguousarray((timestamps - start).dt.total_seconds().to_numpy(dtype=np.float64))
+        speed = compute_playback_speeds(x, y, elapsed_s, max_realistic_speed, verbose)
+
+        focus_tag = df['tag_id'].iloc[0]
+        if tag_xy is None:
+            tag_xy = np.stack([x, y], axis=1)[:, np.newaxis, :]
+            tag_ids = [focus_tag]
+
+        return cls({
+            'x': x,
+            'y': y,
+            'elapsed_s': elapsed_s,
+            # Seconds since midnight, for the wall clock shown in the title
+            'clock_s': (start - start.normalize()).total_seconds() + elapsed_s,
+            'step_dist': np.ascontiguousarray(df['step_dist'].to_numpy(dtype=np.float64)),
+            'cum_dist': np.ascontiguousarray(df['cum_dist'].to_numpy(dtype=np.float64)),
+            'speed': speed,
+            'speed_class': classify_speeds(speed),
+            'zone_id': np.ascontiguousarray(zone_ids, dtype=np.int16),
+            'tag_xy': np.ascontiguousarray(tag_xy, dtype=np.float32),
+            'zone_changes': zone_transitions(zone_ids),
+            'zone_time_s': time_in_zones(zone_ids, elapsed_s, len(zone_names)),
+        }, zone_names, tag_ids, focus_tag)
+
+    def arrays(self):
+        """Dict of all per-frame arrays"""
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    def __len__(self):
+        return len(self.x)
+
+    def clock_text(self, frame_idx):
+        """Wall clock of a frame as HH:MM:SS.mmm"""
+        total_ms = int(self.clock_s[frame_idx] * 1000 + 1e-6)  # Truncated like strftime
+        seconds, ms = divmod(total_ms, 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours % 24:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
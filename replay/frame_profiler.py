@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Per-frame profiler for the UWB replay
+Times the stages of every animation frame with perf_counter_ns, keeps
+rolling p50/p95 frame times and achieved FPS for an on-screen overlay,
+and writes the raw samples to a CSV file for offline analysis.
+"""
+
+import time
+
+import numpy as np
+
+# Stages of a frame, in the order they run
+STAGES = ['clock', 'data', 'artists', 'draw']
+
+
+class FrameProfiler:
+    """
+    Stage timer for animation frames.
+
+    A frame is delimited by start_frame()/end_frame(); every mark(stage)
+    assigns the time since the previous mark to that stage. Samples are
+    stored in a growable int64 array (one row per frame).
+    """
+
+    # Columns of the samples array / output file
+    COLUMNS = ['frame_idx', 'start_ns'] + [f'{stage}_ns' for stage in STAGES] + ['total_ns']
+
+    def __init__(self, output_file=None, window=120, capacity=4096):
+        """
+        Args:
+            output_file: CSV path for the raw samples (None: keep in memory only)
+            window: Frames used for the rolling statistics
+            capacity: Initial sample rows (doubled when full)
+        """
+        self.output_file = output_file
+        self.window = window
+        self.samples = np.zeros((capacity, len(self.COLUMNS)), dtype=np.int64)
+        self.count = 0
+        self._row = None
+        self._last_ns = 0
+
+    def start_frame(self, frame_idx=-1):
+        """Begin timing a frame"""
+        now = time.perf_counter_ns()
+        if self.count == len(self.samples):
+            self.samples = np.concatenate((self.samples, np.zeros_like(self.samples)))
+        self._row = self.samples[self.count]
+        self._row[:] = 0
+        self._row[0] = frame_idx
+        self._row[1] = now
+        self._last_ns = now
+
+    def set_frame(self, frame_idx):
+        """Frame index of the frame being timed (known after the clock stage)"""
+        if self._row is not None:
+            self._row[0] = frame_idx
+
+    def mark(self, stage):
+        """Close a stage: time since the previous mark (ignored outside a frame)"""
+        if self._row is None:
+            return
+        now = time.perf_counter_ns()
+        self._row[2 + STAGES.index(stage)] += now - self._last_ns
+        self._last_ns = now
+
+    def end_frame(self):
+        """Finish the current frame and store its sample"""
+        if self._row is None:
+            return
+        self._row[-1] = time.perf_counter_ns() - self._row[1]
+        self._row = None
+        self.count += 1
+
+    def recent(self):
+        """Samples of the last `window` frames"""
+        return self.samples[max(0, self.count - self.window):self.count]
+
+    def rolling_stats(self):
+        """
+        Statistics over the last window.
+
+        Returns:
+            Dict with p50_ms, p95_ms, fps and the mean ms of every stage,
+            or None with fewer than two frames
+        """
+        recent = self.recent()
+        if len(recent) < 2:
+            return None
+        totals_ms = recent[:, -1] / 1e6
+        span_s = (recent[-1, 1] - recent[0, 1]) / 1e9
+        stats = {
+            'p50_ms': float(np.percentile(totals_ms, 50)),
+            'p95_ms': float(np.percentile(totals_ms, 95)),
+            'fps': (len(recent) - 1) / span_s if span_s > 0 else 0.0,
+        }
+        for i, stage in enumerate(STAGES):
+            stats[f'{stage}_ms'] = float(recent[:, 2 + i].mean() / 1e6)
+        return stats
+
+    def overlay_text(self):
+        """Compact text for the on-screen overlay"""
+        stats = self.rolling_stats()
+        if stats is None:
+            return "PROFILE: collecting..."
+        stages = " ".join(f"{stage} {stats[f'{stage}_ms']:.1f}" for stage in STAGES)
+        return (f"FRAME p50 {stats['p50_ms']:.1f}ms p95 {stats['p95_ms']:.1f}ms | {stats['fps']:.0f} FPS\n"
+                f"ms: {stages}")
+
+    def save(self, output_file=None):
+        """Write the raw samples as CSV (times in nanoseconds), returns the path or None"""
+        output_file = output_file or self.output_file
+        if output_file is None or self.count == 0:
+            return None
+        samples = self.samples[:self.count].copy()
+        samples[:, 1] -= samples[0, 1]  # Start times relative to the first frame
+        try:
+            np.savetxt(output_file, samples, fmt='%d', delimiter=',',
+                       header=','.join(self.COLUMNS), comments='')
+        except OSError as e:
+            print(f"Could not write profile: {e}")
+            return None
+        return output_file
+
+    def summary(self):
+        """Text summary over all frames"""
+        if self.count == 0:
+            return "No frames profiled"
+        totals_ms = self.samples[:self.count, -1] / 1e6
+        lines = [f"Frames: {self.count} | p50 {np.percentile(totals_ms, 50):.2f} ms | "
+                 f"p95 {np.percentile(totals_ms, 95):.2f} ms | max {totals_ms.max():.2f} ms"]
+        for i, stage in enumerate(STAGES):
+            stage_ms = self.samples[:self.count, 2 + i] / 1e6
+            lines.append(f"   {stage:<8} mean {stage_ms.mean():7.3f} ms | p95 {np.percentile(stage_ms, 95):7.3f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Live position feed for the UWB replay
+Positions arriving from a growing uwb_positions_*.csv (tail) or straight
+from MQTT (uwb/tag/+/status) go into a fixed-size ring buffer of NumPy
+arrays, optionally smoothed online with one Kalman filter per tag. The
+replay draws the last N seconds of the buffer as a small FrameCache, so
+memory stays constant however long the session runs.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from frame_cache import FrameCache, classify_speeds, compute_playback_speeds
+from position_loader import PositionTail
+from time_index import TimeIndex, timestamp_ms
+from zones import time_in_zones, zone_transitions
+
+LIVE_COLUMNS = ['timestamp', 'tag_id', 'x', 'y']
+MQTT_POSITION_TOPIC = 'uwb/tag/+/status'
+MS_PER_DAY = 86_400_000
+
+
+class PositionRingBuffer:
+    """
+    Fixed-capacity ring buffer of position samples (struct of arrays).
+
+    Samples are stored in arrival order; when full the oldest are
+    overwritten. Writers (network thread) and the reader (GUI thread) are
+    serialised with a lock.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        """
+        Args:
+            capacity: Maximum number of samples kept
+        """
+        self.capacity = capacity
+        self.time_ms = np.zeros(capacity, dtype=np.int64)
+        self.tag_id = np.zeros(capacity, dtype=np.int32)
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.cum_dist = np.zeros(capacity, dtype=np.float64)
+        self.head = 0           # Next slot to write
+        self.count = 0
+        self.total = 0          # Samples ever appended
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def _columns(self):
+        return (self.time_ms, self.tag_id, self.x, self.y, self.cum_dist)
+
+    def append(self, time_ms, tag_id, x, y, cum_dist):
+        """Append samples (arrays of equal length), overwriting the oldest when full"""
+        n = len(time_ms)
+        if n == 0:
+            return
+        values = (time_ms, tag_id, x, y, cum_dist)
+        if n > self.capacity:
+            values = tuple(np.asarray(v)[-self.capacity:] for v in values)
+            n = self.capacity
+
+        with self.lock:
+            first = min(n, self.capacity - self.head)
+            for column, new in zip(self._columns(), values):
+                column[self.head:self.head + first] = new[:first]
+                column[:n - first] = new[first:]
+            self.head = (self.head + n) % self.capacity
+            self.count = min(self.count + n, self.capacity)
+            self.total += n
+
+    def latest(self, seconds):
+        """
+        Samples of the last `seconds` (relative to the newest one), oldest first.
+
+        Only the requested tail is copied: the two physical segments of the
+        ring are each in time order and searched separately.
+
+        Returns:
+            Tuple of arrays (time_ms, tag_id, x, y, cum_dist), empty if no data
+        """
+        with self.lock:
+            if self.count == 0:
+                return tuple(column[:0].copy() for column in self._columns())
+            start = (self.head - self.count) % self.capacity
+            newest = self.time_ms[(self.head - 1) % self.capacity]
+            threshold = newest - int(seconds * 1000)
+
+            # Logical order: [start:end_a] then [0:head] when wrapped
+            if start + self.count <= self.capacity:
+                segments = [(start, start + self.count)]
+            else:
+                segments = [(start, self.capacity), (0, self.head)]
+            pieces = []
+            for seg_start, seg_end in segments:
+                first = seg_start + int(np.searchsorted(self.time_ms[seg_start:seg_end], threshold))
+                if first < seg_end:
+                    pieces.append((first, seg_end))
+            return tuple(np.concatenate([column[a:b] for a, b in pieces]) for column in self._columns())
+
+
+class LiveFeed:
+    """
+    Ring buffer plus per-tag online state (Kalman filter, travelled distance).
+
+    push() may be called from any thread; window_frames() builds what the
+    replay draws.
+    """
+
+    def __init__(self, capacity=1 << 16, filter_factory=None):
+        """
+        Args:
+            capacity: Ring buffer size in samples (bounds memory)
+            filter_factory: Optional callable(initial_xy) returning an object
+                            with process(position, dt) for online smoothing
+        """
+        self.buffer = PositionRingBuffer(capacity)
+        self.filter_factory = filter_factory
+        self.filters = {}
+        self.last_sample = {}   # tag -> (time_ms, x, y, cum_dist)
+        self.start_ms = None
+        self.first_tag = None
+        self.last_arrival = None
+        self.lock = threading.Lock()
+
+    def set_filter_factory(self, filter_factory):
+        """Enable (or disable with None) online smoothing for the next samples"""
+        with self.lock:
+            self.filter_factory = filter_factory
+            self.filters = {}
+
+    def push(self, time_ms, tag_id, x, y):
+        """Add samples (arrays or lists of equal length) in arrival order"""
+        time_ms = np.asarray(time_ms, dtype=np.int64)
+        tag_id = np.asarray(tag_id, dtype=np.int32)
+        x = np.array(x, dtype=np.float64)
+        y = np.array(y, dtype=np.float64)
+        cum_dist = np.empty(len(time_ms))
+        if len(time_ms) == 0:
+            return
+
+        with self.lock:
+            if self.start_ms is None:
+                self.start_ms = int(time_ms[0])
+                self.first_tag = int(tag_id[0])
+            # Sequential per sample: filter state and distance depend on the previous sample of the tag
+            for i, tag in enumerate(tag_id.tolist()):
+                last = self.last_sample.get(tag)
+                if self.filter_factory is not None:
+                    kalman = self.filters.get(tag)
+                    if kalman is None:
+                        kalman = self.filters[tag] = self.filter_factory([x[i], y[i]])
+                    dt = max((time_ms[i] - last[0]) / 1000.0, 1e-3) if last else 0.02
+                    x[i], y[i] = kalman.process([x[i], y[i]], dt)[:2]
+                step = np.hypot(x[i] - last[1], y[i] - last[2]) if last else 0.0
+                cum_dist[i] = (last[3] if last else 0.0) + step
+                self.last_sample[tag] = (int(time_ms[i]), x[i], y[i], cum_dist[i])
+            self.buffer.append(time_ms, tag_id, x, y, cum_dist)
+            self.last_arrival = time.perf_counter()
+
+    def latency_ms(self):
+        """Time since the newest sample arrived (None before the first one)"""
+        if self.last_arrival is None:
+            return None
+        return (time.perf_counter() - self.last_arrival) * 1000
+
+    def window_frames(self, seconds, zone_map, focus_tag=None, max_realistic_speed=8.0):
+        """
+        FrameCache of the last `seconds`: one frame per sample of the focus tag.
+
+        Other tags are placed at their latest sample at or before each frame.
+
+        Returns:
+            FrameCache, or None while the focus tag has no samples
+        """
+        time_ms, tag_id, xs, ys, cum_dist = self.buffer.latest(seconds)
+        if len(time_ms) == 0:
+            return None
+        tags = np.unique(tag_id)
+        if focus_tag not in tags:
+            focus_tag = self.first_tag if self.first_tag in tags else int(tags[0])
+
+        mask = tag_id == focus_tag
+        times = time_ms[mask]
+        x, y = xs[mask], ys[mask]
+        start_ms = self.start_ms if self.start_ms is not None else int(time_ms[0])
+        elapsed_s = (times - start_ms) / 1000.0
+        speed = compute_playback_speeds(x, y, elapsed_s, max_realistic_speed)
+        zone_ids = zone_map.classify(x, y)
+
+        tag_xy = np.empty((len(times), len(tags), 2), dtype=np.float32)
+        for column, tag in enumerate(tags):
+            tag_mask = tag_id == tag
+            tag_times = time_ms[tag_mask]
+            idx = np.clip(np.searchsorted(tag_times, times, side='right') - 1, 0, len(tag_times) - 1)
+            tag_xy[:, column, 0] = xs[tag_mask][idx]
+            tag_xy[:, column, 1] = ys[tag_mask][idx]
+
+        focus_cum = cum_dist[mask]
+        return FrameCache({
+            'x': x,
+            'y': y,
+            'elapsed_s': elapsed_s,
+            'clock_s': (times % MS_PER_DAY) / 1000.0,
+            'step_dist': np.diff(focus_cum, prepend=focus_cum[0]),
+            'cum_dist': focus_cum,
+            'speed': speed,
+            'speed_class': classify_speeds(speed),
+            'zone_id': zone_ids,
+            'tag_xy': tag_xy,
+            'zone_changes': zone_transitions(zone_ids),
+            'zone_time_s': time_in_zones(zone_ids, elapsed_s, len(zone_map)),
+        }, zone_map.names, tags.tolist(), focus_tag)
+
+
+class CsvTailSource:
+    """
+    Follows a position file that the collector is still writing.
+
+    Every poll() reads only the complete rows appended since the last one.
+    """
+
+    def __init__(self, csv_file, feed, backlog_s=0.0):
+        """
+        Args:
+            csv_file: uwb_positions_*.csv being written
+            feed: LiveFeed receiving the rows
+            backlog_s: Seconds of existing data to load first (through the time index)
+        """
+        self.csv_file = csv_file
+        self.feed = feed
+        self.tail = PositionTail(csv_file, columns=LIVE_COLUMNS, from_start=backlog_s > 0)
+
+        if backlog_s > 0:
+            index = TimeIndex.for_file(csv_file, save=False)  # The collector owns the sidecar
+            end_ms = index.end_ms()
+            if end_ms is not None:
+                span = index.byte_range(end_ms - int(backlog_s * 1000), end_ms)
+                self.tail.offset = span[0] if span is not None else index.end
+
+    def poll(self, max_bytes=8 << 20):
+        """Read and push the complete rows appended since the last poll, returns the row count"""
+        chunk = self.tail.read(max_bytes)
+        if chunk is None or len(chunk) == 0:
+            return 0
+        times = chunk['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        self.feed.push(times, chunk['tag_id'].to_numpy(), chunk['x'].to_numpy(), chunk['y'].to_numpy())
+        return len(chunk)
+
+    def describe(self):
+        return f"tail {os.path.basename(self.csv_file)}"
+
+    def close(self):
+        self.tail.close()
+
+
+class MqttSource:
+    """
+    Subscribes to the tag status topic and pushes every position on arrival.
+
+    Messages are handled on the paho network thread; poll() has nothing to
+    do and exists for symmetry with CsvTailSource.
+    """
+
+    def __init__(self, feed, host, port=1883, topic=MQTT_POSITION_TOPIC):
+        """
+        Args:
+            feed: LiveFeed receiving the positions
+            host, port: MQTT broker
+            topic: Topic with the JSON status messages of the tags
+        """
+        import paho.mqtt.client as mqtt
+        from paho.mqtt.enums import CallbackAPIVersion
+
+        self.feed = feed
+        self.host = host
+        self.port = port
+        self.topic = topic
+        self.client = mqtt.Client(CallbackAPIVersion.VERSION2,
+                                  client_id=f"uwb-live-replay-{os.getpid()}")
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+        self.client.connect(host, port, 15)
+        self.client.loop_start()
+
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            client.subscribe(self.topic, 0)
+            print(f"Live: subscribed to {self.topic} on {self.host}:{self.port}")
+        else:
+            print(f"Live: MQTT connection error (rc={rc})")
+
+    def on_message(self, client, userdata, msg):
+        """Same payload handling as the collector, timestamped on arrival"""
+        try:
+            data = json.loads(msg.payload.decode('utf-8'))
+            position = data.get('position')
+            if position is None:
+                return
+            arrival_ms = timestamp_ms(datetime.fromtimestamp(time.time()))
+            self.feed.push([arrival_ms], [data.get('tag_id', 0)],
+                           [position.get('x', 0.0)], [position.get('y', 0.0)])
+        except Exception as e:
+            print(f"Live: error processing message: {e}")
+
+    def poll(self):
+        return 0
+
+    def describe(self):
+        return f"mqtt {self.host}:{self.port} {self.topic}"
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
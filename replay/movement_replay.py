@@ -6,18 +6,61 @@ Interactive player for movement data with advanced filters
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.animation import FuncAnimation
-from matplotlib.widgets import Button, Slider
 import argparse
 import sys
 import os
 import glob
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from sklearn.gaussian_process import GaussianProcessRegressor
-from sklearn.gaussian_process.kernels import WhiteKernel, Matern
 import warnings
+from typing import TYPE_CHECKING
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uwb_data'))
+
+from background_pipeline import BackgroundPipeline
+from frame_cache import FrameCache, SPEED_CLASS_LABELS
+from frame_profiler import FrameProfiler
+from live_feed import CsvTailSource, LiveFeed, MqttSource
+from movement_report import generate_batch_report, generate_movement_report
+from occupancy_heatmap import OccupancyHeatmap, frame_dwell_times
+from playback_clock import PlaybackClock
+from position_loader import estimate_memory_mb, load_positions, read_header
+from session_compare import ComparisonTracks, parse_comparison
+from timeline_cache import load_timeline, save_timeline
+from trail_renderer import IncrementalTrail
+from zones import ZoneMap
+
+# Los workers GPR no se crean con fork: en modo background el pool se abre
+# desde el hilo del pipeline con los hilos de Tk/paho en marcha, y un fork
+# de ese proceso puede bloquearse. En POSIX se usa un forkserver limpio.
+GPR_POOL_START_METHOD = 'forkserver' if os.name == 'posix' else None
+
+# === IMPORTACIONES DIFERIDAS ===
+# matplotlib (GUI) y sklearn son las dependencias más lentas de importar:
+# se cargan solo cuando se usa el replay o la predicción ML, así --report
+# no las importa nunca. Los type checkers ven los módulos reales.
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+    from matplotlib.animation import FuncAnimation
+    from matplotlib.widgets import Button, Slider
+else:
+    plt = None
+    patches = None
+    FuncAnimation = None
+    Button = None
+    Slider = None
+
+def load_matplotlib():
+    """Import the matplotlib modules used by the replay (once)"""
+    global plt, patches, FuncAnimation, Button, Slider
+    if plt is None:
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as patches
+        from matplotlib.animation import FuncAnimation
+        from matplotlib.widgets import Button, Slider
+    return plt
 
 class KalmanPositionFilter:
     """
@@ -110,7 +153,7 @@ class TrajectoryPredictor:
     Prediction of trajectories using Gaussian Process Regression (GPR)
     for indoor movements.
     """
-    def __init__(self, context="indoor"):
+    def __init__(self, context="indoor", warm_start=True):
         self.context = context
         self.x_model = None
         self.y_model = None
@@ -119,6 +162,14 @@ class TrajectoryPredictor:
         self.min_ts = 0
         self.max_ts = 0
         
+        # Warm start: reuse the optimized kernel of the previous fit as the
+        # starting point of the next one (one optimizer run instead of restarts)
+        self.warm_start = warm_start
+        self.has_fitted_kernels = False
+        
+        # sklearn is only imported when a predictor is created (first ML use)
+        from sklearn.gaussian_process.kernels import WhiteKernel, Matern
+        
         length_scale_bounds = (1e-3, 25.0)
         noise_level_bounds = (1e-8, 1.0)
         
@@ -128,6 +179,15 @@ class TrajectoryPredictor:
         self.kernel_y = 1.0 * Matern(length_scale=0.5, nu=1.5, length_scale_bounds=length_scale_bounds) + \
                        WhiteKernel(noise_level=0.01, noise_level_bounds=noise_level_bounds)
     
+    def get_kernels(self):
+        """Return the current (x, y) kernels, fitted ones if available."""
+        return self.kernel_x, self.kernel_y
+    
+    def set_kernels(self, kernels):
+        """Seed the predictor with previously fitted (x, y) kernels."""
+        self.kernel_x, self.kernel_y = kernels
+        self.has_fitted_kernels = True
+    
     def train(self, timestamps, positions):
         """Train the GPR models using historical data."""
         if len(timestamps) < self.min_samples_required:
@@ -153,25 +213,35 @@ class TrajectoryPredictor:
         norm_timestamps = (valid_timestamps - self.min_ts) / ts_range
         norm_timestamps = norm_timestamps.reshape(-1, 1)
         
+        # Random restarts are only worth it without a warm-started kernel
+        n_restarts = 0 if (self.warm_start and self.has_fitted_kernels) else 1
+        
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        
         try:
             self.x_model = GaussianProcessRegressor(
                 kernel=self.kernel_x, 
                 alpha=1e-5,
                 normalize_y=True, 
-                n_restarts_optimizer=1
+                n_restarts_optimizer=n_restarts
             )
             
             self.y_model = GaussianProcessRegressor(
                 kernel=self.kernel_y, 
                 alpha=1e-5,
                 normalize_y=True, 
-                n_restarts_optimizer=1
+                n_restarts_optimizer=n_restarts
             )
             
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
                 self.x_model.fit(norm_timestamps, valid_positions[:, 0])
                 self.y_model.fit(norm_timestamps, valid_positions[:, 1])
+            
+            if self.warm_start:
+                self.kernel_x = self.x_model.kernel_
+                self.kernel_y = self.y_model.kernel_
+                self.has_fitted_kernels = True
                 
             self.is_trained = True
             return True
@@ -180,13 +250,16 @@ class TrajectoryPredictor:
             self.is_trained = False
             return False
     
-    def predict(self, target_timestamps, max_speed=7.0):
+    def predict(self, target_timestamps, max_speed=7.0, start_pos=None, start_ts=None):
         """
         Predict positions for target timestamps using trained GPR.
         
         Args:
             target_timestamps: List of target timestamps in milliseconds
             max_speed: Maximum allowed speed in m/s (default: 7.0 m/s for indoor movement)
+            start_pos, start_ts: Last measured [x, y] and its timestamp before
+                                 the targets, so the first predicted point is
+                                 also speed-bounded (jump into a gap)
             
         Returns:
             List[[x, y]]: List of predicted positions, or None/[] if error
@@ -217,8 +290,8 @@ class TrajectoryPredictor:
         
         # Apply speed restrictions
         predictions = []
-        last_pos = None
-        last_ts = None
+        last_pos = [float(start_pos[0]), float(start_pos[1])] if start_pos is not None else None
+        last_ts = start_ts
         
         for i in range(len(target_timestamps)):
             pos = [float(pred_x[i]), float(pred_y[i])]
@@ -244,8 +317,209 @@ class TrajectoryPredictor:
         
         return predictions
 
+# Columns the replay needs from a position file
+REPLAY_COLUMNS = ['timestamp', 'tag_id', 'x', 'y', 'z']
+
+def resample_tags(timestamps_ms, tag_ids, positions, timeline_ms, threshold_ms):
+    """
+    Nearest measurement of every tag for every frame of a shared timeline.
+    
+    All tags are resolved with a single searchsorted: every tag's samples
+    are shifted into their own key range (rank * stride + time), with
+    ranges far enough apart that a frame never matches another tag.
+    
+    Args:
+        timestamps_ms: Sample times in milliseconds since the session start
+        tag_ids: Tag of every sample
+        positions: (N, 2) measured positions
+        timeline_ms: Frame timestamps in milliseconds
+        threshold_ms: Maximum distance to the nearest sample for a valid frame
+        
+    Returns:
+        (tags, resampled, valid): sorted tag ids, (frames, tags, 2) positions
+        with NaN where no sample is close enough, and the (frames, tags) mask
+    """
+    tags, tag_rank = np.unique(tag_ids, return_inverse=True)
+    stride = max(timeline_ms[-1], timestamps_ms.max()) + 2 * threshold_ms + 1
+    
+    sample_keys = tag_rank * stride + timestamps_ms
+    order = np.argsort(sample_keys, kind='stable')
+    sample_keys = sample_keys[order]
+    sorted_positions = positions[order]
+    
+    frame_keys = (timeline_ms[:, np.newaxis] + np.arange(len(tags)) * stride).ravel()
+    idx = np.clip(np.searchsorted(sample_keys, frame_keys), 0, len(sample_keys) - 1)
+    prev_idx = np.maximum(idx - 1, 0)
+    use_prev = (idx > 0) & (
+        np.abs(sample_keys[prev_idx] - frame_keys) < np.abs(sample_keys[idx] - frame_keys)
+    )
+    closest_idx = np.where(use_prev, prev_idx, idx)
+    valid = np.abs(sample_keys[closest_idx] - frame_keys) <= threshold_ms
+    
+    resampled = np.full((len(frame_keys), 2), np.nan)
+    resampled[valid] = sorted_positions[closest_idx[valid]]
+    
+    shape = (len(timeline_ms), len(tags))
+    return tags, resampled.reshape(shape + (2,)), valid.reshape(shape)
+
+def find_gaps(valid_mask):
+    """
+    Find runs of consecutive frames without a measurement.
+    
+    Args:
+        valid_mask: Boolean array, True where the frame has a measured position
+        
+    Returns:
+        List of (start, end) frame indices, end exclusive
+    """
+    padded = np.concatenate(([True], np.asarray(valid_mask, dtype=bool), [True]))
+    edges = np.diff(padded.astype(np.int8))
+    starts = np.flatnonzero(edges == -1)
+    ends = np.flatnonzero(edges == 1)
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def build_gap_jobs(timeline_ms, positions, valid_mask, gaps, context_samples=10):
+    """
+    Prepare one GPR job per gap from the measured frames preceding it.
+    
+    Gaps without enough measured history are skipped.
+    
+    Returns:
+        (job_gaps, jobs): the (start, end) of each accepted gap and its
+        (context_timestamps, context_positions, gap_timestamps) job
+    """
+    valid_frames = np.flatnonzero(valid_mask)
+    job_gaps = []
+    jobs = []
+    
+    for start, end in gaps:
+        k = np.searchsorted(valid_frames, start)
+        if k < context_samples:
+            continue
+        context = valid_frames[k - context_samples:k]
+        if len(np.unique(timeline_ms[context])) < 5:
+            continue
+        job_gaps.append((start, end))
+        jobs.append((timeline_ms[context], positions[context], timeline_ms[start:end]))
+    
+    return job_gaps, jobs
+
+def hermite_fill_gaps(timeline_ms, positions, valid_mask, gaps, max_speed=7.0, tangent_frames=5):
+    """
+    Fill every interior gap at once with bounded-speed cubic Hermite curves.
+    
+    Each gap is bridged from its last measured frame to the next one, with
+    end tangents taken from the measured velocity on each side over
+    tangent_frames frames (clamped to max_speed). Gaps whose curve would exceed max_speed anywhere fall back
+    to the straight chord, which is the slowest possible path.
+    Leading and trailing gaps have only one side and are left untouched.
+    
+    Args:
+        timeline_ms: Frame timestamps in milliseconds
+        positions: (N, 2) array, gap frames are overwritten
+        valid_mask: Boolean array, True where the frame was measured
+        gaps: List of (start, end) from find_gaps
+        max_speed: Maximum allowed speed in m/s
+        tangent_frames: Baseline in frames for the end velocities (longer = less noise)
+        
+    Returns:
+        (positions, filled): positions with interior gaps filled and a
+        boolean array telling which gaps were filled
+    """
+    n = len(timeline_ms)
+    bounds = np.array(gaps, dtype=np.int64).reshape(-1, 2)
+    filled = (bounds[:, 0] > 0) & (bounds[:, 1] < n)
+    if not filled.any():
+        return positions, filled
+    
+    starts, ends = bounds[filled, 0], bounds[filled, 1]
+    left, right = starts - 1, ends
+    p_left, p_right = positions[left], positions[right]
+    t_left, t_right = timeline_ms[left], timeline_ms[right]
+    span_s = (t_right - t_left) / 1000.0
+    chord_velocity = (p_right - p_left) / span_s[:, None]
+    
+    # === END TANGENTS: measured velocity on each side of the gap ===
+    def side_velocity(inner, outer, sign):
+        has_outer = (outer >= 0) & (outer < n)
+        outer = np.clip(outer, 0, n - 1)
+        has_outer &= valid_mask[outer]
+        dt = sign * (timeline_ms[inner] - timeline_ms[outer]) / 1000.0
+        has_outer &= dt > 0
+        velocity = sign * (positions[inner] - positions[outer]) / np.where(has_outer, dt, 1.0)[:, None]
+        velocity = np.where(has_outer[:, None], velocity, chord_velocity)
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        scale = np.minimum(1.0, max_speed / np.maximum(speed, 1e-9))
+        return velocity * scale[:, None]
+    
+    m_left = side_velocity(left, left - tangent_frames, 1)
+    m_right = side_velocity(right, right + tangent_frames, -1)
+    
+    # === ALL GAP FRAMES IN ONE ARRAY ===
+    lengths = ends - starts
+    gap_id = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    frames = starts[gap_id] + (np.arange(lengths.sum()) - offsets[gap_id])
+    
+    u = ((timeline_ms[frames] - t_left[gap_id]) / (t_right - t_left)[gap_id])[:, None]
+    u2, u3 = u * u, u * u * u
+    span = span_s[gap_id][:, None]
+    curve = ((2 * u3 - 3 * u2 + 1) * p_left[gap_id] +
+             (u3 - 2 * u2 + u) * span * m_left[gap_id] +
+             (-2 * u3 + 3 * u2) * p_right[gap_id] +
+             (u3 - u2) * span * m_right[gap_id])
+    
+    # === SPEED BOUND: any step over max_speed -> straight chord ===
+    first_frame = np.zeros(len(frames), dtype=bool)
+    first_frame[offsets] = True
+    prev_pos = np.where(first_frame[:, None], p_left[gap_id], np.roll(curve, 1, axis=0))
+    prev_ts = np.where(first_frame, t_left[gap_id], np.roll(timeline_ms[frames], 1))
+    step_speed = np.hypot(*(curve - prev_pos).T) / np.maximum((timeline_ms[frames] - prev_ts) / 1000.0, 1e-9)
+    last_frame = offsets + lengths - 1
+    exit_speed = np.hypot(*(p_right - curve[last_frame]).T) / np.maximum((t_right - timeline_ms[frames[last_frame]]) / 1000.0, 1e-9)
+    too_fast = (np.maximum.reduceat(step_speed, offsets) > max_speed) | (exit_speed > max_speed)
+    
+    chord = p_left[gap_id] + u * (p_right - p_left)[gap_id]
+    positions[frames] = np.where(too_fast[gap_id][:, None], chord, curve)
+    
+    return positions, filled
+
+def predict_gap_batch(jobs, kernels=None, max_speed=7.0):
+    """
+    Fill a sequence of gaps with one GPR fit per gap.
+    
+    Gaps are processed in order and each fit is warm-started from the
+    kernel of the previous gap in the batch.
+    
+    Args:
+        jobs: List of (context_timestamps, context_positions, gap_timestamps)
+        kernels: Optional (x, y) kernels to warm-start the first fit
+        max_speed: Maximum allowed speed in m/s between predicted frames
+        
+    Returns:
+        (predictions, kernels): one list of [x, y] (or None if the fit
+        failed) per job, and the last fitted (x, y) kernels
+    """
+    predictor = TrajectoryPredictor("indoor")
+    if kernels is not None:
+        predictor.set_kernels(kernels)
+    
+    predictions = []
+    for context_ts, context_pos, gap_ts in jobs:
+        if predictor.train(context_ts, context_pos):
+            # The last context sample is the measured frame just before the gap
+            predictions.append(predictor.predict(gap_ts, max_speed, context_pos[-1], context_ts[-1]))
+        else:
+            predictions.append(None)
+    
+    return predictions, predictor.get_kernels()
+
 class UWBHexagonReplaySystem:
-    def __init__(self, csv_file, optimize_memory=False, skip_trail=False, verbose_debug=False):
+    def __init__(self, csv_file, optimize_memory=False, skip_trail=False, verbose_debug=False,
+                 gpr_workers=None, hermite_fill=False, use_blit=True, frames=None,
+                 interactive=True, use_cache=True, focus_tag=None, zones_file=None, profile_file=None,
+                 background=False, time_window=None, live_source=None, live_window_s=30.0,
+                 comparisons=None, side_by_side=False):
         """
         Initialize the advanced replay system
         
@@ -254,11 +528,34 @@ class UWBHexagonReplaySystem:
             optimize_memory: Flag to optimize memory in large datasets (>1M rows)
             skip_trail: Flag to omit real-time trajectory (reduces memory)
             verbose_debug: Flag to show all GPR debug logs (can be spam)
+            gpr_workers: Worker processes for GPR gap filling (None = all cores)
+            hermite_fill: Flag to fill signal gaps with bounded-speed Hermite curves
+            use_blit: Flag to redraw only the dynamic artists over a cached background
+            frames: Already processed FrameCache (skips loading and filtering)
+            interactive: Flag to create the slider/buttons (False for headless export)
+            use_cache: Flag to reuse/save the processed timeline cache next to the CSV
+            focus_tag: Tag followed with trail and statistics (default: first tag in the file)
+            zones_file: JSON file with the zone polygons (default: replay/zones.json)
+            profile_file: CSV path to enable per-frame profiling (overlay + raw samples)
+            background: Flag to process on a worker thread while the window is already
+                        shown (needs the animation loop of start_replay to collect results)
+            time_window: Optional (start, end) to replay only part of the session
+                         (seconds, [HH:]MM:SS from the start or absolute timestamps)
+            live_source: CsvTailSource/MqttSource to follow a session as it is recorded
+                         (csv_file is ignored)
+            live_window_s: Seconds shown in live mode
+            comparisons: Sessions (CSV files) or filter settings of this session
+                         ('raw', 'kalman', 'kalman+hermite', 'gpr', ...) played
+                         in sync with it on the same timeline
+            side_by_side: Flag to draw each comparison in its own panel instead
+                          of overlaid on the main court
         """
         print("Loading UWB Replay System...")
+        load_matplotlib()
         
         self.use_kalman_filter = False
         self.use_ml_prediction = False
+        self.use_hermite_fill = hermite_fill
         self.optimize_memory = optimize_memory
         self.skip_trail = skip_trail
         self.verbose_debug = verbose_debug
@@ -274,73 +571,72 @@ class UWBHexagonReplaySystem:
         self.trail_length = None
         
         self.animation_step_ms = 20
+        
+        # Blitting: static court/anchors are cached, only moving artists are redrawn
+        self.use_blit = use_blit
+        self.frame_interval_ms = 17 if use_blit else 40  # Display tick: ~60 FPS blitted, 25 FPS full redraw
         self.max_player_speed = 7.0
         self.interpolation_threshold = 100
-        self.gpr_train_interval_ms = 500
-        self._last_gpr_train_ms = -1
+        self.timeline_step_ms = None        # None: 60 fps for dense data, 30 fps for sparse data
+        self.smoothing_window = 3
+        self.kalman_process_noise = 0.3     # OPTIMIZED: Increased (0.1 -> 0.3) for SPORTS (high reactivity)
+        self.kalman_measurement_noise = 0.1
+        self.gpr_context_samples = 10       # Measured frames before a gap used to fit its GPR
+        self.gpr_workers = gpr_workers or os.cpu_count() or 1
+        self.gpr_parallel_min_gaps = 16     # Below this, process startup costs more than it saves
         
         self.kalman_filter = None
-        self.trajectory_predictor = TrajectoryPredictor("indoor")
-        
+        self.zones_file = zones_file
+        self.zone_map = ZoneMap.from_file(zones_file)
+        self.trajectory_predictor = None    # Created on first ML use (imports sklearn)
+        self.profiler = FrameProfiler(profile_file) if profile_file else None
+        self.profile_refresh_frames = 15    # Overlay text refreshed every N frames
+        self.pipeline = BackgroundPipeline() if background and live_source is None else None
+        self.live_source = live_source
+        self.live_window_s = live_window_s
+        
+        # Sesiones de comparación: se procesan junto con la principal y se
+        # remuestrean sobre su línea de tiempo (ComparisonTracks)
+        self.comparison_specs = [parse_comparison(spec) for spec in comparisons or []]
+        self.side_by_side = side_by_side and bool(self.comparison_specs)
+        self.comparison_frames = None
+        self.comparison = None
+        self._variant_label = None
+        
+        self.csv_file = csv_file
+        self.use_cache = use_cache
+        self.time_window = tuple(time_window) if time_window and any(v is not None for v in time_window) else None
         self.original_df = None
         self.df = None
-        
-        self.load_data(csv_file)
+        self.frames = None
+        self.trail = None
+        self.focus_tag = focus_tag
+        self.tag_ids = None
+        self.tag_positions = None
+        
+        if frames is not None:
+            self.frames = frames
+        elif self.live_source is not None:
+            print(f"Live mode: {self.live_source.describe()}, last {self.live_window_s:.0f}s shown")
+        elif self.pipeline is not None:
+            # The window opens now; the timeline is swapped in when ready
+            self.pipeline.submit(self.load_timeline_job, 'Loading session')
+        else:
+            self.load_data(csv_file)
         self.setup_plot()
         self.setup_animation_controls()
-        self.setup_interactive_controls()
+        if self.live_source is not None:
+            self.is_playing = True
+        if interactive:
+            self.setup_interactive_controls()
         
     def load_data(self, csv_file):
-        """Load and process CSV data with advanced filters"""
+        """Load and process CSV data with advanced filters (or reopen its cached timeline)"""
         try:
-            file_size_mb = os.path.getsize(csv_file) / (1024 * 1024)
-            print(f"File size: {file_size_mb:.1f} MB")
-            
-            if file_size_mb > 20:
-                print("WARNING: Large dataset detected")
-                
-                if not self.optimize_memory and file_size_mb > 50:
-                    print("RECOMMENDATION: Activate memory optimization")
-            
-            if self.optimize_memory:
-                print("Memory optimization mode active")
-                try:
-                    self.original_df = pd.read_csv(csv_file)
-                    for col in ['x', 'y']:
-                        if col in self.original_df.columns:
-                            self.original_df[col] = self.original_df[col].astype('float32')
-                    if 'tag_id' in self.original_df.columns:
-                        self.original_df['tag_id'] = self.original_df['tag_id'].astype('int32')
-                except Exception as e:
-                    self.original_df = pd.read_csv(csv_file)
-            else:
-                self.original_df = pd.read_csv(csv_file)
-            
-            num_rows = len(self.original_df)
-            memory_usage_mb = self.original_df.memory_usage(deep=True).sum() / (1024 * 1024)
+            self.frames = self.load_timeline_job()
             
-            print(f"Original rows: {num_rows:,}")
-            print(f"Current DataFrame memory: {memory_usage_mb:.1f} MB")
-            
-            self.original_df['timestamp'] = pd.to_datetime(self.original_df['timestamp'])
-            
-            required_columns = ['timestamp', 'x', 'y', 'tag_id']
-            # Check for Z column, if not present create it with 0.0
-            if 'z' not in self.original_df.columns:
-                print("Note: 'z' column not found, initializing with 0.0")
-                self.original_df['z'] = 0.0
-            missing_cols = [col for col in required_columns if col not in self.original_df.columns]
-            if missing_cols:
-                raise ValueError(f"Missing columns: {missing_cols}")
-            
-            print(f"Original data loaded: {len(self.original_df)} rows")
-            
-            self.apply_advanced_filtering()
-            
-            if self.df is not None and len(self.df) > 0:
-                print(f"Duration: {(self.df['timestamp'].iloc[-1] - self.df['timestamp'].iloc[0]).total_seconds():.1f} seconds")
-                print(f"X range: {self.df['x'].min():.1f} - {self.df['x'].max():.1f}m")
-                print(f"Y range: {self.df['y'].min():.1f} - {self.df['y'].max():.1f}m")
+            if self.frames is not None and len(self.frames) > 0:
+                self.print_timeline_summary()
             else:
                 print("Could not process data correctly")
                 sys.exit(1)
@@ -349,23 +645,188 @@ class UWBHexagonReplaySystem:
             print(f"Error loading data: {e}")
             sys.exit(1)
     
+    def load_timeline_job(self):
+        """Timeline of the session and of its comparisons (returns the FrameCache of the session)"""
+        frames = self.load_session_timeline()
+        if frames is not None and self.comparison_specs:
+            self.comparison_frames = self.load_comparisons()
+        return frames
+    
+    def load_session_timeline(self):
+        """Cached timeline of the session or a full processing run (returns the FrameCache)"""
+        frames = load_timeline(self.csv_file, self.get_processing_params()) if self.use_cache else None
+        if frames is not None:
+            # Cached timeline: arrays are paged in lazily from disk
+            print(f"Processed timeline loaded from cache: {len(frames)} frames")
+            return frames
+        return self.process_timeline()
+    
+    def load_comparisons(self):
+        """
+        Timelines of the comparison sessions/filter settings.
+        
+        Each one goes through the same pipeline (and timeline cache) as
+        the main session; failures only drop that comparison.
+        
+        Returns:
+            List with a FrameCache (or None) per comparison
+        """
+        comparison_frames = []
+        for label, csv_file, settings in self.comparison_specs:
+            print(f"\nComparison '{label}':")
+            try:
+                frames = self.process_variant(label, csv_file, settings)
+            except Exception as e:
+                print(f"Error processing comparison '{label}': {e}")
+                frames = None
+            if frames is None:
+                print(f"Comparison '{label}' skipped: no data")
+            comparison_frames.append(frames)
+        return comparison_frames
+    
+    def process_variant(self, label, csv_file=None, settings=None):
+        """
+        Timeline of another session or of other filter settings.
+        
+        The pipeline works on the instance state, so that state is swapped
+        for the run and restored afterwards; the raw positions are reused
+        when only the settings change.
+        
+        Args:
+            label: Name shown in the progress indicator
+            csv_file: Other session (None: this session)
+            settings: use_* flags overriding the current ones (None: current)
+            
+        Returns:
+            FrameCache or None
+        """
+        state_names = ['csv_file', 'original_df', 'df', 'tag_ids', 'tag_positions', 'kalman_filter',
+                       'use_kalman_filter', 'use_hermite_fill', 'use_ml_prediction']
+        saved = {name: getattr(self, name) for name in state_names}
+        try:
+            self._variant_label = label
+            if csv_file is not None:
+                self.csv_file = csv_file
+                self.original_df = None
+            for name, value in (settings or {}).items():
+                setattr(self, name, value)
+            return self.load_session_timeline()
+        finally:
+            if csv_file is None and saved['original_df'] is None:
+                # Raw positions read for the variant also serve the session
+                saved['original_df'] = self.original_df
+            for name, value in saved.items():
+                setattr(self, name, value)
+            self._variant_label = None
+    
+    def print_timeline_summary(self):
+        """Duration, ranges and zone times of the processed timeline"""
+        frames = self.frames
+        if frames is None:
+            return
+        print(f"Duration: {frames.elapsed_s[-1]:.1f} seconds")
+        print(f"X range: {np.min(frames.x):.1f} - {np.max(frames.x):.1f}m")
+        print(f"Y range: {np.min(frames.y):.1f} - {np.max(frames.y):.1f}m")
+        print(f"Zone changes: {len(frames.zone_changes) - 1}")
+        for name, seconds in zip(frames.zone_names, frames.zone_time_s):
+            if seconds > 0:
+                print(f"   {name}: {seconds:.1f}s")
+    
+    def report_progress(self, fraction, message):
+        """Progress of the running pipeline (shown on screen in background mode)"""
+        if self.pipeline is not None:
+            if self._variant_label is not None:
+                message = f"{self._variant_label}: {message}"
+            self.pipeline.report(fraction, message)
+    
+    def load_original_data(self, csv_file):
+        """Read the raw positions of a CSV file into original_df"""
+        file_size_mb = os.path.getsize(csv_file) / (1024 * 1024)
+        print(f"File size: {file_size_mb:.1f} MB")
+        
+        if file_size_mb > 20:
+            print("WARNING: Large dataset detected")
+            
+            if not self.optimize_memory and file_size_mb > 50:
+                print("RECOMMENDATION: Activate memory optimization")
+        
+        # Streaming load: only the replay columns, compact dtypes from the
+        # start, copied chunk by chunk into preallocated arrays
+        if self.optimize_memory:
+            print("Memory optimization mode active (float32 positions)")
+        if 'z' not in read_header(csv_file):
+            print("Note: 'z' column not found, initializing with 0.0")
+        
+        start, end = self.time_window or (None, None)
+        if self.time_window:
+            # Time index: only the bytes of the window are read
+            print(f"Time window: {start if start is not None else 'start'} - {end if end is not None else 'end'}")
+        
+        self.original_df = load_positions(
+            csv_file,
+            columns=REPLAY_COLUMNS,
+            float_dtype=np.float32 if self.optimize_memory else np.float64,
+            start=start, end=end
+        )
+        if len(self.original_df) == 0:
+            print("No positions in the selected time window")
+            self.original_df = None
+            return
+        
+        num_rows = len(self.original_df)
+        print(f"Original rows: {num_rows:,}")
+        print(f"Current DataFrame memory: {estimate_memory_mb(self.original_df):.1f} MB")
+        
+        print(f"Original data loaded: {len(self.original_df)} rows")
+
+    def get_processing_params(self):
+        """Parameters that determine the processed timeline (timeline cache key)"""
+        return {
+            'interpolation_threshold': self.interpolation_threshold,
+            'timeline_step_ms': self.timeline_step_ms,
+            'smoothing_window': self.smoothing_window,
+            'kalman': [self.kalman_process_noise, self.kalman_measurement_noise,
+                       self.animation_step_ms] if self.use_kalman_filter else None,
+            'gap_fill': 'hermite' if self.use_hermite_fill else 'gpr' if self.use_ml_prediction else 'hold',
+            'gpr_context_samples': self.gpr_context_samples,
+            'max_player_speed': self.max_player_speed,
+            'focus_tag': self.focus_tag,
+            'zones': self.zone_map.key,
+            'window': list(self.time_window) if self.time_window else None,
+        }
+    
     def apply_advanced_filtering(self):
         """Apply advanced filters: Kalman + ML + Interpolation"""
+        self.set_frames(self.process_timeline())
+    
+    def process_timeline(self):
+        """
+        Run the filtering pipeline on the raw positions.
+        
+        Touches no matplotlib artist, so it can run on the background
+        worker; set_frames shows the result.
+        
+        Returns:
+            FrameCache of the processed timeline, or None
+        """
+        if self.original_df is None and self.csv_file is not None:
+            # Timeline came from the cache: raw data is only read when reprocessing
+            self.report_progress(0.02, "Reading positions")
+            self.load_original_data(self.csv_file)
+        
         if self.original_df is None:
             print("No original data to process")
-            return
+            return None
+        
+        if self.pipeline is not None and self.frames is None and self._variant_label is None:
+            # Nothing on screen yet: show the raw trajectory meanwhile
+            tag_ids = self.original_df['tag_id']
+            preview_tag = self.focus_tag if (tag_ids == self.focus_tag).any() else tag_ids.iloc[0]
+            preview = self.original_df.loc[tag_ids == preview_tag, ['x', 'y']].to_numpy()
+            self.pipeline.set_preview(preview[:, 0], preview[:, 1])
             
         print("Applying advanced filters...")
-        
-        if self.use_kalman_filter:
-            first_valid_pos = self.find_first_valid_position()
-            if first_valid_pos is not None:
-                # OPTIMIZED: Increased process_noise (0.1 -> 0.3) for SPORTS (high reactivity)
-                self.kalman_filter = KalmanPositionFilter(
-                    initial_pos=first_valid_pos,
-                    process_noise=0.3,
-                    measurement_noise=0.1
-                )
+        self.report_progress(0.25, "Resampling")
         
         self.df = self.apply_intelligent_interpolation()
         
@@ -373,16 +834,106 @@ class UWBHexagonReplaySystem:
             print(f"Filters applied: {len(self.df)} interpolated frames")
         else:
             print("Error: Could not apply filters")
+        
+        self.report_progress(0.85, "Building frames")
+        frames = self.build_frame_cache()
+        
+        if self.use_cache and frames is not None and self.csv_file is not None:
+            self.report_progress(0.95, "Saving cache")
+            cache_file = save_timeline(self.csv_file, self.get_processing_params(), frames)
+            if cache_file is not None:
+                print(f"Processed timeline cached: {os.path.basename(cache_file)}")
+        return frames
     
-    def find_first_valid_position(self):
-        """Find the first valid position in the data"""
-        if self.original_df is None:
+    def build_frame_cache(self):
+        """Precompute per-frame arrays so update_frame only indexes them (returns the FrameCache)"""
+        if self.df is None or len(self.df) == 0:
             return None
-            
-        for _, row in self.original_df.iterrows():
-            if not (np.isnan(row['x']) or np.isnan(row['y'])):
-                return [row['x'], row['y']]
-        return None
+        
+        return FrameCache.from_dataframe(self.df, self.zone_map.classify(self.df['x'], self.df['y']),
+                                         self.zone_map.names,
+                                         tag_xy=self.tag_positions, tag_ids=self.tag_ids,
+                                         verbose=self.verbose_debug)
+    
+    def set_frames(self, frames):
+        """Show a (re)processed timeline, keeping the current position"""
+        self.frames = frames
+        self._shown_zone_id = None
+        
+        # The trail was built from the previous timeline
+        if self.trail is not None and frames is not None:
+            self.total_frames = len(frames)
+            self.current_frame = min(self.current_frame, self.total_frames - 1)
+            self.trail.reset()
+            self.configure_players()
+            self.configure_comparison()
+            self.reset_heatmap()
+            self.clock.set_timeline(frames.elapsed_s, self.current_frame)
+            if self.is_playing:
+                self.clock.play()
+    
+    def reprocess(self, job, label):
+        """
+        Run a pipeline job that returns a FrameCache and show its result.
+        
+        In background mode the current timeline keeps playing and the new
+        one is swapped in by poll_pipeline when ready.
+        """
+        if self.pipeline is not None:
+            self.pipeline.submit(job, label)
+            return
+        self.set_frames(job())
+        self.update_frame(self.current_frame)
+        self.fig.canvas.draw_idle()
+    
+    def pipeline_busy(self):
+        """True (and a notice) while a background job is running"""
+        if self.pipeline is not None and self.pipeline.busy():
+            print(" Processing in progress, try again when it finishes")
+            return True
+        return False
+    
+    def live_only(self, feature):
+        """True (and a notice) for features that need a complete session"""
+        if self.live_source is not None:
+            print(f" {feature} is not available in live mode")
+            return True
+        return False
+    
+    def poll_pipeline(self):
+        """GUI thread: show the progress and preview, swap in a finished timeline"""
+        pipeline = self.pipeline
+        if pipeline is None or not pipeline.busy():
+            return
+        
+        preview = pipeline.take_preview()
+        if preview is not None:
+            self.preview_line.set_data(*preview)
+            self.preview_line.set_visible(True)
+        
+        done, frames, error = pipeline.poll()
+        if not done:
+            self.progress_text.set_text(pipeline.status_text())
+            self.progress_text.set_visible(True)
+            return
+        
+        if error is not None:
+            print(f"Error processing data: {error}")
+            self.progress_text.set_text(f"Processing failed: {error}")
+            return
+        if frames is None or len(frames) == 0:
+            if self.frames is None:
+                print("Could not process data correctly")
+                self.progress_text.set_text("Could not process data correctly")
+            return
+        
+        first_load = self.frames is None
+        self.set_frames(frames)
+        self.preview_line.set_visible(False)
+        self.progress_text.set_visible(False)
+        print(f" Timeline ready: {len(frames)} frames ({pipeline.label}: {pipeline.elapsed_s():.1f}s)")
+        if first_load:
+            self.print_timeline_summary()
     
     def apply_intelligent_interpolation(self):
         """Aplicar interpolación inteligente con ML y Kalman optimizada para fluidez"""
@@ -390,15 +941,20 @@ class UWBHexagonReplaySystem:
             return None
             
         # Convert timestamps to milliseconds to work
-        timestamps_ms = np.array([
-            (ts - self.original_df['timestamp'].iloc[0]).total_seconds() * 1000
-            for ts in self.original_df['timestamp']
-        ], dtype=np.float64)
-        
-        original_avg_interval = np.mean(np.diff(timestamps_ms))
-        print(f"Original average interval: {original_avg_interval:.1f}ms")
-        
-        if original_avg_interval > 500:
+        timestamps = self.original_df['timestamp']
+        start_time = timestamps.min()
+        timestamps_ms = ((timestamps - start_time).dt.total_seconds() * 1000).to_numpy(dtype=np.float64)
+        tag_ids = self.original_df['tag_id'].to_numpy()
+        num_tags = len(np.unique(tag_ids))
+        
+        # Samples of all tags are interleaved: interval per tag
+        original_avg_interval = float(np.diff(np.sort(timestamps_ms)).mean()) * num_tags
+        print(f"Original average interval: {original_avg_interval:.1f}ms ({num_tags} tags)")
+        
+        if self.timeline_step_ms is not None:
+            fluid_step_ms = self.timeline_step_ms
+            print(f"Using fixed timeline step: {fluid_step_ms:.2f}ms")
+        elif original_avg_interval > 500:
             fluid_step_ms = 33.33  
             print("Using 30fps for sparse data")
         else:
@@ -406,78 +962,68 @@ class UWBHexagonReplaySystem:
             print("Using 60fps for dense data")
         
         start_ms = 0
-        end_ms = timestamps_ms[-1]
+        end_ms = timestamps_ms.max()
         full_timeline = np.arange(start_ms, end_ms + fluid_step_ms, fluid_step_ms)
         
-        positions = self.original_df[['x', 'y']].values
-        interpolated_positions = []
+        positions = self.original_df[['x', 'y']].to_numpy(dtype=np.float64)
         
-        for target_ms in full_timeline:
-            idx = np.searchsorted(timestamps_ms, target_ms)
-            if idx >= len(timestamps_ms):
-                idx = len(timestamps_ms) - 1
-            if idx > 0 and abs(timestamps_ms[idx - 1] - target_ms) < abs(timestamps_ms[idx] - target_ms):
-                closest_idx = idx - 1
-            else:
-                closest_idx = idx
+        # === NEAREST SAMPLE FOR EVERY FRAME AND TAG (one vectorised pass) ===
+        tags, tag_positions, valid = resample_tags(timestamps_ms, tag_ids, positions,
+                                                   full_timeline, self.interpolation_threshold)
+        
+        for tag_idx, tag in enumerate(tags):
+            valid_mask = valid[:, tag_idx]
+            interpolated_positions = tag_positions[:, tag_idx].copy()
+            self.report_progress(0.3 + 0.55 * tag_idx / len(tags), f"Filtering tag {tag}")
+            if num_tags > 1:
+                print(f" Tag {tag}: {int(valid_mask.sum())}/{len(valid_mask)} measured frames")
             
-            if abs(timestamps_ms[closest_idx] - target_ms) <= self.interpolation_threshold:
-                pos = positions[closest_idx]
-                
-                if self.use_kalman_filter and self.kalman_filter is not None:
-                    dt = self.animation_step_ms / 1000.0
-                    pos = self.kalman_filter.process(pos, dt)
-                
-                interpolated_positions.append(pos)
-                
-            else:
-                if (
-                    self.use_ml_prediction and
-                    len(interpolated_positions) >= 10
-                ):
-
-                    # Solo reentrenar GPR si ha pasado el intervalo mínimo
-                    should_train = (
-                        (self._last_gpr_train_ms < 0) or
-                        (target_ms - self._last_gpr_train_ms >= self.gpr_train_interval_ms) or
-                        (not self.trajectory_predictor.is_trained)
-                    )
-
-                    if should_train:
-                        # Entrenar con las 10 últimas muestras válidas
-                        recent_positions = np.array(interpolated_positions[-10:])
-                        recent_timestamps = np.array(full_timeline[len(interpolated_positions)-10 : len(interpolated_positions)])
-
-                        # Verificar que haya al menos 5 timestamps distintos
-                        unique_ts = len(np.unique(recent_timestamps))
-                        if unique_ts >= 5 and self.trajectory_predictor.train(recent_timestamps, recent_positions):
-                            self._last_gpr_train_ms = target_ms
-                        else:
-                            # Si no se pudo entrenar, caeremos en fallback lineal más abajo
-                            pass
-
-                    # Predecir si el modelo está entrenado
-                    if self.trajectory_predictor.is_trained:
-                        predictions = self.trajectory_predictor.predict([target_ms], self.max_player_speed)
-                        if predictions:
-                            pos = predictions[0]
-                        else:
-                            pos = self.linear_interpolation_fallback(interpolated_positions, target_ms)
-                    else:
-                        pos = self.linear_interpolation_fallback(interpolated_positions, target_ms)
-                
-                interpolated_positions.append(pos)
+            if self.use_kalman_filter:
+                # One filter per tag, started at its first measured position
+                self.kalman_filter = KalmanPositionFilter(
+                    initial_pos=interpolated_positions[np.argmax(valid_mask)].tolist(),
+                    process_noise=self.kalman_process_noise,
+                    measurement_noise=self.kalman_measurement_noise
+                )
+                dt = self.animation_step_ms / 1000.0
+                for i in np.flatnonzero(valid_mask):
+                    interpolated_positions[i] = self.kalman_filter.process(interpolated_positions[i], dt)
+            
+            # === RELLENO DE HUECOS (un modelo por hueco) ===
+            interpolated_positions = self.fill_gaps(full_timeline, interpolated_positions, valid_mask)
+            
+            # NUEVO: Aplicar suavizado adicional con media móvil
+            tag_positions[:, tag_idx] = self.apply_moving_average_smoothing(interpolated_positions.tolist(),
+                                                                            window_size=self.smoothing_window)
         
-        # NUEVO: Aplicar suavizado adicional con media móvil
-        smoothed_positions = self.apply_moving_average_smoothing(interpolated_positions)
+        self.tag_ids = tags.tolist()
+        self.tag_positions = tag_positions.astype(np.float32) if self.optimize_memory else tag_positions
         
-        # Crear DataFrame interpolado
+        # Focus tag: the one shown with trail and statistics
+        if self.focus_tag in self.tag_ids:
+            focus_tag = self.focus_tag
+        else:
+            if self.focus_tag is not None:
+                print(f"Tag {self.focus_tag} not found, following tag {tag_ids[0]}")
+            focus_tag = tag_ids[0]
+        
+        timeline = [start_time + timedelta(milliseconds=ms) for ms in full_timeline]
+        return self.build_timeline_dataframe(timeline, tag_positions[:, self.tag_ids.index(focus_tag)], focus_tag)
+    
+    def build_timeline_dataframe(self, timeline, positions, tag_id):
+        """
+        DataFrame of the followed tag with precomputed distances.
+        
+        Args:
+            timeline: Frame timestamps
+            positions: (N, 2) positions of the tag
+            tag_id: Tag id
+        """
         interpolated_df = pd.DataFrame({
-            'timestamp': [self.original_df['timestamp'].iloc[0] + timedelta(milliseconds=ms) 
-                         for ms in full_timeline],
-            'x': [pos[0] for pos in smoothed_positions],
-            'y': [pos[1] for pos in smoothed_positions],
-            'tag_id': [self.original_df['tag_id'].iloc[0]] * len(full_timeline)
+            'timestamp': timeline,
+            'x': positions[:, 0],
+            'y': positions[:, 1],
+            'tag_id': [tag_id] * len(positions)
         })
         
         # === OPTIMIZACIÓN MEMORIA: Mantener tipos eficientes ===
@@ -508,6 +1054,94 @@ class UWBHexagonReplaySystem:
         
         return interpolated_df
     
+    def fill_gaps(self, full_timeline, positions, valid_mask):
+        """
+        Fill frames without a nearby measurement.
+        
+        With ML prediction enabled, every gap gets a single GPR fit on the
+        measured frames just before it and all of its missing frames are
+        predicted in one call. Gaps are independent, so large sessions are
+        spread over a process pool.
+        
+        With Hermite filling enabled, every gap bounded by measurements on
+        both sides is filled at once with a closed-form cubic curve.
+        
+        Args:
+            full_timeline: Frame timestamps in milliseconds
+            positions: (N, 2) array with NaN in the frames to fill
+            valid_mask: Boolean array, True where the frame was measured
+            
+        Returns:
+            (N, 2) array with every gap filled
+        """
+        gaps = find_gaps(valid_mask)
+        if not gaps or not valid_mask.any():
+            return positions
+        
+        valid_frames = np.flatnonzero(valid_mask)
+        predictions = {}
+        
+        if self.use_hermite_fill:
+            positions, filled = hermite_fill_gaps(full_timeline, positions, valid_mask, gaps, self.max_player_speed)
+            gaps = [gap for gap, done in zip(gaps, filled) if not done]
+            print(f"Hermite gap filling: {int(filled.sum())}/{len(filled)} gaps")
+        
+        elif self.use_ml_prediction:
+            gpr_gaps, jobs = build_gap_jobs(full_timeline, positions, valid_mask, gaps, self.gpr_context_samples)
+            
+            if jobs:
+                results = self._run_gap_jobs(jobs)
+                predictions = {gap: pred for gap, pred in zip(gpr_gaps, results) if pred}
+                print(f"GPR gap filling: {len(predictions)}/{len(gaps)} gaps, "
+                      f"{sum(end - start for start, end in predictions)} frames")
+        
+        for start, end in gaps:
+            if (start, end) in predictions:
+                positions[start:end] = predictions[(start, end)]
+            elif start == 0:
+                # Leading gap: hold the first measured position
+                positions[start:end] = positions[valid_frames[0]]
+            elif self.use_ml_prediction:
+                # GPR not available for this gap: conservative extrapolation
+                history = [positions[start - 2], positions[start - 1]] if start >= 2 else [positions[start - 1]]
+                for frame in range(start, end):
+                    pos = self.linear_interpolation_fallback(history, full_timeline[frame])
+                    positions[frame] = pos
+                    history = [history[-1], pos]
+            else:
+                positions[start:end] = positions[start - 1]
+        
+        return positions
+    
+    def _run_gap_jobs(self, jobs):
+        """Run GPR gap jobs serially or across worker processes."""
+        if self.trajectory_predictor is None:
+            self.trajectory_predictor = TrajectoryPredictor("indoor")
+        kernels = self.trajectory_predictor.get_kernels() if self.trajectory_predictor.has_fitted_kernels else None
+        workers = min(self.gpr_workers, len(jobs))
+        
+        if workers > 1 and len(jobs) >= self.gpr_parallel_min_gaps:
+            # Contiguous chunks keep the warm start between neighbouring gaps
+            chunks = [chunk.tolist() for chunk in np.array_split(np.arange(len(jobs)), workers)]
+            try:
+                mp_context = multiprocessing.get_context(GPR_POOL_START_METHOD) if GPR_POOL_START_METHOD else None
+                with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                    futures = [
+                        executor.submit(predict_gap_batch, [jobs[i] for i in chunk], kernels, self.max_player_speed)
+                        for chunk in chunks
+                    ]
+                    batches = [future.result() for future in futures]
+                
+                results = [pred for batch_predictions, _ in batches for pred in batch_predictions]
+                self.trajectory_predictor.set_kernels(batches[-1][1])
+                return results
+            except Exception as e:
+                print(f"GPR process pool unavailable ({e}), filling gaps serially")
+        
+        results, last_kernels = predict_gap_batch(jobs, kernels, self.max_player_speed)
+        self.trajectory_predictor.set_kernels(last_kernels)
+        return results
+    
     def apply_moving_average_smoothing(self, positions_list, window_size=3):
         """
         Aplicar suavizado con media móvil para eliminar tirones.
@@ -637,8 +1271,14 @@ class UWBHexagonReplaySystem:
     
     def setup_plot(self):
         """Configure the visualization of the indoor hexagonal area"""
-        # Create figure and axes
-        self.fig, self.ax = plt.subplots(figsize=(18, 12))
+        # Create figure and axes (one panel per comparison side by side)
+        self.compare_axes = []
+        if self.side_by_side:
+            panels = 1 + len(self.comparison_specs)
+            self.fig, axes = plt.subplots(1, panels, figsize=(min(9 * panels, 27), 8))
+            self.ax, self.compare_axes = axes[0], list(axes[1:])
+        else:
+            self.fig, self.ax = plt.subplots(figsize=(18, 12))
 
         # Try to set window title (may fail on some backends)
         try:
@@ -650,13 +1290,18 @@ class UWBHexagonReplaySystem:
         # ======================== INDOOR AREA (updated to 10.60 x 6.40) ========================
         minX, maxX = 0.0, 10.6
         minY, maxY = 0.0, 6.40
-        self.ax.set_xlim(minX - 1, maxX + 1)
-        self.ax.set_ylim(minY - 1, maxY + 1)
-        self.ax.set_aspect('equal')
-        self.ax.set_facecolor('#f8f8f8')
+        for ax in [self.ax] + self.compare_axes:
+            ax.set_xlim(minX - 1, maxX + 1)
+            ax.set_ylim(minY - 1, maxY + 1)
+            ax.set_aspect('equal')
+            ax.set_facecolor('#f8f8f8')
 
-        self.draw_hexagon_area()
-        self.draw_hexagon_anchors()
+            self.draw_hexagon_area(ax)
+            self.draw_hexagon_anchors(ax)
+        if self.side_by_side:
+            self.ax.set_title(os.path.basename(self.csv_file), fontsize=11, fontweight='bold')
+            for ax, (label, _, _) in zip(self.compare_axes, self.comparison_specs):
+                ax.set_title(label, fontsize=11, fontweight='bold')
         
         # Configure dynamic elements
         self.setup_dynamic_elements()
@@ -668,8 +1313,9 @@ class UWBHexagonReplaySystem:
     
 
     
-    def draw_hexagon_anchors(self):
+    def draw_hexagon_anchors(self, ax=None):
         """Draw UWB anchors in the indoor arrangement (6 anchors) - updated positions for 10.60 x 6.40"""
+        ax = ax if ax is not None else self.ax
         anchors = {
             'A1': (0.0,  0.0,  'blue'),  # Left Bottom Corner
             'A2': (0.0,  6.40, 'blue'),  # Left Top Corner
@@ -680,13 +1326,14 @@ class UWBHexagonReplaySystem:
         }
 
         for anchor_id, (x, y, color) in anchors.items():
-            self.ax.plot(x, y, 's', color=color, markersize=10, zorder=5)
+            ax.plot(x, y, 's', color=color, markersize=10, zorder=5)
             # Place the label slightly offset inside the area for readability
             label_offset_y = 0.25 if y <= 0.5 else 0.3
-            self.ax.text(x, y + label_offset_y, anchor_id, ha='center', va='bottom', fontsize=9, color='black')
+            ax.text(x, y + label_offset_y, anchor_id, ha='center', va='bottom', fontsize=9, color='black')
     
-    def draw_hexagon_area(self):
+    def draw_hexagon_area(self, ax=None):
         """Draw the play area perimeter"""
+        ax = ax if ax is not None else self.ax
         # Vertices of the room (Rectangular 10.6m x 6.40m)
         verts = [
             (0.0, 0.0),       # Lower left
@@ -696,12 +1343,12 @@ class UWBHexagonReplaySystem:
             (0.0, 0.0)        # Close loop
         ]
         poly = patches.Polygon(verts, closed=True, fill=False, edgecolor='orange', linewidth=3, alpha=0.8)
-        self.ax.add_patch(poly)
+        ax.add_patch(poly)
         
         # Add vertex labels for debug
         for i, (x, y) in enumerate(verts[:-1]):
-            self.ax.plot(x, y, 'ro', markersize=6, alpha=0.7)
-            self.ax.text(x+0.2, y+0.2, f'V{i+1}', fontsize=8, color='red', alpha=0.8)
+            ax.plot(x, y, 'ro', markersize=6, alpha=0.7)
+            ax.text(x+0.2, y+0.2, f'V{i+1}', fontsize=8, color='red', alpha=0.8)
     
     def setup_dynamic_elements(self):
         """Configure elements that change during the animation"""
@@ -711,10 +1358,17 @@ class UWBHexagonReplaySystem:
                                        markeredgecolor='#FF4500', markeredgewidth=3,
                                        label='Player', zorder=20)
         
-        # Player number
-        self.player_number = self.ax.text(0, 0, '7', ha='center', va='center',
+        # Player number (id of the followed tag)
+        self.player_number = self.ax.text(0, 0, '', ha='center', va='center',
                                         fontsize=10, fontweight='bold', color='white', zorder=21)
         
+        # === OTHER PLAYERS ===
+        # A single scatter for every other tag: one set_offsets per frame
+        # regardless of the number of players
+        self.players_scatter = self.ax.scatter(np.empty(0), np.empty(0), s=220, marker='o',
+                                               edgecolors='white', linewidths=2, zorder=19)
+        self.configure_players()
+        
         # === FULL TRAJECTORY (all trajectory visible) ===
         if not self.skip_trail:
             # Main trajectory with gradient
@@ -737,6 +1391,15 @@ class UWBHexagonReplaySystem:
             self.trail_dots = None
             print(" Memory optimization mode: simplified full trajectory")
         
+        # Incremental trail: only new points are appended each frame and older
+        # history is decimated to screen resolution (level-of-detail pyramid)
+        self.trail = IncrementalTrail([self.trail_line, self.trail_shadow, self.trail_dots],
+                                      resolution=self.get_pixel_size())
+        self.fig.canvas.mpl_connect('resize_event', self.on_resize)
+        
+        # === SESIONES DE COMPARACIÓN ===
+        self.setup_comparison_elements()
+        
         # === INDICADORES DE VELOCIDAD ===
         # Círculo de velocidad (DESACTIVADO para máxima fluidez)
         self.speed_indicator = None  # Desactivado por rendimiento
@@ -747,23 +1410,184 @@ class UWBHexagonReplaySystem:
         
         # === ZONA ACTUAL ===
         # Posicionado muy abajo para evitar solapamiento total
-        self.current_zone = self.ax.text(20, -4.5, '', ha='center', va='center',
+        # Inside the axes (bottom centre) so blitting can redraw it
+        self.current_zone = self.ax.text(0.5, 0.03, '', transform=self.ax.transAxes,
+                                       ha='center', va='bottom',
                                        fontsize=10, color='white', fontweight='bold',
-                                       bbox=dict(boxstyle='round,pad=0.4', 
-                                               facecolor='black', alpha=0.9,
-                                               edgecolor='yellow', linewidth=1))
+                                       bbox=dict(boxstyle='round,pad=0.5', 
+                                               facecolor='black', alpha=0.85,
+                                               edgecolor='yellow', linewidth=1.5))
+        
+        # === ESTADO (PLAY/PAUSE + HORA) ===
+        # Replaces the per-frame set_title: a title lives outside the axes and
+        # forces a full redraw, this text is blitted with the other artists
+        self.status_text = self.ax.text(0.98, 0.98, '', transform=self.ax.transAxes,
+                                      ha='right', va='top', fontsize=12, fontweight='bold',
+                                      color='orange',
+                                      bbox=dict(boxstyle='round,pad=0.2', facecolor='black', alpha=0.7))
+        self._shown_zone_id = None
+        self._shown_playing = None
+        
+        # === PROCESAMIENTO EN SEGUNDO PLANO ===
+        # Vista previa de la trayectoria bruta y progreso mientras se procesa
+        self.preview_line, = self.ax.plot([], [], '-', color='gray', alpha=0.5, linewidth=1,
+                                          zorder=8, visible=False)
+        self.progress_text = self.ax.text(0.5, 0.5, '', transform=self.ax.transAxes,
+                                        ha='center', va='center', fontsize=12, family='monospace',
+                                        color='white', zorder=30, visible=False,
+                                        bbox=dict(boxstyle='round,pad=0.5', facecolor='black', alpha=0.75))
+        
+        # === PERFILADO (opcional) ===
+        self.profile_text = None
+        if self.profiler is not None:
+            self.profile_text = self.ax.text(0.98, 0.91, '', transform=self.ax.transAxes,
+                                           ha='right', va='top', fontsize=8, family='monospace',
+                                           color='cyan',
+                                           bbox=dict(boxstyle='round,pad=0.3', facecolor='black', alpha=0.7))
         
         # === TRAYECTORIA PERSISTENTE ===
         # La trayectoria completa permanece visible durante todo el replay
         # Desde el punto inicial hasta la posición actual del jugador
         
         # === MAPA DE CALOR ===
-        # Eliminado para optimización de memoria - usar directamente self.df si se necesita
+        # Rejilla fija de tiempo de permanencia (memoria constante), se
+        # acumula de forma incremental solo mientras está visible (tecla H)
+        self.heatmap = OccupancyHeatmap()
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+        self.heatmap_image = self.ax.imshow(np.zeros((self.heatmap.ny, self.heatmap.nx)),
+                                            extent=self.heatmap.extent(), origin='lower',
+                                            cmap='YlOrRd', alpha=0.6, interpolation='nearest',
+                                            zorder=1, visible=False)
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+        self.heatmap_refresh_frames = 15    # Image redrawn at most every N frames
+        self.reset_heatmap()
+    
+    def setup_comparison_elements(self):
+        """
+        Artists of the comparison tracks: a trail line and a label per track,
+        plus one shared scatter for all overlaid dots (or a dot per panel
+        side by side)
+        """
+        self.compare_scatter = None
+        self.compare_dots = []
+        self.compare_trails = []
+        self.compare_texts = []
+        if not self.comparison_specs:
+            return
         
+        for k, (label, _, _) in enumerate(self.comparison_specs):
+            color = ComparisonTracks.color(k)
+            ax = self.compare_axes[k] if self.side_by_side else self.ax
+            line, = ax.plot([], [], '-', color=color, alpha=0.7, linewidth=2, zorder=10)
+            self.compare_trails.append(IncrementalTrail([line], resolution=self.get_pixel_size(ax)))
+            if self.side_by_side:
+                dot, = ax.plot([], [], 'o', color=color, markersize=14,
+                               markeredgecolor='black', markeredgewidth=2, zorder=20)
+                self.compare_dots.append(dot)
+                text = ax.text(0.02, 0.98, '', transform=ax.transAxes, va='top', ha='left',
+                               fontsize=9, color='white', family='monospace',
+                               bbox=dict(boxstyle='round,pad=0.3', facecolor=color, alpha=0.85))
+            else:
+                # Leyenda bajo el panel de estadísticas, una línea por sesión
+                text = ax.text(0.02, 0.82 - 0.045 * k, '', transform=ax.transAxes, va='top', ha='left',
+                               fontsize=9, color='white', family='monospace',
+                               bbox=dict(boxstyle='round,pad=0.3', facecolor=color, alpha=0.85))
+            self.compare_texts.append(text)
+        
+        if not self.side_by_side:
+            colors = [ComparisonTracks.color(k) for k in range(len(self.comparison_specs))]
+            self.compare_scatter = self.ax.scatter(np.empty(0), np.empty(0), s=200, marker='D',
+                                                   edgecolors='black', linewidths=2, zorder=19)
+            self.compare_scatter.set_facecolors(colors)
+        self.configure_comparison()
+    
+    def configure_comparison(self):
+        """Resample the comparison timelines onto the timeline on screen"""
+        if self.frames is None or self.comparison_frames is None:
+            return
+        labels = [label for label, _, _ in self.comparison_specs]
+        self.comparison = ComparisonTracks(labels, self.comparison_frames, self.frames)
+        for trail in self.compare_trails:
+            trail.reset()
+        for k, text in enumerate(self.compare_texts):
+            if not self.comparison.available[k]:
+                text.set_text(f"{self.comparison.labels[k]}: no data")
+    
+    def update_comparison(self, frame_idx):
+        """Per-frame update of the comparison tracks (array indexing only)"""
+        comparison = self.comparison
+        if comparison is None:
+            return
+        if self.compare_scatter is not None:
+            self.compare_scatter.set_offsets(comparison.positions(frame_idx))
+        for k, trail in enumerate(self.compare_trails):
+            if not comparison.available[k]:
+                continue
+            trail.update(comparison.x[k], comparison.y[k], frame_idx)
+            if self.compare_dots:
+                self.compare_dots[k].set_data([comparison.x[k, frame_idx]], [comparison.y[k, frame_idx]])
+            self.compare_texts[k].set_text(f"{comparison.labels[k]:<14} Δ{comparison.offset[k, frame_idx]:5.2f}m "
+                                           f"DIST{comparison.cum_dist[k, frame_idx]:5.0f}m")
+        
+    def reset_heatmap(self):
+        """Restart the heatmap for the current timeline"""
+        self.heatmap.reset()
+        self._heatmap_dwell = frame_dwell_times(self.frames.elapsed_s) if self.frames is not None else None
+        self._heatmap_shown_frame = None
+    
+    def update_heatmap(self, frame_idx):
+        """Accumulate the heatmap up to frame_idx and refresh the overlay"""
+        frames = self.frames
+        if frames is None:
+            return
+        self.heatmap.advance_to(frames.x, frames.y, self._heatmap_dwell, frame_idx)
+        
+        shown = self._heatmap_shown_frame
+        if shown is None or frame_idx < shown or frame_idx - shown >= self.heatmap_refresh_frames:
+            grid = self.heatmap.grid()
+            self.heatmap_image.set_data(grid)
+            self.heatmap_image.set_clim(0.0, max(grid.max(), 1e-6))
+            self._heatmap_shown_frame = frame_idx
+    
+    def toggle_heatmap(self):
+        """Show/hide the occupancy heatmap overlay"""
+        visible = not self.heatmap_image.get_visible()
+        self.heatmap_image.set_visible(visible)
+        self._heatmap_shown_frame = None
+        print(f" Heatmap: {'Visible' if visible else 'Hidden'}")
+        
+    def configure_players(self):
+        """Assign the followed tag and a colour to every other tag"""
+        if self.frames is None:
+            return
+        tag_ids = self.frames.tag_ids
+        focus_idx = tag_ids.index(self.frames.focus_tag)
+        self.player_number.set_text(str(self.frames.focus_tag))
+        
+        self._other_tags = np.array([i for i in range(len(tag_ids)) if i != focus_idx], dtype=np.intp)
+        colors = plt.get_cmap('tab10')(np.arange(len(self._other_tags)) % 10)
+        self.players_scatter.set_offsets(np.empty((0, 2)))
+        self.players_scatter.set_facecolors(colors)
+    
+    def get_pixel_size(self, ax=None):
+        """Size of one screen pixel in data units (meters)"""
+        ax = ax if ax is not None else self.ax
+        x_min, x_max = ax.get_xlim()
+        width_px = max(ax.get_window_extent().width, 1.0)
+        return (x_max - x_min) / width_px
+    
+    def on_resize(self, event):
+        """Adapt the trail level of detail to the new window size"""
+        if self.trail is not None:
+            self.trail.set_resolution(self.get_pixel_size())
+        for k, trail in enumerate(self.compare_trails):
+            trail.set_resolution(self.get_pixel_size(self.compare_axes[k] if self.side_by_side else None))
+    
     def setup_info_panel(self):
         """Configure real-time information panel"""
         # Compact information panel (upper left corner)
-        info_text = ("CONTROLS: SPACE=Play/Pause | ←→=Frame | ↑↓=Speed | R=Reset | Q=Exit")
+        info_text = ("CONTROLS: SPACE=Play/Pause | ←→=Frame | ↑↓=Speed | R=Reset | H=Heatmap | Q=Exit")
         
         self.info_panel = self.ax.text(0.02, 0.98, info_text, transform=self.ax.transAxes,
                                      va='top', ha='left', fontsize=9, color='white',
@@ -779,93 +1603,51 @@ class UWBHexagonReplaySystem:
     def setup_animation_controls(self):
         """Configure animation controls with speeds 0.1x-10x"""
         self.current_frame = 0
-        self.total_frames = len(self.df) if self.df is not None else 0
+        self.total_frames = len(self.frames) if self.frames is not None else 0
         self.is_playing = False
         self.playback_speed = 1.0
         self.max_playback_speed = 10.0  # Maximum playback speed (10x)
         self.min_speed = 0.1            # Minimum playback speed (0.1x)
         
+        # Wall-clock scheduler: the frame shown depends on elapsed real time,
+        # not on how many ticks were drawn (late ticks skip frames)
+        self.clock = PlaybackClock(self.frames.elapsed_s if self.frames is not None else [0.0],
+                                   self.playback_speed)
+        
         # Connect keyboard events
         self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
         
     def get_player_zone(self, x, y):
         """Determine the current player zone in the indoor area"""
-        # === ZONES FOR INDOOR AREA ===
-        # Verify if it is within the valid area
-        if not (-1.0 <= x <= 7.0 and -1.0 <= y <= 8.5):
-            return "OUTSIDE THE AREA"
-        
-        # Specific zones for the indoor area (10.6m x 6.40m)
-        if y >= 5.5:
-            return "NORTH ZONE"
-        elif y <= 1.8:
-            return "SOUTH ZONE"
-        elif x >= 4.0:
-            return "EAST ZONE"
-        elif x <= 2.0:
-            return "WEST ZONE"
-        elif 2.0 <= x <= 4.0 and 1.8 <= y <= 5.5:
-            return "CENTER ZONE"
-        else:
-            return "INDOOR AREA"
+        return self.zone_map.names[int(self.zone_map.classify(x, y)[0])]
     
     def calculate_speed(self, frame_idx):
-        """Calculate instantaneous speed with realistic limits"""
-        if self.df is None or frame_idx == 0:
+        """Instantaneous speed with realistic limits (precomputed at load time)"""
+        if self.frames is None or frame_idx == 0:
             return 0.0
-            
-        current_row = self.df.iloc[frame_idx]
-        prev_row = self.df.iloc[frame_idx - 1]
-        
-        # Euclidean distance
-        dx = current_row['x'] - prev_row['x'] 
-        dy = current_row['y'] - prev_row['y']
-        distance = np.sqrt(dx**2 + dy**2)
-        
-        # Elapsed time
-        dt = (current_row['timestamp'] - prev_row['timestamp']).total_seconds()
-        
-        # Prevent division by zero
-        if dt == 0 or dt <= 0:
-            return 0.0
-            
-        speed = distance / dt  # m/s
-        
-        # === CORRECCIÓN: Limitar velocidades físicamente imposibles ===
-        # Velocidad máxima humana realista indoor: 8 m/s (incluye margen)
-        max_realistic_speed = 8.0
-        
-        if speed > max_realistic_speed:
-            # Warning only for extreme cases (>2x limit)
-            if speed > max_realistic_speed * 2 and self.verbose_debug:
-                print(f"   [SPEED WARNING] Unrealistic speed detected: {speed:.1f} m/s → limited to {max_realistic_speed} m/s")
-            speed = max_realistic_speed
-        
-        # Suavizado simple con frame anterior para evitar picos
-        if hasattr(self, '_last_calculated_speed') and self._last_calculated_speed is not None:
-            # Evitar cambios bruscos >50% entre frames consecutivos
-            speed_change_ratio = abs(speed - self._last_calculated_speed) / max(self._last_calculated_speed, 0.1)
-            if speed_change_ratio > 0.5:
-                # Suavizar cambio brusco
-                speed = 0.7 * self._last_calculated_speed + 0.3 * speed
-        
-        # Almacenar para próximo frame
-        self._last_calculated_speed = speed
-        
-        return speed
+        return float(self.frames.speed[frame_idx])
     
     def update_frame(self, frame_idx):
         """Actualizar visualización para el frame actual"""
-        if self.df is None or len(self.df) == 0:
-            return []
+        if self.frames is None or len(self.frames) == 0:
+            # Still processing: only the preview/progress artists change
+            return self.get_dynamic_artists()
             
         if frame_idx >= self.total_frames:
             frame_idx = self.total_frames - 1
             
-        # Datos del frame actual
-        current_data = self.df.iloc[frame_idx]
-        x, y = current_data['x'], current_data['y']
-        timestamp = current_data['timestamp']
+        # Datos del frame actual (arrays precalculados, acceso O(1))
+        frames = self.frames
+        x, y = frames.x[frame_idx], frames.y[frame_idx]
+        speed = frames.speed[frame_idx]
+        zone_id = frames.zone_id[frame_idx]
+        elapsed_time = frames.elapsed_s[frame_idx]
+        total_distance = frames.cum_dist[frame_idx]  # Distancia acumulativa precalculada
+        speed_class = SPEED_CLASS_LABELS[frames.speed_class[frame_idx]]
+        
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.mark('data')
         
         # === ACTUALIZAR JUGADOR ===
         # Posición del jugador
@@ -874,30 +1656,19 @@ class UWBHexagonReplaySystem:
         # Número del jugador (sigue al jugador)
         self.player_number.set_position((x, y))
         
+        # Resto de jugadores (un solo artista para todos)
+        if len(self._other_tags):
+            self.players_scatter.set_offsets(frames.tag_xy[frame_idx, self._other_tags])
+        
         # === ACTUALIZAR TRAYECTORIA COMPLETA (desde inicio hasta posición actual) ===
-        if not self.skip_trail:
-            # Mostrar TODA la trayectoria desde el inicio hasta el frame actual
-            trail_data = self.df.iloc[0:frame_idx + 1]
-            
-            if len(trail_data) > 1:
-                # Trayectoria principal completa
-                self.trail_line.set_data(trail_data['x'], trail_data['y'])
-                
-                # Sombra de la trayectoria completa (solo si no está optimizado)
-                if self.trail_shadow:
-                    self.trail_shadow.set_data(trail_data['x'], trail_data['y'])
-                
-                # Puntos de trayectoria completa con degradado (solo si no está optimizado)
-                if self.trail_dots:
-                    self.trail_dots.set_data(trail_data['x'], trail_data['y'])
-        else:
-            # Modo optimización: trayectoria completa pero simplificada
-            trail_data = self.df.iloc[0:frame_idx + 1]
-            if len(trail_data) > 1:
-                self.trail_line.set_data(trail_data['x'], trail_data['y'])
+        # Solo se añaden los frames nuevos; el historial antiguo se decima
+        # (línea, sombra y puntos si no está optimizado)
+        if self.trail is not None:
+            self.trail.update(frames.x, frames.y, frame_idx)
         
-        # === CALCULAR VELOCIDAD Y DIRECCIÓN ===
-        speed = self.calculate_speed(frame_idx)
+        # Sesiones de comparación en la misma línea de tiempo
+        if self.comparison is not None:
+            self.update_comparison(frame_idx)
         
         # Indicador visual de velocidad (DESACTIVADO para máxima fluidez)
         # speed_radius = min(3.0, speed * 0.4)  # Radio máximo 3m
@@ -906,128 +1677,200 @@ class UWBHexagonReplaySystem:
         #     self.speed_indicator.radius = speed_radius
         
         # === ZONA ACTUAL ===
-        zone = self.get_player_zone(x, y)
-        self.current_zone.set_text(zone)
-        
-        # Cambiar color de la zona según el área
-        if "ÁREA" in zone:
-            zone_color = 'red'
-            zone_edge = 'yellow'
-        elif "DEFENSA" in zone:
-            zone_color = 'blue'
-            zone_edge = 'lightblue'
-        elif "ATAQUE" in zone:
-            zone_color = 'orangered'
-            zone_edge = 'orange'
-        elif "CENTRO" in zone or "MEDIO" in zone:
-            zone_color = 'green'
-            zone_edge = 'lightgreen'
-        else:
-            zone_color = 'black'
-            zone_edge = 'yellow'
-        
-        self.current_zone.set_bbox(dict(boxstyle='round,pad=0.5', 
-                                      facecolor=zone_color, alpha=0.85,
-                                      edgecolor=zone_edge, linewidth=1.5))
+        # Solo se actualiza texto y color cuando cambia la zona
+        if zone_id != self._shown_zone_id:
+            self._shown_zone_id = zone_id
+            self.set_zone_label(zone_id)
         
         # === MAPA DE CALOR ===
-        # Optimización: Eliminado almacenamiento en memoria - datos disponibles en self.df
+        if self.heatmap_image.get_visible():
+            self.update_heatmap(frame_idx)
         
         # === ESTADÍSTICAS AVANZADAS ===
-        elapsed_time = (timestamp - self.df['timestamp'].iloc[0]).total_seconds()
         progress = (frame_idx / self.total_frames) * 100
         
-        # === OPTIMIZACIÓN: Usar distancia acumulativa precalculada ===
-        total_distance = self.df['cum_dist'].iloc[frame_idx] if frame_idx < len(self.df) else 0
+        # Velocidad pedida y (reproduciendo) la conseguida realmente
+        achieved = self.clock.achieved_speed() if self.is_playing else None
+        speed_text = f"SPD{self.playback_speed:.1f}x" + (f"({achieved:.1f}x)" if achieved is not None else "")
         
-        # Speed classification (ASCII compatible icons)
-        if speed < 1.0:
-            speed_class = "[WALK] WALKING"
-        elif speed < 3.0:
-            speed_class = "[JOG]  JOGGING"
-        elif speed < 5.0:
-            speed_class = "[RUN]  RUNNING"
-        else:
-            speed_class = "[SPRINT] SPRINT"
-        
-        stats_text = (f"TIME {elapsed_time:.1f}s | POS({x:.1f},{y:.1f}) | {speed_class} {speed:.1f}m/s | DIST{total_distance:.0f}m | {frame_idx + 1}/{self.total_frames} | {progress:.0f}% | SPD{self.playback_speed:.1f}x")
+        stats_text = (f"TIME {elapsed_time:.1f}s | POS({x:.1f},{y:.1f}) | {speed_class} {speed:.1f}m/s | DIST{total_distance:.0f}m | {frame_idx + 1}/{self.total_frames} | {progress:.0f}% | {speed_text}")
         
         self.stats_panel.set_text(stats_text)
         
-        # === TÍTULO DINÁMICO ===
-        title_color = 'lightgreen' if self.is_playing else 'orange'
+        # === ESTADO DINÁMICO (color solo al cambiar play/pause) ===
+        if self.is_playing != self._shown_playing:
+            self._shown_playing = self.is_playing
+            self.status_text.set_color('lightgreen' if self.is_playing else 'orange')
         status_icon = 'PLAY' if self.is_playing else 'PAUSE'
+        self.status_text.set_text(f"{status_icon} {frames.clock_text(frame_idx)}")
         
-        self.ax.set_title(f"{status_icon} {timestamp.strftime('%H:%M:%S.%f')[:-3]}",
-                         fontsize=12, fontweight='bold', color=title_color,
-                         bbox=dict(boxstyle='round,pad=0.2', facecolor='black', alpha=0.7))
+        # === PERFILADO ===
+        if profiler is not None:
+            if self.profile_text is not None and profiler.count % self.profile_refresh_frames == 0:
+                self.profile_text.set_text(profiler.overlay_text())
+            profiler.mark('artists')
         
+        return self.get_dynamic_artists()
+    
+    def get_dynamic_artists(self):
+        """Artists redrawn every frame (everything else is static background)"""
+        comparison_artists = [line for trail in self.compare_trails for line in trail.artists]
+        comparison_artists += self.compare_dots + self.compare_texts
         return [element for element in [
-            self.player_dot, self.player_number, self.trail_line, 
+            self.heatmap_image, self.player_dot, self.player_number, self.players_scatter, self.trail_line, 
             self.trail_shadow, self.trail_dots, self.current_zone, 
-            self.stats_panel, self.speed_indicator
-        ] if element is not None]
+            self.stats_panel, self.status_text, self.speed_indicator, self.profile_text,
+            self.preview_line, self.progress_text, self.compare_scatter
+        ] + comparison_artists if element is not None]
+    
+    def set_zone_label(self, zone_id):
+        """Show the zone name with its configured colours"""
+        frames = self.frames
+        if frames is None:
+            return
+        self.current_zone.set_text(frames.zone_names[zone_id])
+        zone_color, zone_edge = self.zone_map.colors[zone_id]
+        
+        bbox_patch = self.current_zone.get_bbox_patch()
+        if bbox_patch is not None:
+            bbox_patch.set_facecolor(zone_color)
+            bbox_patch.set_edgecolor(zone_edge)
     
     def animate(self, frame):
-        """Función de animación principal con control de velocidad mejorado"""
+        """Función de animación principal: el reloj decide qué frame mostrar"""
+        if self.profiler is not None:
+            self.profiler.start_frame(self.current_frame)
+        if self.live_source is not None:
+            return self.update_live()
+        
+        self.poll_pipeline()
+        
         if self.is_playing:
-            # --- NUEVO CONTROL DE VELOCIDAD ---
-            if self.playback_speed >= 1.0:
-                frames_to_advance = int(round(self.playback_speed))
-                self.current_frame = min(self.current_frame + frames_to_advance, self.total_frames - 1)
-                # Mantener un intervalo constante (40 ms ≈ 25 FPS)
-                if hasattr(self, 'anim') and hasattr(self.anim, 'event_source'):
-                    self.anim.event_source.interval = 40
-            else:
-                # Velocidad más lenta: avanzar 1 frame pero alargar intervalo
-                self.current_frame = min(self.current_frame + 1, self.total_frames - 1)
-                if hasattr(self, 'anim') and hasattr(self.anim, 'event_source'):
-                    slow_interval = int(40 / self.playback_speed)  # Ej.: 0.5x → 80 ms
-                    self.anim.event_source.interval = slow_interval
+            # Frame según el tiempo real transcurrido (se saltan frames si el dibujo va retrasado)
+            self.current_frame, finished = self.clock.next_frame()
             
             # Pausar automáticamente al final
-            if self.current_frame >= self.total_frames - 1:
-                self.is_playing = False
+            if finished:
+                self.set_playing(False)
+        
+        if self.profiler is not None:
+            self.profiler.set_frame(self.current_frame)
+            self.profiler.mark('clock')
                 
         return self.update_frame(self.current_frame)
     
+    def update_live(self):
+        """Draw the last live_window_s seconds of the live feed (every tick)"""
+        source = self.live_source
+        if source is None:
+            return self.get_dynamic_artists()
+        source.poll()
+        feed = source.feed
+        frames = feed.window_frames(self.live_window_s, self.zone_map, self.focus_tag, self.max_player_speed)
+        if frames is None:
+            self.progress_text.set_text(f"Waiting for positions ({source.describe()})...")
+            self.progress_text.set_visible(True)
+            return self.get_dynamic_artists()
+        self.progress_text.set_visible(False)
+        
+        tags_changed = (self.frames is None or frames.tag_ids != self.frames.tag_ids
+                        or frames.focus_tag != self.frames.focus_tag)
+        self.frames = frames
+        self.total_frames = len(frames)
+        self.current_frame = len(frames) - 1
+        if tags_changed:
+            self.configure_players()
+        
+        # The window slides every tick: the trail is rebuilt (bounded by the window length)
+        if self.trail is not None:
+            self.trail.last_frame = -1
+        if self.heatmap_image.get_visible():
+            self.reset_heatmap()
+        
+        artists = self.update_frame(self.current_frame)
+        self.status_text.set_text(f"LIVE {frames.clock_text(self.current_frame)} | +{feed.latency_ms():.0f}ms")
+        return artists
+    
+    def make_live_filter(self, initial_pos):
+        """Online Kalman filter for one tag of the live feed"""
+        return KalmanPositionFilter(initial_pos=initial_pos,
+                                    process_noise=self.kalman_process_noise,
+                                    measurement_noise=self.kalman_measurement_noise)
+    
+    def set_playing(self, playing):
+        """Start/stop the playback clock at the current frame"""
+        if playing and self.current_frame >= self.total_frames - 1:
+            self.current_frame = 0  # Play at the end restarts
+        if self.is_playing and not playing:
+            self.print_playback_stats()
+        self.is_playing = playing
+        if playing:
+            self.clock.play(self.current_frame)
+        else:
+            self.clock.pause()
+    
+    def set_playback_speed(self, speed):
+        """Change the playback speed without moving the current position"""
+        self.playback_speed = float(np.clip(speed, self.min_speed, self.max_playback_speed))
+        self.clock.set_speed(self.playback_speed)
+    
+    def print_playback_stats(self):
+        """Report achieved vs requested speed of the last playback window"""
+        achieved = self.clock.achieved_speed()
+        if achieved is None:
+            return
+        fps = self.clock.render_fps() or 0.0
+        print(f" Playback: {achieved:.2f}x achieved / {self.playback_speed:.2f}x requested | "
+              f"{fps:.0f} FPS drawn | {self.clock.frames_dropped} frames dropped")
+    
+    def init_animation(self):
+        """Draw the first frame and declare the dynamic artists for blitting"""
+        return self.update_frame(self.current_frame)
+    
     def on_key_press(self, event):
         """Handle keyboard events"""
+        if self.frames is None and event.key != 'q':
+            return  # Timeline still loading
+        if self.live_source is not None and event.key not in ('h', 'q'):
+            return  # Live: always the newest position
+        
         if event.key == ' ':  # Space - Play/Pause
-            self.is_playing = not self.is_playing
+            self.set_playing(not self.is_playing)
             print(f"Replay: {'Started' if self.is_playing else 'Paused'}")
             
         elif event.key == 'left':  # Left arrow
             self.current_frame = max(0, self.current_frame - 1)
+            self.clock.seek(self.current_frame)
             print(f" Frame: {self.current_frame + 1}/{self.total_frames}")
             
         elif event.key == 'right':  # Right arrow
             self.current_frame = min(self.total_frames - 1, self.current_frame + 1)
+            self.clock.seek(self.current_frame)
             print(f" Frame: {self.current_frame + 1}/{self.total_frames}")
             
         elif event.key == 'up':  # Up arrow
-            self.playback_speed = min(self.max_playback_speed, self.playback_speed + 0.5)
+            self.set_playback_speed(self.playback_speed + 0.5)
             print(f" Speed: {self.playback_speed:.1f}x")
-            # Update animation interval immediately (limited to 60 FPS for slow hardware)
-            if hasattr(self, 'anim') and hasattr(self.anim, 'event_source'):
-                self.anim.event_source.interval = max(17, int(40 / self.playback_speed))
             # Synchronize slider avoiding recursive callback
             self._sync_slider_safely(self.playback_speed)
             
         elif event.key == 'down':  # Down arrow
-            self.playback_speed = max(self.min_speed, self.playback_speed - 0.5)
+            self.set_playback_speed(self.playback_speed - 0.5)
             print(f" Speed: {self.playback_speed:.1f}x")
-            # Update animation interval immediately (limited to 60 FPS for slow hardware)
-            if hasattr(self, 'anim') and hasattr(self.anim, 'event_source'):
-                self.anim.event_source.interval = max(17, int(40 / self.playback_speed))
             # Synchronize slider avoiding recursive callback
             self._sync_slider_safely(self.playback_speed)
             
         elif event.key == 'r':  # R - Restart
+            self.set_playing(False)
             self.current_frame = 0
-            self.is_playing = False
+            self.clock.seek(0)
             print(" Replay restarted")
             
+        elif event.key == 'h':  # H - Heatmap
+            self.toggle_heatmap()
+            self.update_frame(self.current_frame)
+            self.fig.canvas.draw_idle()
+            
         elif event.key == 'q':  # Q - Exit
             print(" Closing replay...")
             plt.close(self.fig)
@@ -1049,18 +1892,69 @@ class UWBHexagonReplaySystem:
         print("   Q:  Exit")
         print("=" * 50)
         
-        # Configure animation
+        # Configure animation: it only ticks, the clock picks the frame
+        # (the timeline may not be loaded yet in background mode)
         self.anim = FuncAnimation(
-            self.fig, self.animate, frames=self.total_frames,
-            interval=40,  # 25 FPS = 40ms between frames
-            repeat=True, blit=False
+            self.fig, self.animate, frames=None,
+            init_func=self.init_animation,
+            interval=self.frame_interval_ms,
+            repeat=True, blit=self.use_blit,
+            cache_frame_data=False
         )
+        print(f" Render mode: {'blitting' if self.use_blit else 'full redraw'} "
+              f"({1000 / self.frame_interval_ms:.0f} FPS target)")
+        if self.profiler is not None:
+            self.instrument_animation()
+        live_source = self.live_source
+        if live_source is not None:
+            self.fig.canvas.mpl_connect('close_event', lambda event: live_source.close())
         
         # Show replay
         # Manual layout adjustment already done with subplots_adjust to avoid overlaps
         plt.subplots_adjust(left=0.05, right=0.98, bottom=0.12, top=0.94)
         plt.show()
 
+    def instrument_animation(self):
+        """
+        Close the frames timed by animate() through public hooks only.
+
+        animate() starts every frame and marks the clock, data and artist
+        stages. Blitting draws synchronously inside the animation step, so
+        a timer callback registered after the step closes the frame. A full
+        redraw only happens later (draw_idle), so the canvas draw_event
+        closes it.
+        """
+        profiler = self.profiler
+        if profiler is None:
+            return
+        canvas = self.fig.canvas
+        event_source = self.anim.event_source
+        if self.use_blit and event_source is not None:
+            event_source.add_callback(self.end_profiled_frame)
+        else:
+            canvas.mpl_connect('draw_event', lambda event: self.end_profiled_frame())
+        canvas.mpl_connect('close_event', self.on_close_profile)
+        print(f" Profiling frames -> {profiler.output_file}")
+
+    def end_profiled_frame(self):
+        """Assign the time since the last mark to the draw and store the frame"""
+        if self.profiler is not None:
+            self.profiler.mark('draw')
+            self.profiler.end_frame()
+    
+    def on_close_profile(self, event):
+        """Write the profile samples when the window closes"""
+        profiler = self.profiler
+        if profiler is None:
+            return
+        print("\n FRAME PROFILE")
+        print("=" * 50)
+        print(profiler.summary())
+        saved = profiler.save()
+        if saved:
+            print(f" Raw samples saved to: {saved}")
+        print("=" * 50)
+    
     def setup_interactive_controls(self):
         """Configurar controles interactivos avanzados con slider 0.1x-10x"""
         # Área para controles interactivos (espacio optimizado)
@@ -1081,8 +1975,13 @@ class UWBHexagonReplaySystem:
         self.ml_button = Button(ax_ml, 'ML Pred')
         self.ml_button.on_clicked(self.toggle_ml)
         
+        # Botón para relleno de huecos Hermite (alternativa rápida a ML)
+        ax_hermite = plt.axes((0.75, 0.05, 0.08, 0.03))
+        self.hermite_button = Button(ax_hermite, 'Hermite')
+        self.hermite_button.on_clicked(self.toggle_hermite)
+        
         # Etiqueta de información de controles (pequeña)
-        ax_info = plt.axes((0.75, 0.05, 0.22, 0.03))
+        ax_info = plt.axes((0.85, 0.05, 0.12, 0.03))
         ax_info.text(0.5, 0.5, 'Usa teclado para control fino', 
                     ha='center', va='center', fontsize=8, color='gray',
                     transform=ax_info.transAxes)
@@ -1109,179 +2008,117 @@ class UWBHexagonReplaySystem:
         Args:
             val: Valor del slider (0.1 a 10.0)
         """
-        self.playback_speed = np.clip(val, 0.1, self.max_playback_speed)
-        
-        # Actualizar intervalo de animación instantáneamente (limitado a 60 FPS para hardware lento)
-        if hasattr(self, 'anim') and hasattr(self.anim, 'event_source'):
-            self.anim.event_source.interval = max(17, int(40 / self.playback_speed))
+        # El reloj se re-ancla: la velocidad cambia sin saltos de posición
+        self.set_playback_speed(val)
     
     def toggle_kalman(self, event):
         """Activate/deactivate Kalman filter"""
+        if self.pipeline_busy():
+            return
         self.use_kalman_filter = not self.use_kalman_filter
         print(f" Kalman filter: {'Activated' if self.use_kalman_filter else 'Deactivated'}")
         self.update_button_colors()
         
+        if self.live_source is not None:
+            # Online filtering of the samples that arrive from now on
+            self.live_source.feed.set_filter_factory(self.make_live_filter if self.use_kalman_filter else None)
+            return
+        
         # === OPTIMIZATION: Only reprocess Kalman if already interpolated data ===
         if self.df is not None and len(self.df) > 0:
             # Keep base data and only reapply Kalman
-            self._reapply_kalman_filter()
+            self.reprocess(self._reapply_kalman_filter, 'Kalman filter')
         else:
             # First processing or invalid data - full reload
-            self.apply_advanced_filtering()
+            self.reprocess(self.process_timeline, 'Kalman filter')
     
     def _reapply_kalman_filter(self):
-        """Reapply Kalman filter to already interpolated data"""
-        if self.df is None:
-            return
+        """Reapply Kalman filter to already interpolated data (returns the FrameCache)"""
+        if self.df is None or self.tag_positions is None or self.tag_ids is None:
+            return None
             
         print(" Reapplying Kalman filter...")
         
         # Reinitialize Kalman filter if activated
         if self.use_kalman_filter:
-            first_valid_pos = self.find_first_valid_position()
-            if first_valid_pos is not None:
-                # OPTIMIZED: Increased process_noise (0.1 -> 0.3) for SPORTS (high reactivity)
+            # Reapply Kalman to existing positions, one filter per tag.
+            # On a copy: the timeline on screen may share this array
+            self.tag_positions = self.tag_positions.copy()
+            dt = self.animation_step_ms / 1000.0
+            for tag_idx in range(self.tag_positions.shape[1]):
+                self.report_progress(0.9 * tag_idx / self.tag_positions.shape[1],
+                                     f"Kalman tag {self.tag_ids[tag_idx]}")
+                tag_positions = self.tag_positions[:, tag_idx]
                 self.kalman_filter = KalmanPositionFilter(
-                    initial_pos=first_valid_pos,
-                    process_noise=0.3,
-                    measurement_noise=0.1
+                    initial_pos=tag_positions[0].tolist(),
+                    process_noise=self.kalman_process_noise,
+                    measurement_noise=self.kalman_measurement_noise
                 )
-                
-                # Reapply Kalman to existing positions
-                dt = self.animation_step_ms / 1000.0
-                for i in range(len(self.df)):
-                    pos = [self.df.iloc[i]['x'], self.df.iloc[i]['y']]
-                    filtered_pos = self.kalman_filter.process(pos, dt)
-                    self.df.iloc[i, self.df.columns.get_loc('x')] = filtered_pos[0]
-                    self.df.iloc[i, self.df.columns.get_loc('y')] = filtered_pos[1]
+                for i in range(len(tag_positions)):
+                    tag_positions[i] = self.kalman_filter.process(tag_positions[i], dt)
+            
+            focus_tag = int(self.df['tag_id'].iloc[0])
+            self.df = self.build_timeline_dataframe(self.df['timestamp'].tolist(),
+                                                    self.tag_positions[:, self.tag_ids.index(focus_tag)],
+                                                    focus_tag)
+            return self.build_frame_cache()
         else:
             # If Kalman is deactivated, we need original data - full reload
-            self.apply_advanced_filtering()
+            return self.process_timeline()
     
     def toggle_ml(self, event):
         """Activate/deactivate ML prediction"""
+        if self.pipeline_busy() or self.live_only("ML gap filling"):
+            return
         self.use_ml_prediction = not self.use_ml_prediction
+        if self.use_ml_prediction:
+            self.use_hermite_fill = False
         print(f"ML prediction: {'Activated' if self.use_ml_prediction else 'Deactivated'}")
         self.update_button_colors()
         
-        # === OPTIMIZATION: Only recalculate if really necessary ===
-        # ML only affects gap interpolation, not already valid data
-        # Only reload if there are large changes in interpolation
-        print(" ML configuration updated (effect on upcoming signal gaps)")
+        # ML only affects gap filling: with one GPR fit per gap a full
+        # reprocess is cheap enough to apply the change immediately.
+        # Fresh predictor so the warm start does not carry over.
+        self.trajectory_predictor = TrajectoryPredictor("indoor")
+        self.reprocess(self.process_timeline, 'ML gap filling')
+    
+    def toggle_hermite(self, event):
+        """Activate/deactivate closed-form Hermite gap filling"""
+        if self.pipeline_busy() or self.live_only("Hermite gap filling"):
+            return
+        self.use_hermite_fill = not self.use_hermite_fill
+        if self.use_hermite_fill:
+            self.use_ml_prediction = False
+        print(f"Hermite gap filling: {'Activated' if self.use_hermite_fill else 'Deactivated'}")
+        self.update_button_colors()
         
-        # Reset training timestamp to force re-training
-        self._last_gpr_train_ms = -1
+        self.reprocess(self.process_timeline, 'Hermite gap filling')
     
     def update_button_colors(self):
         """Update button and text colors according to state"""
         # Background colors
         kalman_color = 'lightgreen' if self.use_kalman_filter else 'lightcoral'
         ml_color = 'lightblue' if self.use_ml_prediction else 'lightcoral'
+        hermite_color = 'lightblue' if self.use_hermite_fill else 'lightcoral'
         
         # Text colors (better contrast for readability)
         kalman_text_color = 'darkgreen' if self.use_kalman_filter else 'darkred'
         ml_text_color = '#002b5c' if self.use_ml_prediction else 'darkred'  # Darker blue
+        hermite_text_color = '#002b5c' if self.use_hermite_fill else 'darkred'
         
         # Update button background color
         self.kalman_button.ax.set_facecolor(kalman_color)
         self.ml_button.ax.set_facecolor(ml_color)
+        self.hermite_button.ax.set_facecolor(hermite_color)
         
         # Update text color for maximum clarity
         self.kalman_button.label.set_color(kalman_text_color)
         self.ml_button.label.set_color(ml_text_color)
+        self.hermite_button.label.set_color(hermite_text_color)
         
         # Refresh UI immediately
         self.fig.canvas.draw_idle()
 
-def generate_movement_report(csv_file):
-    """Generate movement analysis report"""
-    df = pd.read_csv(csv_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    # Calculate statistics
-    total_time = (df['timestamp'].iloc[-1] - df['timestamp'].iloc[0]).total_seconds()
-    
-    # Early validation: avoid division by zero
-    if total_time <= 0:
-        print("\n  WARNING: Data duration insufficient for analysis")
-        print("   Timestamps do not have a valid temporal range")
-        return
-    
-    # === OPTIMIZACIÓN: Cálculo eficiente de distancias ===
-    # Usar numpy hypot para mejor rendimiento
-    x_diff = df['x'].diff()
-    y_diff = df['y'].diff()
-    step_distances = np.hypot(x_diff, y_diff)
-    step_distances[0] = 0  # First distance is 0
-    
-    total_distance = step_distances.sum()
-    avg_speed = total_distance / total_time  # We already validated total_time > 0
-    
-    # === CORRECTION: Calculate realistic speeds ===
-    # Calculate real frequency and frame-by-frame speeds
-    freq = len(df) / total_time
-    
-    # Frame-by-frame speeds with realistic limit
-    frame_speeds = step_distances * freq  # speed per frame
-    
-    # Apply realistic physical limit
-    max_realistic_speed = 8.0  # m/s - human indoor limit
-    frame_speeds = np.clip(frame_speeds, 0, max_realistic_speed)
-    
-    max_speed = frame_speeds.max() if len(frame_speeds) > 0 else 0
-    
-    # === REALISM WARNINGS ===
-    original_max_speed = (step_distances * freq).max() if len(step_distances) > 0 else 0
-    if original_max_speed > max_realistic_speed:
-        print(f"\n  CORRECTED SPEEDS:")
-        print(f"   Original maximum speed: {original_max_speed:.1f} m/s (unrealistic)")
-        print(f"   Corrected maximum speed: {max_speed:.1f} m/s (limited)")
-        print(f"   Speeds >8 m/s were limited by physical realism")
-    
-    print(f"\n MOVEMENT ANALYSIS REPORT")
-    print("=" * 50)
-    print(f"  Total duration: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
-    print(f" Total distance: {total_distance:.1f} meters")
-    print(f" Average speed: {avg_speed:.2f} m/s")
-    print(f" Maximum speed: {max_speed:.2f} m/s")
-    print(f" Total frames: {len(df)}")
-    print(f" Sampling frequency: ~{len(df)/total_time:.1f} Hz")
-    
-    # === REALISM ANALYSIS ===
-    if avg_speed > 4.0:
-        print(f"  WARNING: Average speed too high ({avg_speed:.1f} m/s)")
-        print("   Typical indoor speed: 1.5-3.0 m/s average")
-    elif avg_speed < 0.5:
-        print(f"  INFO: Low average speed ({avg_speed:.1f} m/s) - slow or static movement")
-    else:
-        print(f" Realistic average speed ({avg_speed:.1f} m/s)")
-    
-    if max_speed > 7.0:
-        print(f"  WARNING: Maximum speed too high ({max_speed:.1f} m/s)")
-    else:
-        print(f" Realistic maximum speed ({max_speed:.1f} m/s)")
-    
-    # === PACKET LOSS ANALYSIS ===
-    print("\n PACKET LOSS ANALYSIS (per Anchor)")
-    print("-" * 50)
-    anchor_cols = [col for col in df.columns if 'anchor_' in col and '_dist' in col]
-    if anchor_cols:
-        for col in anchor_cols:
-            anchor_id = col.replace('anchor_', '').replace('_dist', '')
-            total_samples = len(df)
-            lost_samples = (df[col] == 0).sum()
-            loss_rate = (lost_samples / total_samples) * 100
-            
-            status = "OK"
-            if loss_rate > 50: status = "CRITICAL"
-            elif loss_rate > 20: status = "WARNING"
-            
-            print(f" Anchor {anchor_id}: {loss_rate:5.1f}% Loss ({lost_samples}/{total_samples}) - {status}")
-    else:
-        print(" No anchor distance data found in CSV")
-    
-    print("=" * 50)
-
 def select_replay_file_interactive():
     """
     Interactive file selection for replay from uwb_data
@@ -1373,6 +2210,33 @@ def select_replay_file_interactive():
             return None
 
 
+def run_live(args):
+    """Live mode: follow a growing CSV or the MQTT positions"""
+    feed = LiveFeed()
+    try:
+        if args.mqtt_server:
+            source = MqttSource(feed, args.mqtt_server, args.mqtt_port)
+        else:
+            csv_file = args.csv_file
+            if csv_file is None:
+                candidates = glob.glob(os.path.join('uwb_data', 'uwb_positions_*.csv'))
+                if not candidates:
+                    print("No uwb_data/uwb_positions_*.csv to follow")
+                    return
+                csv_file = max(candidates, key=os.path.getmtime)
+            source = CsvTailSource(csv_file, feed, backlog_s=args.live_window)
+        
+        replay_system = UWBHexagonReplaySystem(None, skip_trail=args.skip_trail, use_blit=not args.no_blit,
+                                               focus_tag=args.tag, zones_file=args.zones,
+                                               profile_file=args.profile_output if args.profile else None,
+                                               live_source=source, live_window_s=args.live_window)
+        replay_system.start_replay()
+    except KeyboardInterrupt:
+        print("\nLive replay cancelled by user")
+    except Exception as e:
+        print(f"Error in live mode: {e}")
+        sys.exit(1)
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(
@@ -1383,23 +2247,96 @@ Usage examples:
   python movement_replay.py                                    # Interactive selection
   python movement_replay.py uwb_data/uwb_positions_xxx.csv    # Specific file
   python movement_replay.py --report uwb_data/uwb_positions_xxx.csv  # Only report
+  python movement_replay.py --report uwb_data/                 # Batch report of all sessions
+  python movement_replay.py --report "uwb_data/uwb_positions_202511*.csv"  # Batch report (glob)
   python movement_replay.py --optimize-memory large_data.csv  # Memory optimization
+  python movement_replay.py data.csv --export match.mp4       # Headless video export
+  python movement_replay.py data.csv --start 1:00:00 --end 1:05:00  # Five minutes of a long capture
+  python movement_replay.py --live                              # Follow the session being recorded
+  python movement_replay.py --live --mqtt-server 127.0.0.1      # Live positions straight from MQTT
+  python movement_replay.py a.csv --compare b.csv              # Two sessions overlaid on one timeline
+  python movement_replay.py a.csv --compare raw kalman --side-by-side  # Same session, other filters
         """
     )
     
     parser.add_argument('csv_file', nargs='?', 
-                       help='CSV file with movement data (optional - if not specified, interactive selection)')
+                       help='CSV file with movement data (optional - if not specified, interactive selection); '
+                            'with --report also a directory or glob pattern')
     parser.add_argument('--report', action='store_true',
-                       help='Show only analysis report without replay')
+                       help='Show only analysis report without replay (batch report for a directory or glob)')
     parser.add_argument('--optimize-memory', action='store_true',
                        help='Optimize memory for large datasets (>1M rows)')
     parser.add_argument('--skip-trail', action='store_true',
                        help='Omit real-time trail to reduce memory')
     parser.add_argument('--verbose-debug', action='store_true',
                        help='Show all GPR debug logs (can generate spam)')
+    parser.add_argument('--hermite', action='store_true',
+                       help='Fill signal gaps with fast bounded-speed Hermite curves instead of GPR')
+    parser.add_argument('--no-blit', action='store_true',
+                       help='Redraw the full figure every frame (for backends without blitting)')
+    parser.add_argument('--export', metavar='PATH',
+                       help='Render the replay headless to a PNG directory or an .mp4 file (needs ffmpeg)')
+    parser.add_argument('--export-fps', type=float, default=None,
+                       help='Frame rate of the export (default: real time at the timeline rate)')
+    parser.add_argument('--export-workers', type=int, default=None,
+                       help='Worker processes for the export (default: all cores)')
+    parser.add_argument('--gpr-workers', type=int, default=None,
+                       help='Worker processes for GPR gap filling (default: all cores)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Ignore cached results (processed timeline, batch report summaries)')
+    parser.add_argument('--report-output', metavar='CSV', default=None,
+                       help='Summary table of a batch report (default: movement_summary.csv next to the sessions)')
+    parser.add_argument('--report-workers', type=int, default=None,
+                       help='Worker processes for batch reports (default: all cores)')
+    parser.add_argument('--heatmap', metavar='PNG',
+                       help='Save the occupancy heatmap of the report to a PNG file')
+    parser.add_argument('--zones', metavar='JSON', default=None,
+                       help='Zone polygons file (default: replay/zones.json)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Time every frame (on-screen p50/p95 and FPS) and save the raw samples')
+    parser.add_argument('--profile-output', metavar='CSV', default='replay_profile.csv',
+                       help='Raw samples file of --profile (default: replay_profile.csv)')
+    parser.add_argument('--start', default=None,
+                       help='Start of the time window: seconds or [HH:]MM:SS from the session start, '
+                            'or "YYYY-mm-dd HH:MM:SS" (single session; reads only that part of the file)')
+    parser.add_argument('--end', default=None,
+                       help='End of the time window (same formats as --start)')
+    parser.add_argument('--live', action='store_true',
+                       help='Follow a session while it is recorded: tail the CSV (default: newest in uwb_data/) '
+                            'or subscribe to MQTT with --mqtt-server')
+    parser.add_argument('--mqtt-server', default=None,
+                       help='MQTT broker for --live (topic uwb/tag/+/status)')
+    parser.add_argument('--mqtt-port', type=int, default=1883,
+                       help='MQTT port for --live')
+    parser.add_argument('--live-window', type=float, default=30.0,
+                       help='Seconds of trajectory shown in live mode')
+    parser.add_argument('--compare', nargs='+', metavar='SESSION', default=None,
+                       help='Play other sessions (CSV files) or this session with other filter settings '
+                            '(raw, kalman, hermite, gpr, combined with +) in sync with the replay')
+    parser.add_argument('--side-by-side', action='store_true',
+                       help='Draw each --compare session in its own panel instead of overlaid')
+    parser.add_argument('--tag', type=int, default=None,
+                       help='Tag followed with trail and statistics (default: first tag in the file)')
     
     args = parser.parse_args()
     
+    # Batch report: directory or glob pattern
+    if args.report and args.csv_file and not os.path.isfile(args.csv_file):
+        if os.path.isdir(args.csv_file) or glob.has_magic(args.csv_file):
+            try:
+                generate_batch_report(args.csv_file, args.report_output, args.report_workers,
+                                      use_cache=not args.no_cache, zones_file=args.zones)
+            except KeyboardInterrupt:
+                print("\nBatch report cancelled by user")
+            return
+    
+    if args.live:
+        if args.compare:
+            print("--compare is not available in live mode")
+            return
+        run_live(args)
+        return
+    
     # File selection
     if args.csv_file:
         # File specified by parameter
@@ -1414,11 +2351,28 @@ Usage examples:
     
     try:
         if args.report:
-            generate_movement_report(selected_file)
+            generate_movement_report(selected_file, args.heatmap, args.zones, args.start, args.end)
+        elif args.export:
+            from video_export import export_replay
+            if args.compare:
+                print("Note: --compare is only shown in the interactive replay, not exported")
+            load_matplotlib().switch_backend('Agg')
+            replay_system = UWBHexagonReplaySystem(selected_file, args.optimize_memory, args.skip_trail, args.verbose_debug,
+                                                   gpr_workers=args.gpr_workers, hermite_fill=args.hermite,
+                                                   use_blit=False, interactive=False, use_cache=not args.no_cache,
+                                                   focus_tag=args.tag, zones_file=args.zones,
+                                                   time_window=(args.start, args.end))
+            export_replay(replay_system, args.export, args.export_fps, args.export_workers)
         else:
-            generate_movement_report(selected_file)
+            generate_movement_report(selected_file, args.heatmap, args.zones, args.start, args.end)
             
-            replay_system = UWBHexagonReplaySystem(selected_file, args.optimize_memory, args.skip_trail, args.verbose_debug)
+            replay_system = UWBHexagonReplaySystem(selected_file, args.optimize_memory, args.skip_trail, args.verbose_debug,
+                                                   gpr_workers=args.gpr_workers, hermite_fill=args.hermite,
+                                                   use_blit=not args.no_blit, use_cache=not args.no_cache,
+                                                   focus_tag=args.tag, zones_file=args.zones,
+                                                   profile_file=args.profile_output if args.profile else None, background=True,
+                                                   time_window=(args.start, args.end),
+                                                   comparisons=args.compare, side_by_side=args.side_by_side)
             replay_system.start_replay()
             
     except KeyboardInterrupt:
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Movement analysis reports for UWB sessions
+Single-session text report and batch reports over a directory or glob:
+sessions are analysed in a process pool and summarised in one CSV table.
+Results are cached per directory, keyed by file size and mtime, so
+unchanged sessions are not re-read.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uwb_data'))
+
+from batch_cache import find_sessions, run_sessions
+from occupancy_heatmap import OccupancyHeatmap, frame_dwell_times
+from position_loader import load_positions
+from zones import ZoneMap, time_in_zones, zone_transitions
+
+REPORT_VERSION = 3
+REPORT_CACHE_FILE = '.movement_report_cache.json'
+MAX_REALISTIC_SPEED = 8.0  # m/s - human indoor limit
+
+
+def analyze_positions(df, zone_map=None):
+    """
+    Movement metrics of a loaded position file.
+
+    Args:
+        df: Positions loaded with load_positions
+        zone_map: ZoneMap for the time-in-zone totals (default: zones.json)
+
+    Returns:
+        (summary, grid): dict of JSON-native metrics and the occupancy
+        heatmap grid (None if the duration is not valid)
+    """
+    total_time = (df['timestamp'].iloc[-1] - df['timestamp'].iloc[0]).total_seconds() if len(df) else 0.0
+    summary = {'frames': len(df), 'duration_s': total_time, 'valid': total_time > 0}
+
+    # Early validation: avoid division by zero
+    if total_time <= 0:
+        return summary, None
+
+    # === OPTIMIZACIÓN: Cálculo eficiente de distancias ===
+    step_distances = np.hypot(np.diff(df['x'].to_numpy()), np.diff(df['y'].to_numpy()))
+    step_distances = step_distances[np.isfinite(step_distances)]  # NaN positions skipped, as pandas did
+    total_distance = float(step_distances.sum())
+
+    # Frame-by-frame speeds with realistic limit
+    freq = len(df) / total_time
+    raw_speeds = step_distances * freq
+    original_max_speed = float(raw_speeds.max()) if len(raw_speeds) > 0 else 0.0
+    max_speed = min(original_max_speed, MAX_REALISTIC_SPEED)
+
+    anchor_loss = {}
+    for col in [col for col in df.columns if 'anchor_' in col and '_dist' in col]:
+        anchor_id = col.replace('anchor_', '').replace('_dist', '')
+        lost_samples = int((df[col] == 0).sum())
+        anchor_loss[anchor_id] = {'lost': lost_samples, 'loss_pct': lost_samples / len(df) * 100}
+
+    # === OCCUPANCY HEATMAP ===
+    heatmap = OccupancyHeatmap()
+    elapsed_s = (df['timestamp'] - df['timestamp'].iloc[0]).dt.total_seconds().to_numpy()
+    heatmap.extend(df['x'].to_numpy(), df['y'].to_numpy(), frame_dwell_times(elapsed_s))
+    grid = heatmap.grid()
+
+    # === ZONES ===
+    zone_map = zone_map or ZoneMap.from_file()
+    zone_ids = zone_map.classify(df['x'].to_numpy(), df['y'].to_numpy())
+    zone_time = time_in_zones(zone_ids, elapsed_s, len(zone_map))
+
+    hot_spots = []
+    for flat_idx in np.argsort(grid, axis=None)[::-1][:3]:
+        row, col = divmod(int(flat_idx), heatmap.nx)
+        if grid[row, col] <= 0:
+            break
+        hot_spots.append([heatmap.x_min + (col + 0.5) * heatmap.cell_size,
+                          heatmap.y_min + (row + 0.5) * heatmap.cell_size,
+                          float(grid[row, col])])
+
+    summary.update({
+        'distance_m': total_distance,
+        'avg_speed': total_distance / total_time,
+        'max_speed': max_speed,
+        'original_max_speed': original_max_speed,
+        'sampling_hz': freq,
+        'anchor_loss': anchor_loss,
+        'heatmap_grid': [heatmap.nx, heatmap.ny, heatmap.cell_size],
+        'coverage_pct': float((grid > 0).mean() * 100),
+        'time_in_court_s': float(grid.sum()),
+        'hot_spots': hot_spots,
+        'zone_changes': len(zone_transitions(zone_ids)) - 1,
+        'zone_time_s': {name: float(seconds) for name, seconds in zip(zone_map.names, zone_time)},
+    })
+    return summary, grid
+
+
+def compute_movement_summary(csv_file, zones_file=None, start=None, end=None):
+    """Load a session (or a time window of it) and compute its movement summary"""
+    df = load_positions(csv_file, float_dtype=np.float64, start=start, end=end)
+    return analyze_positions(df, ZoneMap.from_file(zones_file))[0]
+
+
+def format_movement_report(summary):
+    """Text report of a movement summary"""
+    lines = []
+    if not summary['valid']:
+        lines.append("\n  WARNING: Data duration insufficient for analysis")
+        lines.append("   Timestamps do not have a valid temporal range")
+        return "\n".join(lines)
+
+    total_time = summary['duration_s']
+    avg_speed = summary['avg_speed']
+    max_speed = summary['max_speed']
+
+    # === REALISM WARNINGS ===
+    if summary['original_max_speed'] > MAX_REALISTIC_SPEED:
+        lines.append(f"\n  CORRECTED SPEEDS:")
+        lines.append(f"   Original maximum speed: {summary['original_max_speed']:.1f} m/s (unrealistic)")
+        lines.append(f"   Corrected maximum speed: {max_speed:.1f} m/s (limited)")
+        lines.append(f"   Speeds >8 m/s were limited by physical realism")
+
+    lines.append(f"\n MOVEMENT ANALYSIS REPORT")
+    lines.append("=" * 50)
+    lines.append(f"  Total duration: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
+    lines.append(f" Total distance: {summary['distance_m']:.1f} meters")
+    lines.append(f" Average speed: {avg_speed:.2f} m/s")
+    lines.append(f" Maximum speed: {max_speed:.2f} m/s")
+    lines.append(f" Total frames: {summary['frames']}")
+    lines.append(f" Sampling frequency: ~{summary['sampling_hz']:.1f} Hz")
+
+    # === REALISM ANALYSIS ===
+    if avg_speed > 4.0:
+        lines.append(f"  WARNING: Average speed too high ({avg_speed:.1f} m/s)")
+        lines.append("   Typical indoor speed: 1.5-3.0 m/s average")
+    elif avg_speed < 0.5:
+        lines.append(f"  INFO: Low average speed ({avg_speed:.1f} m/s) - slow or static movement")
+    else:
+        lines.append(f" Realistic average speed ({avg_speed:.1f} m/s)")
+
+    if max_speed > 7.0:
+        lines.append(f"  WARNING: Maximum speed too high ({max_speed:.1f} m/s)")
+    else:
+        lines.append(f" Realistic maximum speed ({max_speed:.1f} m/s)")
+
+    # === PACKET LOSS ANALYSIS ===
+    lines.append("\n PACKET LOSS ANALYSIS (per Anchor)")
+    lines.append("-" * 50)
+    if summary['anchor_loss']:
+        for anchor_id, loss in summary['anchor_loss'].items():
+            loss_rate = loss['loss_pct']
+            status = "OK"
+            if loss_rate > 50: status = "CRITICAL"
+            elif loss_rate > 20: status = "WARNING"
+
+            lines.append(f" Anchor {anchor_id}: {loss_rate:5.1f}% Loss ({loss['lost']}/{summary['frames']}) - {status}")
+    else:
+        lines.append(" No anchor distance data found in CSV")
+
+    # === OCCUPANCY HEATMAP ===
+    nx, ny, cell_size = summary['heatmap_grid']
+    lines.append("\n OCCUPANCY HEATMAP")
+    lines.append("-" * 50)
+    lines.append(f" Grid: {nx}x{ny} cells of {cell_size:.1f} m")
+    lines.append(f" Court coverage: {summary['coverage_pct']:.1f}% of cells visited")
+    lines.append(f" Time inside the court: {summary['time_in_court_s']:.1f} s")
+    for rank, (cx, cy, dwell) in enumerate(summary['hot_spots'], start=1):
+        lines.append(f" Hot spot {rank}: ({cx:.1f}, {cy:.1f}) m - {dwell:.1f} s")
+
+    # === ZONES ===
+    lines.append("\n TIME IN ZONE")
+    lines.append("-" * 50)
+    for name, seconds in summary['zone_time_s'].items():
+        if seconds > 0:
+            lines.append(f" {name:<18} {seconds:7.1f} s ({seconds / summary['duration_s'] * 100:4.1f}%)")
+    lines.append(f" Zone changes: {summary['zone_changes']}")
+
+    lines.append("=" * 50)
+    return "\n".join(lines)
+
+
+def save_heatmap_png(grid, heatmap_file, title):
+    """Save an occupancy grid as a PNG (no GUI backend needed)"""
+    from matplotlib.figure import Figure
+
+    heatmap = OccupancyHeatmap()
+    fig = Figure(figsize=(10, 6.5))
+    ax = fig.add_subplot()
+    image = ax.imshow(grid, extent=heatmap.extent(), origin='lower', cmap='YlOrRd', interpolation='nearest')
+    fig.colorbar(image, ax=ax, label='Dwell time (s)')
+    ax.set_title(title)
+    ax.set_xlabel('X (m)')
+    ax.set_ylabel('Y (m)')
+    fig.savefig(heatmap_file, dpi=100)
+
+
+def generate_movement_report(csv_file, heatmap_file=None, zones_file=None, start=None, end=None):
+    """
+    Generate movement analysis report
+
+    Args:
+        csv_file: Position CSV file
+        heatmap_file: Optional PNG path for the occupancy heatmap
+        zones_file: Zone polygons file (default: zones.json)
+        start, end: Optional time window (only that part of the file is read)
+    """
+    summary, grid = analyze_positions(load_positions(csv_file, float_dtype=np.float64, start=start, end=end),
+                                      ZoneMap.from_file(zones_file))
+    print(format_movement_report(summary))
+
+    if heatmap_file and grid is not None:
+        save_heatmap_png(grid, heatmap_file, f"Occupancy - {os.path.basename(csv_file)}")
+        print(f" Heatmap saved to: {heatmap_file}")
+
+
+# ============================================================================
+# BATCH REPORTS
+# ============================================================================
+
+def summarize_session(csv_file, zones_file=None):
+    """Worker: summary of one session, or an error message"""
+    try:
+        return compute_movement_summary(csv_file, zones_file)
+    except Exception as e:
+        return {'valid': False, 'error': str(e)}
+
+
+def summary_row(csv_file, summary):
+    """Flat row of the batch summary table"""
+    row = {
+        'session': os.path.basename(csv_file),
+        'frames': summary.get('frames'),
+        'duration_s': summary.get('duration_s'),
+        'distance_m': summary.get('distance_m'),
+        'avg_speed': summary.get('avg_speed'),
+        'max_speed': summary.get('max_speed'),
+        'sampling_hz': summary.get('sampling_hz'),
+        'coverage_pct': summary.get('coverage_pct'),
+    }
+    for anchor_id, loss in summary.get('anchor_loss', {}).items():
+        row[f'anchor_{anchor_id}_loss_pct'] = loss['loss_pct']
+    row['error'] = summary.get('error', '')
+    return row
+
+
+def generate_batch_report(path, output_csv=None, workers=None, use_cache=True, show_sessions=True,
+                          zones_file=None):
+    """
+    Movement reports of every session in a directory or glob.
+
+    Args:
+        path: Directory with uwb_positions_*.csv files or a glob pattern
+        output_csv: Summary table path (default: movement_summary.csv in the
+                    directory of the first session)
+        workers: Worker processes (default: all cores)
+        use_cache: Skip sessions whose size and mtime are unchanged
+        show_sessions: Print the text report of every session
+        zones_file: Zone polygons file (default: zones.json)
+
+    Returns:
+        Summary DataFrame (one row per session), or None if nothing was found
+    """
+    sessions = find_sessions(path)
+    if not sessions:
+        print(f"No position files found for: {path}")
+        return None
+
+    t0 = time.perf_counter()
+    zones_key = ZoneMap.from_file(zones_file).key
+
+    # === CACHE (one file per directory) + PROCESS POOL ===
+    summaries, pending, workers = run_sessions(
+        sessions, summarize_session, (zones_file,), cache_file=REPORT_CACHE_FILE, version=REPORT_VERSION,
+        key=zones_key, workers=workers, use_cache=use_cache)
+
+    if show_sessions:
+        for csv_file in sessions:
+            print(f"\n##### {os.path.basename(csv_file)}")
+            summary = summaries[csv_file]
+            print(f" ERROR: {summary['error']}" if 'error' in summary else format_movement_report(summary))
+
+    table = pd.DataFrame([summary_row(csv_file, summaries[csv_file]) for csv_file in sessions])
+    # Anchor columns appear in the order they are found: keep 'error' last
+    table = table[[col for col in table.columns if col != 'error'] + ['error']]
+    if output_csv is None:
+        output_csv = os.path.join(os.path.dirname(os.path.abspath(sessions[0])), 'movement_summary.csv')
+    table.to_csv(output_csv, index=False, float_format='%.4f')
+
+    elapsed = time.perf_counter() - t0
+    print(f"\n BATCH MOVEMENT REPORT")
+    print("=" * 50)
+    print(f" Sessions: {len(sessions)} ({len(sessions) - len(pending)} cached, {len(pending)} analysed"
+          f"{f' with {workers} workers' if pending else ''})")
+    print(f" Errors: {sum('error' in s for s in summaries.values())}")
+    print(f" Time: {elapsed:.2f}s")
+    print(f" Summary table saved to: {output_csv}")
+    print("=" * 50)
+    return table
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Occupancy heatmap (dwell time per cell) for the UWB replay and reports
+Dwell time is accumulated into a fixed grid over the court with
+np.bincount. Cumulative snapshots (prefix sums) are kept at regular frame
+intervals, so the heatmap of any time window is the difference of two
+prefix sums and seeking backwards restores a snapshot instead of
+recomputing from the start. The number of snapshots is bounded: when it
+is reached the interval doubles and every other snapshot is dropped, so
+memory does not grow with the session length.
+"""
+
+import numpy as np
+
+# Indoor court (10.60 x 6.40 m)
+COURT_BOUNDS = (0.0, 10.6, 0.0, 6.4)
+
+
+def frame_dwell_times(elapsed_s, max_dwell_s=1.0):
+    """
+    Time each frame represents: interval to the next frame.
+
+    Intervals longer than max_dwell_s (signal gaps) are capped so a lost
+    tag does not accumulate dwell time at its last position.
+    """
+    elapsed_s = np.asarray(elapsed_s, dtype=np.float64)
+    if len(elapsed_s) == 0:
+        return elapsed_s
+    dwell = np.diff(elapsed_s, append=elapsed_s[-1])
+    if len(dwell) > 1:
+        dwell[-1] = dwell[-2]  # Last frame: same interval as the previous one
+    return np.clip(dwell, 0.0, max_dwell_s)
+
+
+class OccupancyHeatmap:
+    """
+    Incremental dwell-time grid with bounded prefix-sum snapshots.
+    """
+
+    def __init__(self, bounds=COURT_BOUNDS, cell_size=0.2, snapshot_interval=256, max_snapshots=64):
+        """
+        Args:
+            bounds: (x_min, x_max, y_min, y_max) of the grid in meters
+            cell_size: Cell side in meters
+            snapshot_interval: Initial number of frames between snapshots
+            max_snapshots: Maximum snapshots kept (bounds memory)
+        """
+        self.x_min, self.x_max, self.y_min, self.y_max = bounds
+        self.cell_size = cell_size
+        self.nx = int(np.ceil((self.x_max - self.x_min) / cell_size))
+        self.ny = int(np.ceil((self.y_max - self.y_min) / cell_size))
+        self.max_snapshots = max_snapshots
+        self.initial_interval = snapshot_interval
+        self.reset()
+
+    def reset(self):
+        """Clear the accumulated dwell time and all snapshots"""
+        self.counts = np.zeros(self.nx * self.ny)
+        self.frames_added = 0
+        self.snapshot_interval = self.initial_interval
+        self.snapshots = {0: self.counts.copy()}
+
+    def cell_indices(self, xs, ys):
+        """Flat cell index of every position, -1 outside the grid"""
+        col = np.floor((np.asarray(xs, dtype=np.float64) - self.x_min) / self.cell_size)
+        row = np.floor((np.asarray(ys, dtype=np.float64) - self.y_min) / self.cell_size)
+        inside = (col >= 0) & (col < self.nx) & (row >= 0) & (row < self.ny)
+        return np.where(inside, row * self.nx + col, -1).astype(np.intp)
+
+    def histogram(self, xs, ys, dwell):
+        """Dwell time per cell of a batch of frames (not accumulated)"""
+        cells = self.cell_indices(xs, ys)
+        inside = cells >= 0
+        return np.bincount(cells[inside], weights=np.asarray(dwell, dtype=np.float64)[inside],
+                           minlength=self.nx * self.ny)
+
+    def extend(self, xs, ys, dwell):
+        """
+        Accumulate the next frames of the session.
+
+        The batch is split at snapshot boundaries so every snapshot holds
+        exactly the prefix sum up to its frame.
+        """
+        n = len(xs)
+        start = 0
+        while start < n:
+            next_snapshot = (self.frames_added // self.snapshot_interval + 1) * self.snapshot_interval
+            stop = min(n, start + next_snapshot - self.frames_added)
+            self.counts += self.histogram(xs[start:stop], ys[start:stop], dwell[start:stop])
+            self.frames_added += stop - start
+            start = stop
+            if self.frames_added == next_snapshot:
+                self._take_snapshot()
+
+    def _take_snapshot(self):
+        self.snapshots[self.frames_added] = self.counts.copy()
+        if len(self.snapshots) > self.max_snapshots:
+            # Double the interval: keep only snapshots on the new grid
+            self.snapshot_interval *= 2
+            self.snapshots = {frame: counts for frame, counts in self.snapshots.items()
+                              if frame % self.snapshot_interval == 0}
+
+    def advance_to(self, xs, ys, dwell, frame_idx):
+        """
+        Bring the heatmap to frames [0, frame_idx] of a timeline.
+
+        Moving forward only adds the new frames; moving backwards restores
+        the closest snapshot before frame_idx and replays from there.
+        """
+        target = frame_idx + 1
+        if target < self.frames_added:
+            self._restore(max(frame for frame in self.snapshots if frame <= target))
+        if target > self.frames_added:
+            start = self.frames_added
+            self.extend(xs[start:target], ys[start:target], dwell[start:target])
+
+    def _restore(self, frame):
+        self.counts = self.snapshots[frame].copy()
+        self.frames_added = frame
+        self.snapshots = {f: counts for f, counts in self.snapshots.items() if f <= frame}
+
+    def prefix(self, xs, ys, dwell, frame_count):
+        """Dwell time of the first frame_count frames (closest snapshot + remainder)"""
+        base = max(frame for frame in self.snapshots if frame <= frame_count)
+        counts = self.snapshots[base].copy()
+        if frame_count > base:
+            counts += self.histogram(xs[base:frame_count], ys[base:frame_count], dwell[base:frame_count])
+        return counts
+
+    def window(self, xs, ys, dwell, start, end):
+        """
+        Dwell-time grid of frames [start, end) as a difference of prefix sums.
+
+        Snapshots only exist up to frames_added; later frames are computed
+        from the timeline arrays.
+        """
+        counts = self.prefix(xs, ys, dwell, end) - self.prefix(xs, ys, dwell, start)
+        return np.maximum(counts, 0.0).reshape(self.ny, self.nx)
+
+    def grid(self):
+        """Accumulated dwell time as a (ny, nx) array, row 0 at y_min"""
+        return self.counts.reshape(self.ny, self.nx)
+
+    def extent(self):
+        """Extent for imshow(origin='lower')"""
+        return (self.x_min, self.x_min + self.nx * self.cell_size,
+                self.y_min, self.y_min + self.ny * self.cell_size)
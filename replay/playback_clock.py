@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Wall-clock playback scheduler for the UWB replay
+Maps elapsed wall-clock time to session time (times the playback speed)
+and picks the frame to show by binary search on the frame time array.
+When drawing falls behind, the frames in between are simply skipped, so
+the requested speed is kept regardless of the render cost.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+
+class PlaybackClock:
+    """
+    Session clock anchored to the wall clock.
+
+    While playing, session time = anchor_session + (now - anchor_wall) * speed.
+    Every seek or speed change re-anchors the clock at the current position.
+    """
+
+    def __init__(self, times_s, speed=1.0, window_s=2.0, clock=time.perf_counter):
+        """
+        Args:
+            times_s: Session time of every frame in seconds (increasing)
+            speed: Initial playback speed
+            window_s: Wall-clock window for the achieved speed measurement
+            clock: Wall-clock function (seconds)
+        """
+        self.clock = clock
+        self.speed = speed
+        self.window_s = window_s
+        self.playing = False
+        self.set_timeline(times_s)
+
+    def set_timeline(self, times_s, frame_idx=0):
+        """Use a new frame time array (e.g. after reprocessing the session)"""
+        self.times = np.asarray(times_s)
+        self.seek(frame_idx)
+
+    def _reset_stats(self):
+        self._shown = deque()
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self._last_frame = None
+
+    def _anchor(self, session_time):
+        self.anchor_wall = self.clock()
+        self.anchor_session = session_time
+        self._reset_stats()
+
+    def session_time(self):
+        """Current session time in seconds"""
+        if not self.playing:
+            return self.anchor_session
+        return self.anchor_session + (self.clock() - self.anchor_wall) * self.speed
+
+    def seek(self, frame_idx):
+        """Continue from a given frame"""
+        frame_idx = int(np.clip(frame_idx, 0, max(len(self.times) - 1, 0)))
+        self._anchor(float(self.times[frame_idx]) if len(self.times) else 0.0)
+
+    def play(self, frame_idx=None):
+        """Start playing (from frame_idx if given)"""
+        if frame_idx is not None:
+            self.seek(frame_idx)
+        else:
+            self._anchor(self.session_time())
+        self.playing = True
+
+    def pause(self):
+        """Freeze the session clock at its current time"""
+        self._anchor(self.session_time())
+        self.playing = False
+
+    def set_speed(self, speed):
+        """Change the speed keeping the current session time"""
+        self._anchor(self.session_time())
+        self.speed = speed
+
+    def next_frame(self):
+        """
+        Frame to show now: last frame whose time is <= the session time.
+
+        Returns:
+            (frame_idx, finished) where finished is True at the end of the session
+        """
+        now = self.clock()
+        session_time = self.session_time()
+        frame_idx = max(int(np.searchsorted(self.times, session_time, side='right')) - 1, 0)
+        frame_idx = min(frame_idx, len(self.times) - 1)
+
+        if self.playing:
+            if self._last_frame is not None and frame_idx > self._last_frame + 1:
+                self.frames_dropped += frame_idx - self._last_frame - 1
+            self._last_frame = frame_idx
+            self.frames_shown += 1
+            self._shown.append((now, float(self.times[frame_idx])))
+            while len(self._shown) > 2 and now - self._shown[0][0] > self.window_s:
+                self._shown.popleft()
+
+        return frame_idx, session_time >= self.times[-1]
+
+    def achieved_speed(self):
+        """Session seconds shown per wall-clock second over the last window (None if unknown)"""
+        if len(self._shown) < 2:
+            return None
+        (wall_start, session_start), (wall_end, session_end) = self._shown[0], self._shown[-1]
+        if wall_end - wall_start < 0.25:
+            return None
+        return (session_end - session_start) / (wall_end - wall_start)
+
+    def render_fps(self):
+        """Frames actually drawn per wall-clock second over the last window"""
+        if len(self._shown) < 2:
+            return None
+        span = self._shown[-1][0] - self._shown[0][0]
+        return (len(self._shown) - 1) / span if span > 0 else None
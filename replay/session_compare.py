@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Synchronised comparison of sessions for the UWB replay
+Other sessions, or the same session processed with other filter settings,
+are resampled once onto the timeline of the replayed session (aligned at
+their start), so every comparison track is a set of plain per-frame arrays
+and drawing it costs only its own artist updates in the shared render loop.
+"""
+
+import os
+
+import numpy as np
+
+# Filter settings selectable by name in --compare (combined with '+')
+VARIANT_SETTINGS = {
+    'raw': {},
+    'kalman': {'use_kalman_filter': True},
+    'hermite': {'use_hermite_fill': True},
+    'gpr': {'use_ml_prediction': True},
+    'ml': {'use_ml_prediction': True},
+}
+
+# Processing flags a variant starts from (everything off = 'raw')
+BASE_SETTINGS = {'use_kalman_filter': False, 'use_hermite_fill': False, 'use_ml_prediction': False}
+
+TRACK_COLORS = ['#1f77b4', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#17becf', '#bcbd22']
+
+
+def parse_comparison(spec):
+    """
+    Meaning of one --compare entry.
+
+    An existing file is another session (processed with the current
+    settings); otherwise the entry names filter settings for the replayed
+    session, e.g. 'raw', 'kalman', 'kalman+hermite', 'gpr'.
+
+    Returns:
+        (label, csv_file or None, settings dict or None)
+    """
+    if os.path.isfile(spec):
+        return os.path.basename(spec), spec, None
+
+    settings = dict(BASE_SETTINGS)
+    for name in spec.lower().split('+'):
+        if name not in VARIANT_SETTINGS:
+            raise ValueError(f"Unknown comparison '{spec}': not a file and not one of "
+                             f"{', '.join(VARIANT_SETTINGS)} (combine with '+')")
+        settings.update(VARIANT_SETTINGS[name])
+    if settings['use_hermite_fill'] and settings['use_ml_prediction']:
+        raise ValueError(f"Comparison '{spec}': choose either hermite or gpr gap filling")
+    return spec, None, settings
+
+
+class ComparisonTracks:
+    """
+    Comparison sessions resampled onto one shared timeline.
+
+    x[track, frame], y[track, frame] are the position of every track at the
+    time of each frame of the replayed session (sessions aligned at their
+    start, shorter ones hold their last position); cum_dist is the distance
+    each track has travelled and offset its distance to the replayed
+    position. Tracks without data stay NaN so their artists draw nothing.
+    """
+
+    def __init__(self, labels, frames_list, reference):
+        """
+        Args:
+            labels: Name of each track
+            frames_list: FrameCache of each track (None: no data)
+            reference: FrameCache of the replayed session (the shared timeline)
+        """
+        self.labels = list(labels)
+        self.available = [frames is not None and len(frames) > 1 for frames in frames_list]
+
+        timeline_s = np.asarray(reference.elapsed_s, dtype=np.float64)
+        shape = (len(self.labels), len(timeline_s))
+        self.x = np.full(shape, np.nan, dtype=np.float32)
+        self.y = np.full(shape, np.nan, dtype=np.float32)
+        self.cum_dist = np.full(shape, np.nan, dtype=np.float32)
+        for track, frames in enumerate(frames_list):
+            if not self.available[track]:
+                continue
+            elapsed = np.asarray(frames.elapsed_s, dtype=np.float64)
+            self.x[track] = np.interp(timeline_s, elapsed, frames.x)
+            self.y[track] = np.interp(timeline_s, elapsed, frames.y)
+            self.cum_dist[track] = np.interp(timeline_s, elapsed, frames.cum_dist)
+        self.offset = np.hypot(self.x - np.asarray(reference.x, dtype=np.float32),
+                               self.y - np.asarray(reference.y, dtype=np.float32))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def positions(self, frame_idx):
+        """Position of every track at a frame, shape (tracks, 2)"""
+        return np.column_stack((self.x[:, frame_idx], self.y[:, frame_idx]))
+
+    @staticmethod
+    def color(track):
+        """Colour of a track (cycles through TRACK_COLORS)"""
+        return TRACK_COLORS[track % len(TRACK_COLORS)]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of processed replay timelines
+Stores the per-frame arrays of a processed session next to its CSV in a
+single memory-mappable file, so reopening a session skips parsing,
+resampling and filtering and only pages in the data actually displayed.
+
+File layout:
+    MAGIC | header length (uint64) | JSON header | arrays (64-byte aligned)
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from frame_cache import FrameCache
+
+MAGIC = b'UWBTLN01'
+CACHE_VERSION = 3
+ALIGNMENT = 64
+
+
+def file_content_hash(path, block_size=1 << 22):
+    """BLAKE2b hash of a file's content, read in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_key(params):
+    """Short stable key for a dict of processing parameters"""
+    payload = json.dumps({'version': CACHE_VERSION, **params}, sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def cache_path(csv_file, params):
+    """Cache file next to the CSV, one per set of processing parameters"""
+    stem = os.path.splitext(csv_file)[0]
+    return f"{stem}.{params_key(params)}.timeline"
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_timeline(csv_file, params, frames):
+    """
+    Write the processed timeline of csv_file to its cache file.
+
+    Returns:
+        Path of the cache file, or None if it could not be written
+    """
+    path = cache_path(csv_file, params)
+    stat = os.stat(csv_file)
+    arrays = frames.arrays()
+
+    # Offsets are relative to the start of the data section
+    layout = {}
+    offset = 0
+    for name in FrameCache.ARRAY_NAMES:
+        array = np.ascontiguousarray(arrays[name])
+        layout[name] = {'dtype': array.dtype.str, 'offset': offset, 'shape': list(array.shape)}
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({
+        'version': CACHE_VERSION,
+        'params': params,
+        'content_hash': file_content_hash(csv_file),
+        'csv_size': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'zone_names': frames.zone_names,
+        'tag_ids': frames.tag_ids,
+        'focus_tag': frames.focus_tag,
+        'arrays': layout,
+    }).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for name in FrameCache.ARRAY_NAMES:
+                f.seek(data_start + layout[name]['offset'])
+                f.write(np.ascontiguousarray(arrays[name]).tobytes())
+        os.replace(tmp_path, path)
+        return path
+    except OSError as e:
+        print(f"Could not write timeline cache: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+
+def load_timeline(csv_file, params):
+    """
+    Open the cached timeline of csv_file as memory-mapped arrays.
+
+    The cache is valid only if it was built with the same parameters from
+    the same file content. Size and mtime are checked first so an
+    unchanged file is not re-hashed; otherwise the content hash decides.
+
+    Returns:
+        FrameCache backed by np.memmap, or None if there is no valid cache
+    """
+    path = cache_path(csv_file, params)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_len).decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+    if header.get('version') != CACHE_VERSION or header.get('params') != params:
+        return None
+
+    stat = os.stat(csv_file)
+    unchanged = header['csv_size'] == stat.st_size and header['csv_mtime_ns'] == stat.st_mtime_ns
+    if not unchanged and header['content_hash'] != file_content_hash(csv_file):
+        return None
+
+    data_start = _align(len(MAGIC) + 8 + header_len)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=spec['dtype'])
+            continue
+        arrays[name] = np.memmap(path, dtype=spec['dtype'], mode='r',
+                                 offset=data_start + spec['offset'], shape=shape)
+
+    return FrameCache(arrays, header['zone_names'], header['tag_ids'], header['focus_tag'])
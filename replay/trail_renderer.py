@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Incremental trail rendering for the UWB replay
+Keeps the trajectory drawn by the replay bounded in size with a
+level-of-detail pyramid, so frame time does not grow with session length.
+"""
+
+import numpy as np
+
+
+def decimate_to_grid(xs, ys, resolution):
+    """
+    Drop consecutive points that fall in the same grid cell.
+
+    With resolution set to the size of a screen pixel in data units the
+    decimated line is visually identical to the original one.
+
+    Args:
+        xs, ys: Point coordinates
+        resolution: Grid cell size in data units (meters)
+
+    Returns:
+        (xs, ys) decimated, first and last points always kept
+    """
+    if len(xs) <= 2:
+        return xs, ys
+
+    cells_x = np.floor(xs / resolution)
+    cells_y = np.floor(ys / resolution)
+    keep = np.empty(len(xs), dtype=bool)
+    keep[0] = True
+    keep[1:] = (cells_x[1:] != cells_x[:-1]) | (cells_y[1:] != cells_y[:-1])
+    keep[-1] = True
+    return xs[keep], ys[keep]
+
+
+class IncrementalTrail:
+    """
+    Trajectory trail that only appends new points each frame.
+
+    Recent points are kept at full resolution in a fixed-size tail. When
+    the tail fills up it is decimated into level 0 of a pyramid; when a
+    level exceeds its capacity it is decimated again at twice the
+    resolution into the next (older) level. The drawn line is therefore
+    bounded by roughly levels * level_capacity + tail_points points.
+    """
+    def __init__(self, artists, resolution=0.01, tail_points=512, level_capacity=2048):
+        self.artists = [artist for artist in artists if artist is not None]
+        self.resolution = resolution
+        self.tail_points = tail_points
+        self.level_capacity = level_capacity
+
+        self.tail_x = np.empty(tail_points)
+        self.tail_y = np.empty(tail_points)
+        self.reset()
+
+    def reset(self):
+        """Forget all points"""
+        self.levels = []  # level k: (xs, ys) decimated at resolution * 2**k
+        self.tail_count = 0
+        self.last_frame = -1
+        self.history_x = np.empty(0)
+        self.history_y = np.empty(0)
+
+    def set_resolution(self, resolution):
+        """Change the base resolution (e.g. after a window resize)"""
+        self.resolution = resolution
+        self.last_frame = -1  # Force a rebuild on the next update
+
+    def extend(self, xs, ys):
+        """Append new points at the end of the trail"""
+        for start in range(0, len(xs), self.tail_points):
+            chunk_x = xs[start:start + self.tail_points]
+            chunk_y = ys[start:start + self.tail_points]
+            free = self.tail_points - self.tail_count
+
+            if len(chunk_x) > free:
+                self._flush_tail()
+
+            self.tail_x[self.tail_count:self.tail_count + len(chunk_x)] = chunk_x
+            self.tail_y[self.tail_count:self.tail_count + len(chunk_y)] = chunk_y
+            self.tail_count += len(chunk_x)
+
+    def rebuild(self, xs, ys):
+        """Rebuild the trail from a full point history"""
+        self.reset()
+        keep_tail = min(len(xs), self.tail_points // 2)
+        split = len(xs) - keep_tail
+
+        if split > 0:
+            self._push_level(0, *decimate_to_grid(xs[:split], ys[:split], self.resolution))
+            self._refresh_history()
+
+        self.extend(xs[split:], ys[split:])
+
+    def update(self, xs, ys, frame_idx):
+        """
+        Show the trail up to frame_idx.
+
+        Moving forward only appends the new frames; seeking backwards or
+        jumping far ahead rebuilds the pyramid from the full history.
+
+        Args:
+            xs, ys: Full trajectory arrays of the session
+            frame_idx: Last frame to include in the trail
+        """
+        new_frames = frame_idx - self.last_frame
+
+        if self.last_frame < 0 or new_frames < 0 or new_frames > self.level_capacity:
+            self.rebuild(xs[:frame_idx + 1], ys[:frame_idx + 1])
+        elif new_frames > 0:
+            self.extend(xs[self.last_frame + 1:frame_idx + 1], ys[self.last_frame + 1:frame_idx + 1])
+
+        self.last_frame = frame_idx
+
+        trail_x, trail_y = self.get_data()
+        if len(trail_x) > 1:
+            for artist in self.artists:
+                artist.set_data(trail_x, trail_y)
+        return trail_x, trail_y
+
+    def get_data(self):
+        """Return the points to draw, oldest first"""
+        return (np.concatenate((self.history_x, self.tail_x[:self.tail_count])),
+                np.concatenate((self.history_y, self.tail_y[:self.tail_count])))
+
+    def _flush_tail(self):
+        """Move the full-resolution tail into the pyramid"""
+        if self.tail_count == 0:
+            return
+        xs, ys = decimate_to_grid(self.tail_x[:self.tail_count].copy(),
+                                  self.tail_y[:self.tail_count].copy(), self.resolution)
+        self.tail_count = 0
+        self._push_level(0, xs, ys)
+        self._refresh_history()
+
+    def _push_level(self, level, xs, ys):
+        """Append points to a level, cascading to coarser levels on overflow"""
+        while len(self.levels) <= level:
+            self.levels.append((np.empty(0), np.empty(0)))
+
+        level_x, level_y = self.levels[level]
+        level_x = np.concatenate((level_x, xs))
+        level_y = np.concatenate((level_y, ys))
+
+        if len(level_x) > self.level_capacity:
+            self.levels[level] = (np.empty(0), np.empty(0))
+            coarse = self.resolution * 2 ** (level + 1)
+            self._push_level(level + 1, *decimate_to_grid(level_x, level_y, coarse))
+        else:
+            self.levels[level] = (level_x, level_y)
+
+    def _refresh_history(self):
+        """Cache the concatenated pyramid (coarsest/oldest level first)"""
+        self.history_x = np.concatenate([xs for xs, _ in reversed(self.levels)] or [np.empty(0)])
+        self.history_y = np.concatenate([ys for _, ys in reversed(self.levels)] or [np.empty(0)])
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Headless export of UWB replays
+Renders a processed session to a PNG sequence (or MP4 when ffmpeg is
+available) with the Agg backend, splitting the timeline into chunks that
+are rendered in parallel worker processes.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+FRAME_PATTERN = "frame_{:06d}.png"
+
+
+def render_chunk(frames, frame_indices, first_output_idx, output_dir, dpi, skip_trail, zones_file=None):
+    """
+    Render a contiguous chunk of frames to PNG files.
+
+    The replay is rebuilt from the processed FrameCache; the first
+    update_frame call reconstructs the trail up to the chunk start from the
+    full history.
+
+    Returns:
+        Number of frames written
+    """
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+    from movement_replay import UWBHexagonReplaySystem
+
+    replay = UWBHexagonReplaySystem(None, skip_trail=skip_trail, use_blit=False,
+                                    frames=frames, interactive=False, zones_file=zones_file)
+    replay.fig.subplots_adjust(left=0.05, right=0.98, bottom=0.05, top=0.97)
+    replay.is_playing = True
+
+    for offset, frame_idx in enumerate(frame_indices):
+        replay.update_frame(int(frame_idx))
+        replay.fig.savefig(os.path.join(output_dir, FRAME_PATTERN.format(first_output_idx + offset)), dpi=dpi)
+
+    plt.close(replay.fig)
+    return len(frame_indices)
+
+
+def encode_mp4(frames_dir, output_file, fps):
+    """Encode the PNG sequence with ffmpeg, returns False if not possible"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return False
+
+    command = [
+        ffmpeg, '-y', '-loglevel', 'error',
+        '-framerate', f'{fps:.3f}',
+        '-i', os.path.join(frames_dir, 'frame_%06d.png'),
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+        # libx264 needs even dimensions
+        '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2',
+        output_file
+    ]
+    return subprocess.run(command).returncode == 0
+
+
+def export_replay(replay_system, output, fps=None, workers=None, dpi=100):
+    """
+    Export a processed replay to PNG frames or MP4.
+
+    Args:
+        replay_system: UWBHexagonReplaySystem with the processed timeline
+        output: Directory for a PNG sequence, or a .mp4 file
+        fps: Output frame rate (default: timeline rate, i.e. real time)
+        workers: Worker processes (default: all cores)
+        dpi: Resolution of the 18x12 inch figure (100 -> 1800x1200)
+
+    Returns:
+        Path of the written video or frame directory, or None on error
+    """
+    frames = replay_system.frames
+    if frames is None or len(frames) == 0:
+        print("Export error: no processed data")
+        return None
+
+    # Timeline rate (30 or 60 fps) and subsampling for the requested rate
+    elapsed_s = np.asarray(frames.elapsed_s)
+    timeline_fps = 1.0 / np.median(np.diff(elapsed_s)) if len(elapsed_s) > 1 else 30.0
+    fps = fps or timeline_fps
+    frame_step = max(1, int(round(timeline_fps / fps)))
+    frame_indices = np.arange(0, len(frames), frame_step)
+    output_fps = timeline_fps / frame_step
+
+    want_mp4 = output.lower().endswith('.mp4')
+    if want_mp4:
+        frames_dir = tempfile.mkdtemp(prefix='uwb_export_')
+    else:
+        frames_dir = output
+        os.makedirs(frames_dir, exist_ok=True)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(frame_indices)))
+    chunks = np.array_split(frame_indices, workers)
+    first_output = np.concatenate(([0], np.cumsum([len(chunk) for chunk in chunks])[:-1]))
+
+    print(f"\n EXPORTING REPLAY")
+    print("=" * 50)
+    print(f" Frames: {len(frame_indices)} at {output_fps:.1f} FPS ({len(frame_indices) / output_fps:.1f} s)")
+    print(f" Workers: {workers}")
+
+    t0 = time.perf_counter()
+    args = [(frames, chunk, int(first), frames_dir, dpi, replay_system.skip_trail, replay_system.zones_file)
+            for chunk, first in zip(chunks, first_output)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            written = sum(executor.map(render_chunk, *zip(*args)))
+    else:
+        written = render_chunk(*args[0])
+    elapsed = time.perf_counter() - t0
+    print(f" Rendered {written} frames in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.1f} frames/s)")
+
+    if not want_mp4:
+        print(f" PNG sequence saved to: {frames_dir}")
+        return frames_dir
+
+    if encode_mp4(frames_dir, output, output_fps):
+        shutil.rmtree(frames_dir, ignore_errors=True)
+        print(f" Video saved to: {output}")
+        return output
+
+    fallback_dir = os.path.splitext(output)[0] + '_frames'
+    shutil.rmtree(fallback_dir, ignore_errors=True)
+    shutil.move(frames_dir, fallback_dir)
+    print(" WARNING: ffmpeg not available or failed, MP4 not created")
+    print(f" PNG sequence saved to: {fallback_dir}")
+    return fallback_dir
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Configurable court zones for the UWB replay
+Zones are polygons read from a JSON file (zones.json by default) and a
+whole trajectory is classified at once with a vectorised point-in-polygon
+test. Zone transitions and time-in-zone totals are derived from the
+resulting zone-id array.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_ZONES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zones.json')
+
+
+def points_in_polygon(x, y, polygon):
+    """
+    Even-odd ray casting test of many points against one polygon.
+
+    Loops over the polygon edges (a handful) and is vectorised over the
+    points.
+
+    Args:
+        x, y: Coordinate arrays
+        polygon: (V, 2) array of vertices (closed implicitly)
+
+    Returns:
+        Boolean array, True for points inside the polygon
+    """
+    inside = np.zeros(len(x), dtype=bool)
+    xs, ys = polygon[:, 0], polygon[:, 1]
+    for i in range(len(polygon)):
+        x1, y1 = xs[i - 1], ys[i - 1]
+        x2, y2 = xs[i], ys[i]
+        if y1 == y2:
+            continue  # Horizontal edges never cross a horizontal ray
+        crosses = (y1 > y) != (y2 > y)
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def zone_transitions(zone_ids):
+    """
+    Frames where the zone changes.
+
+    Returns:
+        int32 array of frame indices; the first frame is always included
+        so every entry starts a stay in zone_ids[frame]
+    """
+    zone_ids = np.asarray(zone_ids)
+    if len(zone_ids) == 0:
+        return np.empty(0, dtype=np.int32)
+    changes = np.flatnonzero(zone_ids[1:] != zone_ids[:-1]) + 1
+    return np.concatenate(([0], changes)).astype(np.int32)
+
+
+def time_in_zones(zone_ids, elapsed_s, num_zones):
+    """Total seconds spent in every zone (each frame lasts until the next one)"""
+    zone_ids = np.asarray(zone_ids, dtype=np.intp)
+    if len(zone_ids) < 2:
+        return np.zeros(num_zones)
+    dwell = np.diff(np.asarray(elapsed_s, dtype=np.float64))
+    return np.bincount(zone_ids[:-1], weights=dwell, minlength=num_zones)
+
+
+class ZoneMap:
+    """
+    Named polygon zones; index 0 is always the 'outside' zone.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Dict with 'outside' ({name, color, edge}) and 'zones'
+                    (list of {name, polygon, color, edge})
+        """
+        outside = config.get('outside', {})
+        zones = config['zones']
+
+        self.names = [outside.get('name', 'OUTSIDE THE AREA')] + [zone['name'] for zone in zones]
+        self.colors = [(outside.get('color', 'black'), outside.get('edge', 'yellow'))] + [
+            (zone.get('color', 'black'), zone.get('edge', 'yellow')) for zone in zones
+        ]
+        self.polygons = []
+        for zone in zones:
+            polygon = np.asarray(zone['polygon'], dtype=np.float64)
+            if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+                raise ValueError(f"Zone '{zone['name']}': polygon needs at least 3 [x, y] vertices")
+            self.polygons.append(polygon)
+
+        # Identifies the configuration in cache keys
+        payload = json.dumps(config, sort_keys=True).encode('utf-8')
+        self.key = hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+    @classmethod
+    def from_file(cls, path=None):
+        """Load a zone configuration (default: zones.json next to this module)"""
+        with open(path or DEFAULT_ZONES_FILE, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.names)
+
+    def classify(self, x, y):
+        """
+        Zone of every position.
+
+        Zones are tested in configuration order; the first containing
+        polygon wins and positions in none of them are 'outside' (0).
+
+        Returns:
+            int16 array of indices into names
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        zone_ids = np.zeros(len(x), dtype=np.int16)
+        unassigned = np.ones(len(x), dtype=bool)
+        for zone_id, polygon in enumerate(self.polygons, start=1):
+            hit = unassigned & points_in_polygon(x, y, polygon)
+            zone_ids[hit] = zone_id
+            unassigned &= ~hit
+        return zone_ids
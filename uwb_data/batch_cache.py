@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Batch processing of UWB sessions with a per-directory result cache
+Shared by the corpus analysis (comprehensive_analysis) and the batch
+movement reports (replay/movement_report): session discovery, a JSON cache
+per directory keyed by file name, size, mtime and a caller key, and a
+process pool that runs the uncached sessions largest first.
+"""
+
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def find_sessions(paths):
+    """Position files of directories, glob patterns or single files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(path, 'uwb_positions_*.csv')))
+        else:
+            files.update(glob.glob(path) if glob.has_magic(path) else [path])
+    return sorted(f for f in files if os.path.isfile(f))
+
+
+def file_signature(csv_file, key=None):
+    """Size and mtime of a session plus the caller's settings key (JSON-native)"""
+    stat = os.stat(csv_file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'key': key}
+
+
+def load_cache(directory, cache_file, version):
+    """Cached results of a directory ({file name: entry}), empty if missing or stale"""
+    path = os.path.join(directory, cache_file)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != version:
+        return {}
+    return cache.get('sessions', {})
+
+
+def save_cache(directory, cache_file, version, sessions):
+    """Write the cached results of a directory (atomic replace)"""
+    path = os.path.join(directory, cache_file)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'sessions': sessions}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write cache {path}: {e}")
+
+
+def run_sessions(sessions, worker, worker_args=(), cache_file=None, version=1, key=None,
+                 workers=None, use_cache=True):
+    """
+    Result of `worker(csv_file, *worker_args)` for every session, from the
+    cache when the file is unchanged.
+
+    Signatures are taken before the sessions are dispatched, so a capture
+    that grows while it is analysed is not cached under its new size.
+    Results containing an 'error' key are not cached (retried next run).
+
+    Args:
+        sessions: Position files
+        worker: Module-level (picklable) function returning a JSON-native dict
+        worker_args: Extra arguments passed to every call
+        cache_file: Cache file name inside each session's directory
+        version: Result format version (older caches are ignored)
+        key: JSON-native settings the results depend on
+        workers: Worker processes (default: all cores)
+        use_cache: Read and write the cache
+
+    Returns:
+        (results, analysed, workers): {csv_file: result}, the sessions that
+        were not cached and the number of worker processes used
+    """
+    caches = {}
+    signatures = {}
+    results = {}
+    for csv_file in sessions:
+        directory = os.path.dirname(os.path.abspath(csv_file))
+        if directory not in caches:
+            caches[directory] = load_cache(directory, cache_file, version) if use_cache and cache_file else {}
+        signatures[csv_file] = file_signature(csv_file, key)
+        entry = caches[directory].get(os.path.basename(csv_file))
+        if entry is not None and entry.get('signature') == signatures[csv_file]:
+            results[csv_file] = entry['result']
+
+    pending = [csv_file for csv_file in sessions if csv_file not in results]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    if not pending:
+        return results, pending, workers
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Larger files first so the pool finishes evenly
+            ordered = sorted(pending, key=lambda csv_file: signatures[csv_file]['size'], reverse=True)
+            args = [[value] * len(ordered) for value in worker_args]
+            for csv_file, result in zip(ordered, executor.map(worker, ordered, *args)):
+                results[csv_file] = result
+    else:
+        for csv_file in pending:
+            results[csv_file] = worker(csv_file, *worker_args)
+
+    if use_cache and cache_file:
+        for csv_file in pending:
+            if 'error' in results[csv_file]:
+                continue  # Not cached: retried on the next run
+            directory = os.path.dirname(os.path.abspath(csv_file))
+            caches[directory][os.path.basename(csv_file)] = {
+                'signature': signatures[csv_file],
+                'result': results[csv_file],
+            }
+        for directory, entries in caches.items():
+            save_cache(directory, cache_file, version, entries)
+    return results, pending, workers
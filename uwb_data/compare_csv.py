@@ -3,6 +3,8 @@ import numpy as np
 import sys
 import os
 
+from position_loader import load_positions
+
 files = [
     ("NEW (13:44)", r"C:\Users\Control Lunar\Documents\Indoor-UWB-Tracking-Platform-Firmware-Tools-\uwb_data\uwb_positions_20251120_134419.csv"),
     ("OLD (13:07)", r"C:\Users\Control Lunar\Documents\Indoor-UWB-Tracking-Platform-Firmware-Tools-\uwb_data\uwb_positions_20251120_130758.csv")
@@ -17,14 +19,11 @@ for label, file_path in files:
             print("Error: File not found")
             continue
             
-        df = pd.read_csv(file_path)
+        df = load_positions(file_path, columns=['timestamp'])
         if df.empty:
             print("Error: CSV is empty")
             continue
             
-        # Parse timestamp
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
         # Calculate time differences
         df['delta_t'] = df['timestamp'].diff().dt.total_seconds()
         
@@ -1,81 +1,133 @@
-import pandas as pd
-import numpy as np
+#!/usr/bin/env python3
+"""
+Corpus-wide analysis of UWB position files
+Every session of a directory (or glob, or list of files) is analysed with
+session_analysis in a process pool and merged into one summary table.
+Reports are cached per directory, keyed by file name, size and mtime, so
+re-runs only analyse new or modified captures.
+"""
+
+import argparse
 import os
+import time
+
+import pandas as pd
+
+from batch_cache import find_sessions, run_sessions
+from session_analysis import SECTIONS, analyze_session
+
+ANALYSIS_VERSION = 3
+ANALYSIS_CACHE_FILE = '.session_analysis_cache.json'
+
+
+def analyze_file(csv_file, ground_truth=None):
+    """Worker: full analysis report of one session, or an error message"""
+    try:
+        return analyze_session(csv_file, ground_truth, SECTIONS)
+    except Exception as e:
+        return {'file': os.path.basename(csv_file), 'error': str(e)}
+
+
+def summary_row(csv_file, report):
+    """Flat row of the summary table"""
+    row = {'file': os.path.basename(csv_file), 'samples': report.get('samples'),
+           'tags': report.get('tags'), 'duration_s': report.get('duration_s')}
 
-def analyze_uwb_data(file_paths):
-    results = []
+    frequency = report.get('frequency', {})
+    host = frequency.get('host', {})
+    device = frequency.get('device', {})
+    row.update({
+        'device_rate_hz': device.get('rate_hz'),
+        'device_jitter_ms': device.get('jitter_ms'),
+        'device_gaps': device.get('gaps'),
+        'avg_freq': host.get('mean_freq_hz'),
+        'jitter_ms': host.get('jitter_ms'),
+    })
+    precision = report.get('precision', {})
+    for key in ['mean_x', 'mean_y', 'mean_z', 'std_x', 'std_y', 'std_z']:
+        row[key] = precision.get(key)
+    accuracy = report.get('accuracy', {})
+    row['rmse_2d_m'] = accuracy.get('rmse_2d_m')
+    row['cep95_2d_m'] = accuracy.get('cep95_2d_m')
+
+    integrity = report.get('integrity', {})
+    rows = integrity.get('rows') or 0
+    row['unique_ts_pct'] = integrity['unique_device_ts'] / rows * 100 if rows and 'unique_device_ts' in integrity else None
+    row['stuck_frames'] = integrity.get('stuck_frames')
+    row['z_outliers'] = report.get('z', {}).get('outliers')
+    row['failed_checks'] = ';'.join(check['check'] for check in report.get('checks', []) if not check['ok'])
+    row['error'] = report.get('error', '')
+    return row
+
+
+def analyze_uwb_data(paths, output_csv=None, workers=None, use_cache=True, ground_truth=None):
+    """
+    Analysis of every session in directories, glob patterns or file lists.
+
+    Args:
+        paths: Directory, glob pattern, file or a list of them
+        output_csv: Summary table path (default: session_analysis_summary.csv
+                    in the directory of the first session; '' to skip)
+        workers: Worker processes (default: all cores)
+        use_cache: Skip sessions whose size and mtime are unchanged
+        ground_truth: Optional (x, y[, z]) for the accuracy columns
+
+    Returns:
+        Summary DataFrame (one row per session), or None if nothing was found
+    """
+    sessions = find_sessions(paths)
+    if not sessions:
+        print(f"No position files found for: {paths}")
+        return None
+
+    t0 = time.perf_counter()
+
+    # === CACHE (one file per directory) + PROCESS POOL ===
+    reports, pending, workers = run_sessions(
+        sessions, analyze_file, (ground_truth,), cache_file=ANALYSIS_CACHE_FILE, version=ANALYSIS_VERSION,
+        key=list(ground_truth) if ground_truth else None, workers=workers, use_cache=use_cache)
+
+    table = pd.DataFrame([summary_row(csv_file, reports[csv_file]) for csv_file in sessions])
 
     print(f"{'File':<40} | {'Freq (Hz)':<10} | {'Jitter (ms)':<12} | {'Mean X':<8} | {'Mean Y':<8} | {'Std X':<8} | {'Std Y':<8}")
     print("-" * 120)
+    for row in table.itertuples(index=False):
+        if row.error:
+            print(f"{row.file:<40} | ERROR: {row.error}")
+            continue
+        if not row.samples:
+            print(f"{row.file:<40} | EMPTY: no position samples")
+            continue
+        rate = row.device_rate_hz if pd.notna(row.device_rate_hz) else row.avg_freq
+        jitter = row.device_jitter_ms if pd.notna(row.device_jitter_ms) else row.jitter_ms
+        print(f"{row.file:<40} | {rate if pd.notna(rate) else 0:<10.2f} | {jitter if pd.notna(jitter) else 0:<12.2f} | "
+              f"{row.mean_x:<8.3f} | {row.mean_y:<8.3f} | {row.std_x:<8.3f} | {row.std_y:<8.3f}")
 
-    for file_path in file_paths:
-        try:
-            if not os.path.exists(file_path):
-                print(f"File not found: {file_path}")
-                continue
-
-            df = pd.read_csv(file_path)
-            if df.empty:
-                print(f"Empty file: {file_path}")
-                continue
-
-            # Timestamp processing
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['delta_t'] = df['timestamp'].diff().dt.total_seconds()
-            
-            # Filter valid deltas for frequency calculation
-            valid_deltas = df['delta_t'][1:]
-            valid_deltas = valid_deltas[valid_deltas > 0] # Avoid division by zero
-
-            if not valid_deltas.empty:
-                freqs = 1.0 / valid_deltas
-                avg_freq = freqs.mean()
-                jitter_ms = valid_deltas.std() * 1000
-            else:
-                avg_freq = 0
-                jitter_ms = 0
-
-            # Position statistics
-            mean_x = df['x'].mean()
-            mean_y = df['y'].mean()
-            std_x = df['x'].std()
-            std_y = df['y'].std()
-            
-            # Z statistics if available
-            if 'z' in df.columns:
-                mean_z = df['z'].mean()
-                std_z = df['z'].std()
-            else:
-                mean_z = np.nan
-                std_z = np.nan
-
-            file_name = os.path.basename(file_path)
-            print(f"{file_name:<40} | {avg_freq:<10.2f} | {jitter_ms:<12.2f} | {mean_x:<8.3f} | {mean_y:<8.3f} | {std_x:<8.3f} | {std_y:<8.3f}")
-
-            results.append({
-                'file': file_name,
-                'avg_freq': avg_freq,
-                'jitter_ms': jitter_ms,
-                'mean_x': mean_x,
-                'mean_y': mean_y,
-                'mean_z': mean_z,
-                'std_x': std_x,
-                'std_y': std_y,
-                'std_z': std_z,
-                'samples': len(df)
-            })
-
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
-
-    return results
+    if output_csv is None:
+        output_csv = os.path.join(os.path.dirname(os.path.abspath(sessions[0])), 'session_analysis_summary.csv')
+    if output_csv:
+        table.to_csv(output_csv, index=False, float_format='%.4f')
+
+    elapsed = time.perf_counter() - t0
+    print(f"\nSessions: {len(sessions)} ({len(sessions) - len(pending)} cached, {len(pending)} analysed"
+          f"{f' with {workers} workers' if pending else ''}) | Errors: {(table['error'] != '').sum()} | "
+          f"Time: {elapsed:.2f}s")
+    if output_csv:
+        print(f"Summary table saved to: {output_csv}")
+    return table
 
 if __name__ == "__main__":
-    files = [
-        r"C:\Users\Control Lunar\Documents\Indoor-UWB-Tracking-Platform-Firmware-Tools-\uwb_data\uwb_positions_20251125_134019.csv",
-        r"C:\Users\Control Lunar\Documents\Indoor-UWB-Tracking-Platform-Firmware-Tools-\uwb_data\uwb_positions_20251125_135213.csv",
-        r"C:\Users\Control Lunar\Documents\Indoor-UWB-Tracking-Platform-Firmware-Tools-\uwb_data\uwb_positions_20251125_142558.csv",
-        r"C:\Users\Control Lunar\Documents\Indoor-UWB-Tracking-Platform-Firmware-Tools-\uwb_data\uwb_positions_20251125_122654.csv"
-    ]
-    
-    analyze_uwb_data(files)
+    parser = argparse.ArgumentParser(description='Analysis summary of every UWB position file of a directory')
+    parser.add_argument('paths', nargs='*', default=[os.path.dirname(os.path.abspath(__file__))],
+                        help='Directories, glob patterns or files (default: uwb_data/)')
+    parser.add_argument('--output', metavar='CSV', default=None,
+                        help='Summary table (default: session_analysis_summary.csv next to the sessions)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--no-cache', action='store_true', help='Analyse every session again')
+    parser.add_argument('--gt', type=float, nargs='+', metavar='COORD', default=None,
+                        help='Ground truth X Y [Z] for the accuracy columns')
+    args = parser.parse_args()
+    if args.gt is not None and len(args.gt) not in (2, 3):
+        parser.error('--gt takes X Y or X Y Z')
+
+    analyze_uwb_data(args.paths, args.output, args.workers, use_cache=not args.no_cache, ground_truth=args.gt)
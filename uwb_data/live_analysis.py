@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Rolling-window analysis of a capture in progress
+Tails the position file the collector is writing and keeps frequency,
+jitter, precision and per-anchor loss of the last seconds up to date with
+O(1) updates per row (samples enter and leave running moments as the
+window slides). Threshold violations are flagged as soon as they happen,
+so a bad setup is fixed during the test instead of after it.
+"""
+
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from position_loader import PositionTail
+from session_analysis import GAP_MS, THRESHOLDS, latest_session
+
+# Extra limits of the live checks
+LIVE_THRESHOLDS = {
+    'max_anchor_loss_pct': 10.0,  # Samples with a 0 distance to an anchor
+    'stall_s': 3.0,               # No new rows for this long
+}
+
+
+class RollingMoments:
+    """Count, mean and M2 of a sliding window: Welford add and its inverse"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.count -= 1
+        self.mean = (old_mean * (self.count + 1) - value) / self.count
+        self.m2 = max(self.m2 - (value - old_mean) * (value - self.mean), 0.0)
+
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+
+class RollingWindow:
+    """
+    Metrics of the samples received in the last window_s seconds.
+
+    Every row is pushed once and popped once, each in O(1): interval and
+    position moments, duplicate/stuck counters and per-anchor loss counts
+    are updated incrementally instead of recomputed over the window.
+    """
+
+    def __init__(self, window_s=10.0):
+        self.window_s = window_s
+        self.samples = deque()
+        self.host_dt = RollingMoments()
+        self.device_dt = RollingMoments()
+        self.axes = {axis: RollingMoments() for axis in ['x', 'y', 'z']}
+        self.duplicates = 0
+        self.stuck = 0
+        self.anchor_lost = None
+        self._last = {}                 # tag: (host_ms, device_ms, x, y) of its previous row
+
+    def push(self, host_ms, tag, device_ms, x, y, z, anchors_zero):
+        """Add one row (anchors_zero: bool per anchor column, distance == 0)"""
+        prev = self._last.get(tag)
+        host_dt = device_dt = np.nan
+        duplicate = stuck = False
+        if prev is not None:
+            host_dt = host_ms - prev[0]
+            device_dt = device_ms - prev[1]
+            duplicate = device_dt == 0
+            stuck = x == prev[2] and y == prev[3]
+        self._last[tag] = (host_ms, device_ms, x, y)
+
+        # Only regular intervals feed the jitter (duplicates and gaps are counted apart)
+        host_dt = host_dt if 0 < host_dt < GAP_MS else np.nan
+        device_dt = device_dt if 0 < device_dt < GAP_MS else np.nan
+        sample = (host_ms, host_dt, device_dt, x, y, z, duplicate, stuck, anchors_zero)
+        self.samples.append(sample)
+        self._apply(sample, 1)
+        self._evict(host_ms)
+
+    def _apply(self, sample, sign):
+        _, host_dt, device_dt, x, y, z, duplicate, stuck, anchors_zero = sample
+        update = 'add' if sign > 0 else 'remove'
+        if not np.isnan(host_dt):
+            getattr(self.host_dt, update)(host_dt)
+        if not np.isnan(device_dt):
+            getattr(self.device_dt, update)(device_dt)
+        for axis, value in zip(['x', 'y', 'z'], (x, y, z)):
+            getattr(self.axes[axis], update)(value)
+        self.duplicates += sign * duplicate
+        self.stuck += sign * stuck
+        if anchors_zero is not None:
+            if self.anchor_lost is None:
+                self.anchor_lost = np.zeros(len(anchors_zero), dtype=np.int64)
+            self.anchor_lost += sign * anchors_zero
+
+    def _evict(self, now_ms):
+        limit = now_ms - self.window_s * 1000.0
+        while self.samples and self.samples[0][0] < limit:
+            self._apply(self.samples.popleft(), -1)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def snapshot(self):
+        """Current window metrics (JSON-native)"""
+        rows = len(self.samples)
+        stats = {'rows': rows, 'rows_per_s': rows / self.window_s}
+        for name, moments in [('host', self.host_dt), ('device', self.device_dt)]:
+            if moments.count:
+                stats[f'{name}_rate_hz'] = 1000.0 / moments.mean
+                stats[f'{name}_jitter_ms'] = moments.std()
+        for axis, moments in self.axes.items():
+            stats[f'std_{axis}_m'] = moments.std()
+        stats['duplicate_pct'] = self.duplicates / rows * 100 if rows else 0.0
+        stats['stuck_pct'] = self.stuck / rows * 100 if rows else 0.0
+        if self.anchor_lost is not None and rows:
+            stats['anchor_loss_pct'] = [float(lost) / rows * 100 for lost in self.anchor_lost]
+        return stats
+
+
+def evaluate_live_checks(stats, idle_s):
+    """
+    Threshold checks of a window snapshot.
+
+    Returns:
+        {check: message} of the violated checks
+    """
+    failed = {}
+    if idle_s > LIVE_THRESHOLDS['stall_s']:
+        failed['stalled'] = f"No new rows for {idle_s:.0f}s"
+    rate = stats.get('device_rate_hz', stats.get('host_rate_hz'))
+    if rate is not None and rate <= THRESHOLDS['min_rate_hz']:
+        failed['rate'] = f"Rate {rate:.1f} Hz below {THRESHOLDS['min_rate_hz']:.0f} Hz"
+    if stats['duplicate_pct'] > (1 - THRESHOLDS['warn_unique_ts']) * 100:
+        failed['duplicates'] = f"{stats['duplicate_pct']:.1f}% duplicate device timestamps (buffered/repeated data)"
+    if stats['stuck_pct'] > THRESHOLDS['max_stuck_fraction'] * 100:
+        failed['stuck'] = f"Position stuck in {stats['stuck_pct']:.1f}% of the rows"
+    if stats['std_z_m'] > THRESHOLDS['max_z_std_m']:
+        failed['z'] = f"Z std {stats['std_z_m'] * 100:.0f} cm (vertical geometry)"
+    for i, loss in enumerate(stats.get('anchor_loss_pct', [])):
+        if loss > LIVE_THRESHOLDS['max_anchor_loss_pct']:
+            failed[f'anchor_{i + 1}'] = f"Anchor {i + 1} lost in {loss:.0f}% of the rows"
+    return failed
+
+
+def format_live_status(stats):
+    """One status line of the window"""
+    parts = [time.strftime('%H:%M:%S'), f"{stats['rows']} rows"]
+    if 'device_rate_hz' in stats:
+        parts.append(f"dev {stats['device_rate_hz']:.1f} Hz jitter {stats['device_jitter_ms']:.1f} ms")
+    if 'host_rate_hz' in stats:
+        parts.append(f"host {stats['host_rate_hz']:.1f} Hz jitter {stats['host_jitter_ms']:.1f} ms")
+    parts.append(f"std x {stats['std_x_m'] * 100:.1f} y {stats['std_y_m'] * 100:.1f} z {stats['std_z_m'] * 100:.1f} cm")
+    if 'anchor_loss_pct' in stats:
+        parts.append("loss " + " ".join(f"A{i + 1} {loss:.0f}%" for i, loss in enumerate(stats['anchor_loss_pct'])))
+    return " | ".join(parts)
+
+
+def push_chunk(window, chunk, tag=None):
+    """Push the rows of a chunk into the window in file order"""
+    if tag is not None:
+        chunk = chunk[chunk['tag_id'] == tag]
+    if len(chunk) == 0:
+        return
+    host_ms = chunk['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64) / 1e6
+    device_ms = chunk['device_timestamp'].to_numpy(dtype=np.float64) if 'device_timestamp' in chunk \
+        else np.full(len(chunk), np.nan)
+    z = chunk['z'].to_numpy(dtype=np.float64) if 'z' in chunk else np.zeros(len(chunk))
+    anchor_cols = [col for col in chunk.columns if col.startswith('anchor_') and col.endswith('_dist')]
+    anchors_zero = chunk[anchor_cols].to_numpy() == 0 if anchor_cols else None
+    rows = zip(host_ms.tolist(), chunk['tag_id'].tolist(), device_ms.tolist(),
+               chunk['x'].tolist(), chunk['y'].tolist(), z.tolist())
+    for i, (h, t, d, x, y, zi) in enumerate(rows):
+        window.push(h, t, d, x, y, zi, anchors_zero[i] if anchors_zero is not None else None)
+
+
+def follow(csv_file=None, window_s=10.0, interval_s=1.0, tag=None, max_updates=None):
+    """
+    Follow a capture and print the rolling-window status every interval_s.
+
+    Args:
+        csv_file: File to follow (default: newest capture, switching to newer
+                  ones when the collector starts a new session)
+        window_s: Seconds of data in the rolling window
+        interval_s: Seconds between status updates
+        tag: Only this tag (default: all tags)
+        max_updates: Stop after this many updates (default: until Ctrl+C)
+    """
+    follow_latest = csv_file is None
+    csv_file = csv_file or latest_session()
+    if csv_file is None:
+        print("No uwb_positions_*.csv to follow")
+        return
+    tail = PositionTail(csv_file)
+    window = RollingWindow(window_s)
+    failing = {}
+    last_data = time.monotonic()
+    updates = 0
+    print(f"Following {os.path.basename(csv_file)} (window {window_s:.0f}s, Ctrl+C to stop)")
+
+    try:
+        while max_updates is None or updates < max_updates:
+            time.sleep(interval_s)
+            updates += 1
+
+            if follow_latest:
+                newest = latest_session()
+                if newest is not None and newest != csv_file and os.path.getmtime(newest) > os.path.getmtime(csv_file):
+                    tail.close()
+                    csv_file = newest
+                    tail = PositionTail(csv_file, from_start=True)
+                    window = RollingWindow(window_s)
+                    failing = {}
+                    print(f"New session: {os.path.basename(csv_file)}")
+
+            chunk = tail.read()
+            while chunk is not None:
+                push_chunk(window, chunk, tag)
+                last_data = time.monotonic()
+                chunk = tail.read()
+
+            stats = window.snapshot()
+            print(format_live_status(stats))
+
+            # Violations are reported when they start and when they clear
+            failed = evaluate_live_checks(stats, time.monotonic() - last_data)
+            for check, message in failed.items():
+                if check not in failing:
+                    print(f"  WARNING: {message}")
+            for check in failing:
+                if check not in failed:
+                    print(f"  OK again: {check}")
+            failing = failed
+    except KeyboardInterrupt:
+        print("\nStopped following")
+    finally:
+        tail.close()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Streaming loader for UWB position files (uwb_positions_*.csv)
+Reads the CSV in chunks with explicit compact dtypes and only the needed
+columns, copying every chunk into preallocated arrays, so peak memory
+stays close to the size of the final arrays even for multi-GB sessions.
+Timestamps in the collector format are parsed from the raw bytes with a
+fixed-width fast path instead of per-row strings.
+A time window is read through the sidecar time index (time_index.py):
+only the bytes of the blocks overlapping the window are loaded.
+iter_position_chunks yields the same data chunk by chunk for streaming
+analyses that never hold the whole file, and PositionTail reads the rows
+appended to a capture in progress.
+"""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.typing import DTypeLike
+
+from time_index import TimeIndex
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+MIN_TIMESTAMP_WIDTH = 19      # 'YYYY-mm-dd HH:MM:SS'
+MAX_TIMESTAMP_WIDTH = 26      # 'YYYY-mm-dd HH:MM:SS.ffffff'
+SMALL_FILE_BYTES = 1 << 22    # Below this no row pre-scan: the arrays grow from the first block
+
+# Compact dtypes for every column the collector writes
+POSITION_DTYPES = {
+    'tag_id': np.int32,
+    'x': np.float32,
+    'y': np.float32,
+    'z': np.float32,
+    'anchor_1_dist': np.float32,
+    'anchor_2_dist': np.float32,
+    'anchor_3_dist': np.float32,
+    'anchor_4_dist': np.float32,
+    'anchor_5_dist': np.float32,
+    'anchor_6_dist': np.float32,
+    'device_timestamp': np.int64,
+}
+
+# Columns that older captures may lack, filled with zeros
+OPTIONAL_COLUMNS = {'z'}
+
+
+def read_header(csv_file):
+    """Column names of a position file"""
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        return f.readline().strip().split(',')
+
+
+def count_rows(csv_file, block_size=1 << 20):
+    """Count data rows without loading the file (newlines minus header)"""
+    rows = 0
+    last_byte = b'\n'
+    with open(csv_file, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            rows += block.count(b'\n')
+            last_byte = block[-1:]
+    if last_byte != b'\n':
+        rows += 1  # Last line without newline
+    return max(rows - 1, 0)
+
+
+def parse_timestamps(values):
+    """Parse collector timestamps to datetime64[ns], explicit format first"""
+    for timestamp_format in [TIMESTAMP_FORMAT, 'ISO8601']:  # ISO8601: mixed precision rows
+        try:
+            return pd.to_datetime(values, format=timestamp_format)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_datetime(values)
+
+
+def read_window_bytes(csv_file, start=None, end=None):
+    """
+    Header plus the rows of a time window, read through the time index.
+
+    Args:
+        csv_file: Path to a uwb_positions_*.csv file
+        start, end: Window bounds (seconds or [HH:]MM:SS from the session
+                    start, or absolute 'YYYY-mm-dd HH:MM:SS'); None = open
+
+    Returns:
+        (source, rows, (start_ms, end_ms)): file-like object with the CSV
+        header and the overlapping blocks, an upper bound of its rows and
+        the absolute window for the exact row filter
+    """
+    index = TimeIndex.for_file(csv_file)
+    window = index.resolve_window(start, end)
+    span = index.byte_range(*window)
+
+    with open(csv_file, 'rb') as f:
+        data = f.read(index.data_start)
+        rows = 0
+        if span is not None:
+            offset, length, rows = span
+            f.seek(offset)
+            data += f.read(length)
+    return io.BytesIO(data), rows, window
+
+
+def parse_fixed_timestamps(data):
+    """
+    Fast path for the timestamps of rows in the collector format.
+
+    The timestamp is the first field of every row and has a fixed width
+    ('YYYY-mm-dd HH:MM:SS.fff'), so the fields are sliced straight out of
+    the raw bytes and converted by numpy, without creating a Python string
+    per row or going through pandas' format matching.
+
+    Args:
+        data: bytes of complete rows (no header)
+
+    Returns:
+        datetime64[ns] array (one per row), or None if the rows do not
+        follow the fixed-width format (use parse_timestamps instead)
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    line_starts = np.concatenate(([0], np.flatnonzero(buffer == ord('\n')) + 1))
+    line_starts = line_starts[line_starts < len(buffer)]
+    if len(line_starts) == 0:
+        return np.empty(0, dtype='datetime64[ns]')
+
+    width = data.find(b',') - line_starts[0]
+    if not MIN_TIMESTAMP_WIDTH <= width <= MAX_TIMESTAMP_WIDTH:
+        return None
+    separators = line_starts + width
+    if separators[-1] >= len(buffer) or not (buffer[separators] == ord(',')).all():
+        return None  # Blank lines or variable-width timestamps
+
+    fields = np.ascontiguousarray(buffer[line_starts[:, np.newaxis] + np.arange(width)])
+    try:
+        return fields.view(f'S{width}').ravel().astype('datetime64[ns]')
+    except ValueError:
+        return None
+
+
+def _read_plan(header, columns, float_dtype, windowed):
+    """Requested columns, columns present in the file and their dtypes"""
+    columns = list(columns) if columns is not None else header
+
+    missing = [col for col in columns if col not in header and col not in OPTIONAL_COLUMNS]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    read_cols = [col for col in columns if col in header]
+    if windowed and 'timestamp' not in read_cols:
+        read_cols.append('timestamp')  # Needed for the exact window filter
+    dtypes = {}
+    for col in read_cols:
+        if col == 'timestamp':
+            continue
+        dtype = POSITION_DTYPES.get(col, np.float64)
+        dtypes[col] = float_dtype if np.issubdtype(dtype, np.floating) else dtype
+    return columns, read_cols, dtypes
+
+
+def _read_values(data, header, value_cols, dtypes):
+    """
+    Numeric columns of a block of complete rows.
+
+    Rows with an empty integer field (tag_id, device_timestamp) cannot be
+    stored in the compact integer arrays: the block is then read again
+    with those columns as float and the incomplete rows are dropped.
+
+    Returns:
+        ({column: array}, rows in the block, mask of the kept rows or None)
+    """
+    try:
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=value_cols, dtype=dtypes)
+        return {col: chunk[col].to_numpy() for col in value_cols}, len(chunk), None
+    except ValueError:
+        int_cols = [col for col in value_cols if np.issubdtype(dtypes[col], np.integer)]
+        if not int_cols:
+            raise
+        loose = {col: np.float64 if col in int_cols else dtype for col, dtype in dtypes.items()}
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=value_cols, dtype=loose)
+
+    valid = chunk[int_cols].notna().all(axis=1).to_numpy()
+    print(f"Warning: skipped {int((~valid).sum())} rows with an empty {'/'.join(int_cols)} field")
+    arrays = {col: chunk[col].to_numpy()[valid].astype(dtypes[col]) if col in int_cols else chunk[col].to_numpy()[valid]
+              for col in value_cols}
+    return arrays, len(chunk), valid
+
+
+def _parse_rows(data, header, read_cols, dtypes):
+    """
+    Columns of a block of complete rows as numpy arrays.
+
+    pandas only tokenises the numeric columns; timestamps take the
+    fixed-width fast path and fall back to parse_timestamps.
+    """
+    arrays = {}
+    rows, valid = None, None
+    value_cols = [col for col in read_cols if col != 'timestamp']
+    if value_cols:
+        arrays, rows, valid = _read_values(data, header, value_cols, dtypes)
+
+    if 'timestamp' in read_cols:
+        times = parse_fixed_timestamps(data) if header[0] == 'timestamp' else None
+        if times is None or (rows is not None and len(times) != rows):
+            chunk = pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=['timestamp'])
+            times = parse_timestamps(chunk['timestamp']).to_numpy(dtype='datetime64[ns]')
+        arrays['timestamp'] = times if valid is None else times[valid]
+    return arrays
+
+
+def _projected_frame(arrays, columns, num_rows, float_dtype, keep=None):
+    """
+    DataFrame of the requested columns (optional columns missing from the file as zeros).
+
+    keep selects rows of every array (slice or index array, None for all).
+    """
+    data = {col: (arrays[col] if keep is None else arrays[col][keep]) if col in arrays
+            else np.zeros(num_rows, dtype=float_dtype)
+            for col in columns}
+    return pd.DataFrame(data, copy=False)
+
+
+def parse_position_rows(header, data, columns=None, float_dtype: DTypeLike = np.float32):
+    """
+    Typed DataFrame of rows appended to a position file (live tails).
+
+    Args:
+        header: Header line of the file (bytes)
+        data: bytes of complete rows following the header
+        columns, float_dtype: As in load_positions
+    """
+    header = header.decode('utf-8').strip().split(',')
+    columns, read_cols, dtypes = _read_plan(header, columns, float_dtype, windowed=False)
+    arrays = _parse_rows(data, header, read_cols, dtypes) if data.strip() else \
+        {col: np.empty(0, dtype=dtypes.get(col, 'datetime64[ns]')) for col in read_cols}
+    num_rows = len(arrays[read_cols[0]]) if read_cols else 0
+    return _projected_frame(arrays, columns, num_rows, float_dtype)
+
+
+class PositionTail:
+    """
+    Complete rows appended to a position file that is still being written.
+
+    Shared by the live replay (replay/live_feed.py) and the rolling-window
+    analysis (live_analysis.py): every read() returns only the rows
+    completed since the previous one.
+    """
+
+    def __init__(self, csv_file, columns=None, from_start=False):
+        """
+        Args:
+            csv_file: uwb_positions_*.csv being written
+            columns: As in load_positions (default: all in the file)
+            from_start: Read the existing rows too (default: only new ones);
+                        offset can also be set to any row start afterwards
+        """
+        self.csv_file = csv_file
+        self.columns = columns
+        self.handle = open(csv_file, 'rb')
+        self.header = self.handle.readline()
+        self.offset = len(self.header) if from_start else self._last_line_end()
+
+    def _last_line_end(self):
+        """Offset just after the last complete row"""
+        size = os.path.getsize(self.csv_file)
+        self.handle.seek(max(size - 65536, len(self.header)))
+        tail = self.handle.read()
+        return size - len(tail) + tail.rfind(b'\n') + 1 if b'\n' in tail else len(self.header)
+
+    def read(self, max_bytes=8 << 20):
+        """New rows as a DataFrame (None if nothing complete was appended)"""
+        size = os.path.getsize(self.csv_file)
+        if size < self.offset:
+            self.offset = len(self.header)  # File truncated or replaced: start over
+        if size == self.offset:
+            return None
+        self.handle.seek(self.offset)
+        data = self.handle.read(min(size - self.offset, max_bytes))
+        complete = data.rfind(b'\n') + 1
+        if complete == 0:
+            return None
+        self.offset += complete
+        return parse_position_rows(self.header, data[:complete], columns=self.columns)
+
+    def close(self):
+        self.handle.close()
+
+
+def _open_source(csv_file, start, end):
+    """(binary file-like object, row capacity, window in ms or None) of a read"""
+    if start is None and end is None:
+        return open(csv_file, 'rb'), None, None
+    return read_window_bytes(csv_file, start, end)
+
+
+def _iter_blocks(source, window, read_cols, dtypes, chunk_rows):
+    """
+    Parsed columns of consecutive blocks of about chunk_rows complete rows.
+
+    The source (whole file or the bytes of a time window) is read in raw
+    blocks cut at the last newline, sized from the length of the first row.
+
+    Yields:
+        ({column: array}, keep) per block; keep selects the rows inside
+        the window (slice(None) without a window)
+    """
+    with source:
+        header = source.readline().decode('utf-8').strip().split(',')
+        rest = source.readline()
+        block_bytes = max(len(rest) * chunk_rows, 1 << 16)
+        while True:
+            new = source.read(block_bytes)
+            data = rest + new
+            cut = data.rfind(b'\n') + 1 if new else len(data)  # Last row may lack a newline
+            data, rest = data[:cut], data[cut:]
+
+            if data.strip():
+                arrays = _parse_rows(data, header, read_cols, dtypes)
+                keep = slice(None)
+                if window is not None:
+                    # Blocks are coarse: keep only the rows inside the window
+                    times_ms = arrays['timestamp'].astype('datetime64[ms]').astype(np.int64)
+                    keep = np.flatnonzero((times_ms >= window[0]) & (times_ms <= window[1]))
+                yield arrays, keep
+            if not new:
+                break
+
+
+def iter_position_chunks(csv_file, columns=None, float_dtype: DTypeLike = np.float32, chunk_rows=250_000,
+                         start=None, end=None):
+    """
+    Read a position file as a sequence of DataFrames of about chunk_rows rows.
+
+    Same columns, dtypes and time window as load_positions, but nothing is
+    accumulated: memory stays bounded by one chunk for any file size.
+
+    Yields:
+        DataFrame per chunk (rows outside the window already dropped)
+    """
+    windowed = start is not None or end is not None
+    columns, read_cols, dtypes = _read_plan(read_header(csv_file), columns, float_dtype, windowed)
+
+    source, _, window = _open_source(csv_file, start, end)
+    for arrays, keep in _iter_blocks(source, window, read_cols, dtypes, chunk_rows):
+        num_rows = len(arrays[read_cols[0]][keep])
+        yield _projected_frame(arrays, columns, num_rows, float_dtype, keep)
+
+
+def load_positions(csv_file, columns=None, float_dtype: DTypeLike = np.float32, chunk_rows=250_000,
+                   start=None, end=None):
+    """
+    Load a position file in chunks into preallocated arrays.
+
+    Args:
+        csv_file: Path to a uwb_positions_*.csv file
+        columns: Columns to read (default: all in the file); 'timestamp' is
+                 parsed to datetime64, optional columns missing from old
+                 files ('z') are filled with zeros
+        float_dtype: dtype for positions and distances (float32 or float64)
+        chunk_rows: Rows per chunk (bounds the temporary parsing memory)
+        start, end: Optional time window (see read_window_bytes); only the
+                    bytes of the window are read
+
+    Returns:
+        DataFrame backed by the preallocated arrays
+    """
+    windowed = start is not None or end is not None
+    columns, read_cols, dtypes = _read_plan(read_header(csv_file), columns, float_dtype, windowed)
+
+    # === PREALLOCATION ===
+    source, capacity, window = _open_source(csv_file, start, end)
+    if capacity is None:
+        capacity = count_rows(csv_file) if os.path.getsize(csv_file) > SMALL_FILE_BYTES else 0
+    arrays = {col: np.empty(capacity, dtype=dtypes.get(col, 'datetime64[ns]')) for col in read_cols}
+
+    filled = 0
+    for block, keep in _iter_blocks(source, window, read_cols, dtypes, chunk_rows):
+        n = len(block[read_cols[0]][keep])
+        if filled + n > capacity:
+            capacity = max(filled + n, capacity * 2)
+            for col in read_cols:
+                arrays[col] = np.resize(arrays[col], capacity)
+
+        for col in read_cols:
+            arrays[col][filled:filled + n] = block[col][keep]
+        filled += n
+
+    return _projected_frame(arrays, columns, filled, float_dtype, slice(0, filled))
+
+
+def estimate_memory_mb(df):
+    """Memory used by the loaded arrays in MB"""
+    return df.memory_usage(deep=True, index=False).sum() / (1024 * 1024)
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Unified analysis of UWB position files (uwb_positions_*.csv)
+Loads a session once with the streaming loader and computes every metric
+family from the same intermediate arrays: update frequency and jitter
+(host and device clocks), precision, accuracy against a ground truth,
+Z-axis stability and data integrity (uniqueness, stuck frames). The result
+is a JSON-native report, printed as text or saved as JSON.
+
+Replaces the per-metric scripts (analyze_csv, analyze_results,
+analyze_z_detailed, calculate_frequency, calculate_precision,
+verify_integrity, comprehensive_analysis), which are now thin wrappers.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from position_loader import load_positions, read_header
+
+ANALYSIS_COLUMNS = ['timestamp', 'tag_id', 'x', 'y', 'z', 'device_timestamp']
+SECTIONS = ['frequency', 'precision', 'accuracy', 'z', 'integrity']
+
+# Intervals at or above this are gaps (packet loss, restart), not jitter
+GAP_MS = 1000.0
+
+# Thresholds of the verdicts (the "REAL 40Hz" check of verify_integrity)
+THRESHOLDS = {
+    'min_rate_hz': 35.0,          # Device-clock rate for a 40 Hz configuration
+    'min_unique_ts': 0.99,        # Unique device timestamps for the rate verdict
+    'warn_unique_ts': 0.95,       # Below this, data looks buffered/repeated
+    'max_stuck_fraction': 0.10,   # Frames without movement
+    'max_z_std_m': 0.30,          # Typical UWB vertical GDOP limit
+    'z_min_m': -0.5,              # Physically plausible Z range of a tag
+    'z_max_m': 2.5,
+}
+
+
+# =============================================================================
+# === SHARED INTERMEDIATE ARRAYS ===
+# =============================================================================
+
+def prepare_arrays(df):
+    """
+    Arrays shared by every metric family, computed once per session.
+
+    Rows are grouped by tag (file order kept within a tag) so intervals
+    and steps are only taken between consecutive samples of the same tag.
+
+    Args:
+        df: Positions loaded with load_positions (ANALYSIS_COLUMNS)
+
+    Returns:
+        Dict of numpy arrays: order (row of df for every entry), tag, x, y,
+        z (None for captures without a z column), host_ms, device_ms (or None), host_dt_ms, device_dt_ms (or None)
+        and step_m (per-tag diffs)
+    """
+    tag = df['tag_id'].to_numpy()
+    order = np.argsort(tag, kind='stable')
+    tag = tag[order]
+    arrays = {
+        'order': order,
+        'tag': tag,
+        'x': df['x'].to_numpy(dtype=np.float64)[order],
+        'y': df['y'].to_numpy(dtype=np.float64)[order],
+        'z': df['z'].to_numpy(dtype=np.float64)[order] if 'z' in df else None,
+        'host_ms': df['timestamp'].to_numpy().astype(np.int64)[order] / 1e6,
+        'device_ms': None,
+        'device_dt_ms': None,
+    }
+
+    same_tag = tag[1:] == tag[:-1]
+    arrays['host_dt_ms'] = np.diff(arrays['host_ms'])[same_tag]
+    arrays['step_m'] = np.hypot(np.diff(arrays['x']), np.diff(arrays['y']))[same_tag]
+
+    device = df['device_timestamp'].to_numpy()[order] if 'device_timestamp' in df else None
+    if device is not None and (device > 0).any():
+        arrays['device_ms'] = device.astype(np.float64)
+        arrays['device_dt_ms'] = np.diff(arrays['device_ms'])[same_tag]
+    return arrays
+
+
+# =============================================================================
+# === METRIC FAMILIES ===
+# =============================================================================
+
+def interval_stats(dt_ms):
+    """
+    Rate and jitter of one clock from its per-tag sample intervals.
+
+    Only positive intervals below GAP_MS count for the rate and jitter;
+    duplicates (0 ms) and gaps are reported separately.
+    """
+    dt_ms = np.asarray(dt_ms, dtype=np.float64)
+    valid = dt_ms[(dt_ms > 0) & (dt_ms < GAP_MS)]
+    stats: Dict[str, Any] = {
+        'intervals': int(len(dt_ms)),
+        'duplicates': int(np.count_nonzero(dt_ms == 0)),
+        'backwards': int(np.count_nonzero(dt_ms < 0)),
+        'gaps': int(np.count_nonzero(dt_ms >= GAP_MS)),
+    }
+    if len(valid) == 0:
+        return stats
+
+    freqs = 1000.0 / valid
+    stats.update({
+        'rate_hz': float(1000.0 / valid.mean()),
+        'mean_interval_ms': float(valid.mean()),
+        'median_interval_ms': float(np.median(valid)),
+        'jitter_ms': float(valid.std(ddof=1)) if len(valid) > 1 else 0.0,
+        'mean_freq_hz': float(freqs.mean()),
+        'median_freq_hz': float(np.median(freqs)),
+        'min_freq_hz': float(freqs.min()),
+        'max_freq_hz': float(freqs.max()),
+        'std_freq_hz': float(freqs.std(ddof=1)) if len(freqs) > 1 else 0.0,
+    })
+    return stats
+
+
+def frequency_metrics(arrays):
+    """Update rate, jitter and interval distribution on the host and device clocks"""
+    metrics: Dict[str, Any] = {'host': interval_stats(arrays['host_dt_ms'])}
+    if arrays['device_dt_ms'] is not None:
+        metrics['device'] = interval_stats(arrays['device_dt_ms'])
+        valid = arrays['device_dt_ms'][arrays['device_dt_ms'] > 0]
+        values, counts = np.unique(valid, return_counts=True)
+        top = np.argsort(counts, kind='stable')[::-1][:5]
+        metrics['device_interval_counts'] = [[float(values[i]), int(counts[i])] for i in top]
+
+    # Rate per tag from its own span (robust to interleaved tags)
+    tag, host_ms = arrays['tag'], arrays['host_ms']
+    tags, starts, counts = np.unique(tag, return_index=True, return_counts=True)
+    ends = starts + counts - 1
+    spans_s = (host_ms[ends] - host_ms[starts]) / 1000.0
+    metrics['tags'] = {str(int(t)): {'samples': int(n), 'rate_hz': float((n - 1) / s) if s > 0 else 0.0}
+                       for t, n, s in zip(tags, counts, spans_s)}
+    return metrics
+
+
+def precision_metrics(arrays):
+    """Spread of the positions around their centroid (stability of a static tag)"""
+    metrics: Dict[str, Any] = {}
+    for axis in ['x', 'y', 'z'] if arrays['z'] is not None else ['x', 'y']:
+        values = arrays[axis]
+        metrics[f'mean_{axis}'] = float(values.mean())
+        metrics[f'std_{axis}'] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+
+    err = np.hypot(arrays['x'] - metrics['mean_x'], arrays['y'] - metrics['mean_y'])
+    metrics['mean_err_from_centroid_m'] = float(err.mean())
+    metrics['cep95_from_centroid_m'] = float(np.percentile(err, 95))
+    return metrics
+
+
+def accuracy_metrics(x, y, z, ground_truth):
+    """
+    Errors against a known reference point.
+
+    Args:
+        x, y, z: Position arrays
+        ground_truth: (x, y) or (x, y, z); with z the error is also given in 3D
+
+    Returns:
+        Dict with per-axis bias/MAE/RMSE and 2D (and 3D) error statistics
+    """
+    metrics: Dict[str, Any] = {'ground_truth': [float(v) for v in ground_truth]}
+    axes = [('x', x), ('y', y)] + ([('z', z)] if len(ground_truth) > 2 else [])
+    errors = []
+    for (axis, values), truth in zip(axes, ground_truth):
+        err = np.asarray(values, dtype=np.float64) - truth
+        errors.append(err)
+        metrics[f'bias_{axis}_m'] = float(err.mean())
+        metrics[f'mae_{axis}_m'] = float(np.abs(err).mean())
+        metrics[f'rmse_{axis}_m'] = float(np.sqrt(np.mean(err ** 2)))
+
+    for name, dims in [('2d', 2), ('3d', 3)][:len(errors) - 1]:
+        dist = np.sqrt(sum(err ** 2 for err in errors[:dims]))
+        metrics[f'mean_err_{name}_m'] = float(dist.mean())
+        metrics[f'min_err_{name}_m'] = float(dist.min())
+        metrics[f'max_err_{name}_m'] = float(dist.max())
+        metrics[f'rmse_{name}_m'] = float(np.sqrt(np.mean(dist ** 2)))
+        metrics[f'cep50_{name}_m'], metrics[f'cep95_{name}_m'] = [float(v) for v in np.percentile(dist, [50, 95])]
+    return metrics
+
+
+def z_metrics(arrays, timestamps=None):
+    """Z-axis statistics, distribution and out-of-range samples"""
+    z = arrays['z']
+    outliers = np.flatnonzero((z > THRESHOLDS['z_max_m']) | (z < THRESHOLDS['z_min_m']))
+    q25, q50, q75 = np.percentile(z, [25, 50, 75])
+    metrics: Dict[str, Any] = {
+        'mean_m': float(z.mean()),
+        'std_m': float(z.std(ddof=1)) if len(z) > 1 else 0.0,
+        'min_m': float(z.min()),
+        'max_m': float(z.max()),
+        'range_m': float(z.max() - z.min()),
+        'q25_m': float(q25), 'median_m': float(q50), 'q75_m': float(q75),
+        'outliers': int(len(outliers)),
+    }
+    if timestamps is not None and len(outliers):
+        metrics['outlier_samples'] = [[str(timestamps[i]), float(z[i])] for i in outliers[:5]]
+    return metrics
+
+
+def integrity_metrics(arrays):
+    """Unique positions and device timestamps, frames without movement"""
+    total = len(arrays['tag'])
+    # Uniqueness through one int64 key per row and a hash table (no sort):
+    # positions mix the bit patterns of x, y and z (a collision between
+    # distinct positions is ~1e-7 likely for millions of rows)
+    bits = [np.ascontiguousarray(arrays[axis]).view(np.uint64) for axis in ['x', 'y', 'z']
+            if arrays[axis] is not None]
+    if len(bits) == 2:
+        bits.append(np.zeros_like(bits[0]))  # No z column
+    with np.errstate(over='ignore'):
+        position_key = bits[0] * np.uint64(0x9E3779B97F4A7C15) ^ bits[1] * np.uint64(0xC2B2AE3D27D4EB4F) ^ bits[2]
+    metrics: Dict[str, Any] = {
+        'rows': total,
+        'unique_positions': int(len(pd.unique(position_key))),
+        'stuck_frames': int(np.count_nonzero(arrays['step_m'] == 0)),
+    }
+    if arrays['device_ms'] is not None:
+        # Unique per tag: different tags may share a device timestamp
+        ts_key = arrays['device_ms'].astype(np.int64) * 65536 + (arrays['tag'].astype(np.int64) & 0xFFFF)
+        metrics['unique_device_ts'] = int(len(pd.unique(ts_key)))
+    return metrics
+
+
+def evaluate_checks(report):
+    """
+    Pass/fail verdicts of the report against THRESHOLDS.
+
+    Returns:
+        List of {'check', 'ok', 'message'}
+    """
+    checks = []
+    integrity = report.get('integrity')
+    rows = report['samples']
+    if integrity is not None and rows:
+        if 'unique_device_ts' in integrity:
+            unique = integrity['unique_device_ts'] / rows
+            ok = unique >= THRESHOLDS['warn_unique_ts']
+            checks.append({'check': 'unique_timestamps', 'ok': bool(ok),
+                           'message': "Timestamps are unique: each row is a new packet" if ok else
+                                      f"Many duplicate timestamps ({unique * 100:.1f}% unique): data might be buffered/repeated"})
+        stuck = integrity['stuck_frames'] / rows
+        ok = stuck <= THRESHOLDS['max_stuck_fraction']
+        checks.append({'check': 'movement', 'ok': bool(ok),
+                       'message': "Tag position is changing dynamically" if ok else
+                                  f"Tag position seems stuck in {stuck * 100:.1f}% of the frames"})
+
+    frequency = report.get('frequency')
+    if frequency is not None and 'device' in frequency and integrity is not None:
+        rate = frequency['device'].get('rate_hz', 0.0)
+        unique = integrity.get('unique_device_ts', 0) / rows if rows else 0.0
+        ok = rate > THRESHOLDS['min_rate_hz'] and unique > THRESHOLDS['min_unique_ts']
+        checks.append({'check': 'real_rate', 'ok': bool(ok),
+                       'message': f"Real {rate:.1f} Hz performance confirmed" if ok else
+                                  f"Rate {rate:.1f} Hz / {unique * 100:.1f}% unique timestamps: data suspicious"})
+
+    z = report.get('z')
+    if z is not None:
+        ok = z['std_m'] <= THRESHOLDS['max_z_std_m']
+        checks.append({'check': 'z_stability', 'ok': bool(ok),
+                       'message': "Z-axis is relatively stable" if ok else
+                                  f"High Z-axis variance ({z['std_m'] * 100:.0f} cm), typical of the vertical "
+                                  "geometry (GDOP): ignore Z or fix it for 2D tracking"})
+    return checks
+
+
+# =============================================================================
+# === SESSION ANALYSIS ===
+# =============================================================================
+
+def analyze_positions(df, ground_truth=None, sections=None):
+    """
+    Analysis report of loaded positions.
+
+    Args:
+        df: Positions loaded with load_positions (ANALYSIS_COLUMNS)
+        ground_truth: Optional (x, y) or (x, y, z) for the accuracy section
+        sections: Metric families to compute (default: all in SECTIONS)
+
+    Returns:
+        JSON-native dict with one entry per section plus 'checks'
+    """
+    sections = SECTIONS if sections is None else sections
+    report: Dict[str, Any] = {'samples': int(len(df)), 'tags': 0, 'duration_s': 0.0}
+    if len(df) == 0:
+        return report
+
+    arrays = prepare_arrays(df)
+    report['tags'] = int(len(np.unique(arrays['tag'])))
+    report['duration_s'] = float((arrays['host_ms'].max() - arrays['host_ms'].min()) / 1000.0)
+
+    if 'frequency' in sections:
+        report['frequency'] = frequency_metrics(arrays)
+    if 'precision' in sections:
+        report['precision'] = precision_metrics(arrays)
+    if 'accuracy' in sections and ground_truth is not None:
+        if arrays['z'] is None:
+            ground_truth = ground_truth[:2]  # 2D only without a z column
+        report['accuracy'] = accuracy_metrics(arrays['x'], arrays['y'], arrays['z'], ground_truth)
+    if 'z' in sections:
+        if arrays['z'] is None:
+            report['z_column'] = False  # Old header: no Z statistics instead of a flat zero axis
+        else:
+            timestamps = df['timestamp'].to_numpy()[arrays['order']].astype('datetime64[ms]')
+            report['z'] = z_metrics(arrays, timestamps)
+    if 'integrity' in sections:
+        report['integrity'] = integrity_metrics(arrays)
+    report['checks'] = evaluate_checks(report)
+    return report
+
+
+def load_session(csv_file, tag=None, start=None, end=None):
+    """
+    Positions of a session with the analysis columns.
+
+    Args:
+        csv_file: Path to a uwb_positions_*.csv file
+        tag: Only this tag (default: all tags)
+        start, end: Optional time window (see position_loader.load_positions)
+    """
+    header = read_header(csv_file)
+    columns = [col for col in ANALYSIS_COLUMNS if col not in ('z', 'device_timestamp') or col in header]
+    df = load_positions(csv_file, columns=columns, float_dtype=np.float64, start=start, end=end)
+    if tag is not None:
+        df = df[df['tag_id'] == tag].reset_index(drop=True)
+    return df
+
+
+def analyze_session(csv_file, ground_truth=None, sections=None, tag=None, start=None, end=None):
+    """
+    Load a session once and compute the selected metric families.
+
+    Returns:
+        Report dict (see analyze_positions) with the file name
+    """
+    report: Dict[str, Any] = {'file': os.path.basename(csv_file)}
+    report.update(analyze_positions(load_session(csv_file, tag, start, end), ground_truth, sections))
+    return report
+
+
+# =============================================================================
+# === TEXT REPORT ===
+# =============================================================================
+
+def format_interval_stats(title, stats):
+    """Lines of one clock of the frequency section"""
+    lines = [f"{title}:"]
+    if 'rate_hz' not in stats:
+        return lines + ["  Not enough valid intervals"]
+    lines += [
+        f"  Rate:              {stats['rate_hz']:.2f} Hz (mean interval {stats['mean_interval_ms']:.2f} ms, "
+        f"median {stats['median_interval_ms']:.2f} ms)",
+        f"  Jitter:            {stats['jitter_ms']:.2f} ms (interval std dev)",
+        f"  Frequency:         mean {stats['mean_freq_hz']:.2f} | median {stats['median_freq_hz']:.2f} | "
+        f"min {stats['min_freq_hz']:.2f} | max {stats['max_freq_hz']:.2f} | std {stats['std_freq_hz']:.2f} Hz",
+        f"  Duplicates: {stats['duplicates']} | Gaps >= {GAP_MS:.0f} ms: {stats['gaps']} | "
+        f"Backwards: {stats['backwards']}",
+    ]
+    return lines
+
+
+def format_analysis_report(report):
+    """Text version of an analysis report"""
+    lines = [f"=== UWB SESSION ANALYSIS: {report.get('file', '')} ===",
+             f"Samples: {report['samples']:,} | Tags: {report['tags']} | Duration: {report['duration_s']:.2f} s"
+             + (" | streaming (quantiles from histograms)" if report.get('streaming') else "")]
+
+    frequency = report.get('frequency')
+    if frequency is not None:
+        lines.append("\n=== FREQUENCY ===")
+        if 'device' in frequency:
+            lines += format_interval_stats("Device clock", frequency['device'])
+        lines += format_interval_stats("Host clock", frequency['host'])
+        if frequency.get('device_interval_counts'):
+            top = ", ".join(f"{interval:g} ms x{count}" for interval, count in frequency['device_interval_counts'])
+            lines.append(f"Most common device intervals: {top}")
+        if len(frequency['tags']) > 1:
+            for tag, stats in frequency['tags'].items():
+                lines.append(f"  Tag {tag}: {stats['samples']:,} samples, {stats['rate_hz']:.2f} Hz")
+
+    precision = report.get('precision')
+    if precision is not None:
+        lines.append("\n=== PRECISION (STABILITY) ===")
+        lines.append(f"Mean position: X={precision['mean_x']:.3f} m, Y={precision['mean_y']:.3f} m"
+                     + (f", Z={precision['mean_z']:.3f} m" if 'mean_z' in precision else " (no Z column)"))
+        for axis in [axis for axis in ['x', 'y', 'z'] if f'std_{axis}' in precision]:
+            std = precision[f'std_{axis}']
+            lines.append(f"  Std {axis.upper()}: {std:.4f} m ({std * 100:.2f} cm)")
+        if 'mean_err_from_centroid_m' in precision:
+            lines.append(f"Mean 2D error from centroid: {precision['mean_err_from_centroid_m'] * 100:.2f} cm | "
+                         f"CEP95: {precision['cep95_from_centroid_m'] * 100:.2f} cm")
+
+    accuracy = report.get('accuracy')
+    if accuracy is not None:
+        lines.append("\n=== ACCURACY (vs Ground Truth) ===")
+        lines.append(f"Ground truth: ({', '.join(f'{v:g}' for v in accuracy['ground_truth'])})")
+        for axis in ['x', 'y', 'z']:
+            if f'bias_{axis}_m' in accuracy:
+                lines.append(f"  {axis.upper()}: bias {accuracy[f'bias_{axis}_m'] * 100:.2f} cm | "
+                             f"MAE {accuracy[f'mae_{axis}_m'] * 100:.2f} cm | "
+                             f"RMSE {accuracy[f'rmse_{axis}_m'] * 100:.2f} cm")
+        for name in ['2d', '3d']:
+            if f'rmse_{name}_m' in accuracy:
+                lines.append(f"  {name.upper()} error: mean {accuracy[f'mean_err_{name}_m'] * 100:.2f} cm | "
+                             f"min {accuracy[f'min_err_{name}_m'] * 100:.2f} | "
+                             f"max {accuracy[f'max_err_{name}_m'] * 100:.2f} | "
+                             f"RMSE {accuracy[f'rmse_{name}_m'] * 100:.2f} | "
+                             f"CEP50 {accuracy[f'cep50_{name}_m'] * 100:.2f} | "
+                             f"CEP95 {accuracy[f'cep95_{name}_m'] * 100:.2f} cm")
+
+    z = report.get('z')
+    if report.get('z_column') is False:
+        lines.append("\n=== Z-AXIS ===")
+        lines.append("No Z column in this capture")
+    elif z is not None:
+        lines.append("\n=== Z-AXIS ===")
+        lines.append(f"Mean {z['mean_m']:.3f} m | Std {z['std_m']:.3f} m ({z['std_m'] * 100:.1f} cm) | "
+                     f"Min {z['min_m']:.3f} | Max {z['max_m']:.3f} | Range {z['range_m']:.3f} m")
+        lines.append(f"Quartiles: {z['q25_m']:.3f} / {z['median_m']:.3f} / {z['q75_m']:.3f} m")
+        lines.append(f"Outliers (Z > {THRESHOLDS['z_max_m']} m or Z < {THRESHOLDS['z_min_m']} m): {z['outliers']}")
+        for timestamp, value in z.get('outlier_samples', []):
+            lines.append(f"  {timestamp}  z={value:.3f}")
+
+    integrity = report.get('integrity')
+    if integrity is not None:
+        rows = max(integrity['rows'], 1)
+        lines.append("\n=== INTEGRITY ===")
+        if 'unique_positions' in integrity:
+            lines.append(f"Unique positions (X,Y,Z): {integrity['unique_positions']:,} "
+                         f"({integrity['unique_positions'] / rows * 100:.1f}%)")
+        if 'unique_device_ts' in integrity:
+            lines.append(f"Unique device timestamps: {integrity['unique_device_ts']:,} "
+                         f"({integrity['unique_device_ts'] / rows * 100:.1f}%)")
+        lines.append(f"Frames with 0 movement: {integrity['stuck_frames']:,}")
+        for anchor_id, loss in integrity.get('anchor_loss', {}).items():
+            lines.append(f"  Anchor {anchor_id}: {loss['lost']:,} lost samples ({loss['loss_pct']:.1f}%)")
+
+    if report.get('checks'):
+        lines.append("\n=== CHECKS ===")
+        for check in report['checks']:
+            lines.append(f"[{'OK' if check['ok'] else 'WARNING'}] {check['message']}")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# === CLI ===
+# =============================================================================
+
+def latest_session(directory=None):
+    """Newest uwb_positions_*.csv in the directory (default: next to this script)"""
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    candidates = [path for path in glob.glob(os.path.join(directory, 'uwb_positions_*.csv'))
+                  if '_processed' not in os.path.basename(path)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def main(argv=None, sections=None, ground_truth=None, description=None):
+    """
+    Command line entry point (also used by the legacy per-metric scripts).
+
+    Args:
+        argv: Arguments (default: sys.argv)
+        sections: Default metric families (--only overrides them)
+        ground_truth: Default reference point (--gt overrides it)
+        description: Help text of the calling script
+    """
+    parser = argparse.ArgumentParser(description=description or 'Single-pass analysis of a UWB position file')
+    parser.add_argument('csv_file', nargs='?', default=None,
+                        help='Position file (default: newest uwb_positions_*.csv in uwb_data/)')
+    parser.add_argument('--gt', type=float, nargs='+', metavar='COORD', default=ground_truth,
+                        help='Ground truth X Y [Z] for the accuracy section')
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=sections,
+                        help='Metric families to compute (default: all)')
+    parser.add_argument('--tag', type=int, default=None, help='Analyse only this tag')
+    parser.add_argument('--start', default=None, help='Start of the time window (see movement_replay --start)')
+    parser.add_argument('--end', default=None, help='End of the time window')
+    parser.add_argument('--stream', action='store_true',
+                        help='Constant-memory pass over the file (streaming_stats; no unique-position '
+                             'and centroid metrics)')
+    parser.add_argument('--follow', action='store_true',
+                        help='Follow a capture in progress (default: the newest one) with rolling-window '
+                             'rate, jitter, precision and anchor loss every second')
+    parser.add_argument('--window', type=float, default=10.0, help='Seconds of the --follow window')
+    parser.add_argument('--json', metavar='PATH', default=None, help='Save the report as JSON')
+    parser.add_argument('--output', metavar='TXT', default=None, help='Save the text report')
+    args = parser.parse_args(argv)
+
+    if args.gt is not None and len(args.gt) not in (2, 3):
+        parser.error('--gt takes X Y or X Y Z')
+
+    if args.follow:
+        from live_analysis import follow
+        follow(args.csv_file, args.window, tag=args.tag)
+        return None
+
+    csv_file = args.csv_file or latest_session()
+    if csv_file is None or not os.path.isfile(csv_file):
+        print(f"Error: File '{csv_file}' not found" if csv_file else "No uwb_positions_*.csv found")
+        sys.exit(1)
+
+    try:
+        if args.stream:
+            from streaming_stats import stream_session
+            report: Dict[str, Any] = {'file': os.path.basename(csv_file)}
+            report.update(stream_session(csv_file, args.gt, args.tag, args.start, args.end).report())
+            # Every family is accumulated in the same pass: keep only the requested ones
+            for section in set(SECTIONS) - set(args.only or SECTIONS):
+                report.pop(section, None)
+            report['checks'] = evaluate_checks(report)
+        else:
+            report = analyze_session(csv_file, args.gt, args.only, args.tag, args.start, args.end)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if report['samples'] == 0:
+        print(f"No samples in {csv_file}")
+        sys.exit(1)
+
+    text = format_analysis_report(report)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"\nReport saved to: {args.output}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON report saved to: {args.json}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
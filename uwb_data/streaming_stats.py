@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Streaming, constant-memory statistics of UWB position files
+Reads a capture chunk by chunk (position_loader.iter_position_chunks) and
+folds every chunk into mergeable accumulators: Welford/Chan running
+moments for means, std, min/max and RMSE, and fixed-bin histograms for
+the quantiles (median interval, CEP50/CEP95). Memory depends on the chunk
+size and the histogram bins, not on the file size, and accumulators of
+different files or workers merge exactly (quantiles to the bin width).
+
+The report has the same layout as session_analysis, without the metrics
+that need the whole session at once (unique positions, errors from the
+centroid).
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict
+
+import numpy as np
+
+from position_loader import iter_position_chunks, read_header
+from session_analysis import ANALYSIS_COLUMNS, GAP_MS, THRESHOLDS, evaluate_checks, format_analysis_report
+
+INTERVAL_BIN_MS = 0.25      # Resolution of the median interval
+ERROR_BIN_M = 0.001         # Resolution of CEP50/CEP95 (1 mm)
+MAX_ERROR_M = 50.0          # Larger errors are counted in the overflow bin
+Z_RANGE_M = (-5.0, 10.0)    # Range of the Z histogram (quartiles)
+
+
+class RunningStats:
+    """
+    Count, mean, M2, min and max of a stream of values.
+
+    push() is Welford's O(1) update for one value; update() folds a whole
+    chunk with Chan's parallel formula (same result, vectorised); merge()
+    combines two accumulators exactly.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def push(self, value):
+        """Welford update with a single value"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values):
+        """Fold a chunk of values (NaN ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        self._combine(len(values), mean, float(np.sum((values - mean) ** 2)), values.min(), values.max())
+
+    def merge(self, other):
+        """Add the values of another accumulator (returns self)"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, count, mean, m2, min_value, max_value):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(min_value))
+        self.max = max(self.max, float(max_value))
+
+    def variance(self, ddof=1):
+        return self.m2 / (self.count - ddof) if self.count > ddof else 0.0
+
+    def std(self, ddof=1):
+        return float(np.sqrt(self.variance(ddof)))
+
+    def rms(self):
+        """Root mean square of the values (RMSE when the values are errors)"""
+        return float(np.sqrt(self.mean ** 2 + self.variance(ddof=0))) if self.count else 0.0
+
+
+class FixedHistogram:
+    """
+    Counts in fixed bins [lo, hi) plus underflow/overflow.
+
+    Quantiles are interpolated within a bin, so they are exact to the
+    bin width; histograms with the same bins merge by adding counts.
+    """
+
+    def __init__(self, lo, hi, bin_width):
+        self.lo = lo
+        self.hi = hi
+        self.bin_width = bin_width
+        self.counts = np.zeros(int(round((hi - lo) / bin_width)), dtype=np.int64)
+        self.under = 0
+        self.over = 0
+
+    def update(self, values):
+        """Count a chunk of values (NaN ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        bins = np.floor((values - self.lo) / self.bin_width)
+        inside = (bins >= 0) & (bins < len(self.counts))
+        self.under += int(np.count_nonzero(bins < 0))
+        self.over += int(np.count_nonzero(bins >= len(self.counts)))
+        self.counts += np.bincount(bins[inside].astype(np.intp), minlength=len(self.counts))
+
+    def merge(self, other):
+        """Add the counts of a histogram with the same bins (returns self)"""
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+        return self
+
+    def total(self):
+        return self.under + int(self.counts.sum()) + self.over
+
+    def quantile(self, q):
+        """Approximate q-quantile (None without values; lo/hi when it falls outside)"""
+        total = self.total()
+        if total == 0:
+            return None
+        target = q * total - self.under
+        if target <= 0:
+            return float(self.lo)
+        cumulative = np.cumsum(self.counts)
+        if target > cumulative[-1]:
+            return float(self.hi)
+        idx = int(np.searchsorted(cumulative, target))
+        before = cumulative[idx - 1] if idx else 0
+        fraction = (target - before) / self.counts[idx]
+        return float(self.lo + (idx + fraction) * self.bin_width)
+
+    def top_bins(self, n=5):
+        """Left edge and count of the n most populated bins"""
+        top = np.argsort(self.counts, kind='stable')[::-1][:n]
+        return [[float(self.lo + i * self.bin_width), int(self.counts[i])] for i in top if self.counts[i] > 0]
+
+
+class IntervalStats:
+    """Streaming version of session_analysis.interval_stats for one clock"""
+
+    def __init__(self):
+        self.intervals = 0
+        self.duplicates = 0
+        self.backwards = 0
+        self.gaps = 0
+        self.interval = RunningStats()
+        self.freq = RunningStats()
+        self.histogram = FixedHistogram(0.0, GAP_MS, INTERVAL_BIN_MS)
+
+    def update(self, dt_ms):
+        dt_ms = dt_ms[~np.isnan(dt_ms)]
+        valid = dt_ms[(dt_ms > 0) & (dt_ms < GAP_MS)]
+        self.intervals += len(dt_ms)
+        self.duplicates += int(np.count_nonzero(dt_ms == 0))
+        self.backwards += int(np.count_nonzero(dt_ms < 0))
+        self.gaps += int(np.count_nonzero(dt_ms >= GAP_MS))
+        self.interval.update(valid)
+        self.freq.update(1000.0 / valid)
+        self.histogram.update(valid)
+
+    def merge(self, other):
+        self.intervals += other.intervals
+        self.duplicates += other.duplicates
+        self.backwards += other.backwards
+        self.gaps += other.gaps
+        self.interval.merge(other.interval)
+        self.freq.merge(other.freq)
+        self.histogram.merge(other.histogram)
+        return self
+
+    def report(self):
+        stats: Dict[str, Any] = {'intervals': self.intervals, 'duplicates': self.duplicates,
+                                  'backwards': self.backwards, 'gaps': self.gaps}
+        if self.interval.count == 0:
+            return stats
+        median = self.histogram.quantile(0.5)
+        stats.update({
+            'rate_hz': 1000.0 / self.interval.mean,
+            'mean_interval_ms': self.interval.mean,
+            'median_interval_ms': median,
+            'jitter_ms': self.interval.std(),
+            'mean_freq_hz': self.freq.mean,
+            'median_freq_hz': 1000.0 / median if median else 0.0,  # Monotonic: median of 1/x = 1/median
+            'min_freq_hz': self.freq.min,
+            'max_freq_hz': self.freq.max,
+            'std_freq_hz': self.freq.std(),
+        })
+        return stats
+
+
+class ErrorStats:
+    """Streaming accuracy against a ground truth (bias, MAE, RMSE, CEP)"""
+
+    def __init__(self, ground_truth):
+        self.ground_truth = [float(v) for v in ground_truth]
+        self.axes = ['x', 'y', 'z'][:len(self.ground_truth)]
+        self.error = {axis: RunningStats() for axis in self.axes}
+        self.abs_error = {axis: RunningStats() for axis in self.axes}
+        self.names = ['2d', '3d'][:len(self.axes) - 1]
+        self.dist = {name: RunningStats() for name in self.names}
+        self.dist_histogram = {name: FixedHistogram(0.0, MAX_ERROR_M, ERROR_BIN_M) for name in self.names}
+
+    def update(self, positions):
+        errors = [positions[axis] - truth for axis, truth in zip(self.axes, self.ground_truth)]
+        for axis, err in zip(self.axes, errors):
+            self.error[axis].update(err)
+            self.abs_error[axis].update(np.abs(err))
+        for name, dims in zip(self.names, [2, 3]):
+            dist = np.sqrt(sum(err ** 2 for err in errors[:dims]))
+            self.dist[name].update(dist)
+            self.dist_histogram[name].update(dist)
+
+    def merge(self, other):
+        # A file without a z column only carries the x/y errors and the 2D distance
+        for axis in [axis for axis in self.axes if axis in other.error]:
+            self.error[axis].merge(other.error[axis])
+            self.abs_error[axis].merge(other.abs_error[axis])
+        for name in [name for name in self.names if name in other.dist]:
+            self.dist[name].merge(other.dist[name])
+            self.dist_histogram[name].merge(other.dist_histogram[name])
+        return self
+
+    def report(self):
+        metrics: Dict[str, Any] = {'ground_truth': self.ground_truth}
+        for axis in [axis for axis in self.axes if self.error[axis].count]:
+            metrics[f'bias_{axis}_m'] = self.error[axis].mean
+            metrics[f'mae_{axis}_m'] = self.abs_error[axis].mean
+            metrics[f'rmse_{axis}_m'] = self.error[axis].rms()
+        for name in [name for name in self.names if self.dist[name].count]:
+            dist = self.dist[name]
+            metrics[f'mean_err_{name}_m'] = dist.mean
+            metrics[f'min_err_{name}_m'] = dist.min
+            metrics[f'max_err_{name}_m'] = dist.max
+            metrics[f'rmse_{name}_m'] = dist.rms()
+            metrics[f'cep50_{name}_m'] = self.dist_histogram[name].quantile(0.5)
+            metrics[f'cep95_{name}_m'] = self.dist_histogram[name].quantile(0.95)
+        return metrics
+
+
+class SessionStats:
+    """
+    Mergeable accumulators of every streaming metric family.
+
+    update() takes chunks in file order; the last sample of every tag is
+    carried over so intervals and steps across chunk boundaries count.
+    merge() combines independent streams (other files, windows, workers).
+    """
+
+    def __init__(self, ground_truth=None):
+        self.rows = 0
+        self.host = IntervalStats()
+        self.device = None                  # Created when device timestamps are present
+        self.axes = {axis: RunningStats() for axis in ['x', 'y', 'z']}
+        self.accuracy = ErrorStats(ground_truth) if ground_truth is not None else None
+        self.z_histogram = FixedHistogram(Z_RANGE_M[0], Z_RANGE_M[1], ERROR_BIN_M)
+        self.z_outliers = 0
+        self.z_outlier_samples = []
+        self.stuck_frames = 0
+        self.anchor_lost = {}
+        self.tags = {}                      # tag: [samples, first_ms, last_ms, closed_span_s]
+        self.first_ms = None                # Time span of this stream
+        self.last_ms = None
+        self.closed_span_s = 0.0            # Durations of the merged streams
+        self._last = {}                     # tag: last (host_ms, device_ms, x, y) of this stream
+
+    # === CHUNKS ===
+
+    def update(self, chunk):
+        """Fold a chunk of positions (DataFrame with ANALYSIS_COLUMNS)"""
+        if len(chunk) == 0:
+            return
+        tag = chunk['tag_id'].to_numpy()
+        order = np.argsort(tag, kind='stable')
+        tag = tag[order]
+        host_ms = chunk['timestamp'].to_numpy().astype(np.int64)[order] / 1e6
+        x = chunk['x'].to_numpy(dtype=np.float64)[order]
+        y = chunk['y'].to_numpy(dtype=np.float64)[order]
+        z = chunk['z'].to_numpy(dtype=np.float64)[order] if 'z' in chunk else None  # None: old header
+        device_ms = None
+        if 'device_timestamp' in chunk:
+            device_ms = chunk['device_timestamp'].to_numpy()[order].astype(np.float64)
+            if self.device is None and (device_ms > 0).any():
+                self.device = IntervalStats()
+
+        # Groups of consecutive rows of the same tag
+        starts = np.flatnonzero(np.r_[True, tag[1:] != tag[:-1]])
+        ends = np.r_[starts[1:], len(tag)] - 1
+        group_tags = [int(t) for t in tag[starts]]
+
+        def previous(values, field):
+            # Previous sample of the same tag (carried over at group starts)
+            prev = np.empty(len(values))
+            prev[1:] = values[:-1]
+            prev[starts] = [self._last[t][field] if t in self._last else np.nan for t in group_tags]
+            return prev
+
+        self.rows += len(tag)
+        self.first_ms = host_ms.min() if self.first_ms is None else min(self.first_ms, host_ms.min())
+        self.last_ms = host_ms.max() if self.last_ms is None else max(self.last_ms, host_ms.max())
+        self.host.update(host_ms - previous(host_ms, 0))
+        if self.device is not None and device_ms is not None:
+            self.device.update(device_ms - previous(device_ms, 1))
+        steps = np.hypot(x - previous(x, 2), y - previous(y, 3))
+        self.stuck_frames += int(np.count_nonzero(steps == 0))
+
+        for t, start, end in zip(group_tags, starts, ends):
+            self._last[t] = (host_ms[end], device_ms[end] if device_ms is not None else np.nan, x[end], y[end])
+            stats = self.tags.setdefault(t, [0, host_ms[start], host_ms[end], 0.0])
+            stats[0] += int(end - start + 1)
+            stats[1] = min(stats[1], host_ms[start])
+            stats[2] = max(stats[2], host_ms[end])
+
+        positions = {'x': x, 'y': y} if z is None else {'x': x, 'y': y, 'z': z}
+        for axis, values in positions.items():
+            self.axes[axis].update(values)
+        if self.accuracy is not None:
+            self.accuracy.update(positions)
+
+        if z is not None:
+            self.update_z(z, chunk['timestamp'].to_numpy()[order])
+
+        for col in chunk.columns:
+            if col.startswith('anchor_') and col.endswith('_dist'):
+                anchor_id = col[len('anchor_'):-len('_dist')]
+                self.anchor_lost[anchor_id] = self.anchor_lost.get(anchor_id, 0) + int((chunk[col] == 0).sum())
+
+    def update_z(self, z, timestamps):
+        """Z distribution and out-of-range samples of a chunk (files with a z column)"""
+        self.z_histogram.update(z)
+        outliers = np.flatnonzero((z > THRESHOLDS['z_max_m']) | (z < THRESHOLDS['z_min_m']))
+        self.z_outliers += len(outliers)
+        if len(self.z_outlier_samples) < 5 and len(outliers):
+            timestamps = timestamps.astype('datetime64[ms]')
+            for i in outliers[:5 - len(self.z_outlier_samples)]:
+                self.z_outlier_samples.append([str(timestamps[i]), float(z[i])])
+
+    def merge(self, other):
+        """Add an independent stream (another file or worker), returns self"""
+        self.rows += other.rows
+        self.closed_span_s += other.duration_s()
+        self.host.merge(other.host)
+        if other.device is not None:
+            self.device = (self.device or IntervalStats()).merge(other.device)
+        for axis in self.axes:
+            self.axes[axis].merge(other.axes[axis])
+        if self.accuracy is not None and other.accuracy is not None:
+            self.accuracy.merge(other.accuracy)
+        self.z_histogram.merge(other.z_histogram)
+        self.z_outliers += other.z_outliers
+        self.z_outlier_samples = (self.z_outlier_samples + other.z_outlier_samples)[:5]
+        self.stuck_frames += other.stuck_frames
+        for anchor_id, lost in other.anchor_lost.items():
+            self.anchor_lost[anchor_id] = self.anchor_lost.get(anchor_id, 0) + lost
+        for t, (samples, first_ms, last_ms, span_s) in other.tags.items():
+            # Spans of separate streams add up (no time between them)
+            stats = self.tags.setdefault(t, [0, first_ms, first_ms, 0.0])
+            stats[0] += samples
+            stats[3] += span_s + (last_ms - first_ms) / 1000.0
+        return self
+
+    # === REPORT ===
+
+    def duration_s(self):
+        """Time covered by this stream plus the durations of the merged ones"""
+        if self.first_ms is None or self.last_ms is None:
+            return self.closed_span_s
+        return self.closed_span_s + (self.last_ms - self.first_ms) / 1000.0
+
+    def z_report(self):
+        """Z section of the report (quartiles from the histogram)"""
+        z = self.axes['z']
+        q25, q50, q75 = [self.z_histogram.quantile(q) for q in (0.25, 0.5, 0.75)]
+        metrics: Dict[str, Any] = {
+            'mean_m': z.mean, 'std_m': z.std(), 'min_m': z.min, 'max_m': z.max, 'range_m': z.max - z.min,
+            'q25_m': q25, 'median_m': q50, 'q75_m': q75,
+            'outliers': self.z_outliers,
+        }
+        if self.z_outlier_samples:
+            metrics['outlier_samples'] = self.z_outlier_samples
+        return metrics
+
+    def report(self):
+        """Analysis report with the layout of session_analysis.analyze_positions"""
+        report: Dict[str, Any] = {'samples': self.rows, 'tags': len(self.tags), 'duration_s': self.duration_s(),
+                                  'streaming': True}
+        if self.rows == 0:
+            return report
+
+        frequency: Dict[str, Any] = {'host': self.host.report()}
+        if self.device is not None:
+            frequency['device'] = self.device.report()
+            frequency['device_interval_counts'] = self.device.histogram.top_bins()
+        frequency['tags'] = {}
+        for t, (samples, first_ms, last_ms, span_s) in sorted(self.tags.items()):
+            span = span_s + (last_ms - first_ms) / 1000.0
+            frequency['tags'][str(t)] = {'samples': samples, 'rate_hz': (samples - 1) / span if span > 0 else 0.0}
+        report['frequency'] = frequency
+
+        precision: Dict[str, Any] = {}
+        for axis, stats in self.axes.items():
+            if stats.count == 0:
+                continue  # No z column in any file
+            precision[f'mean_{axis}'] = stats.mean
+            precision[f'std_{axis}'] = stats.std()
+        report['precision'] = precision
+
+        if self.accuracy is not None:
+            report['accuracy'] = self.accuracy.report()
+
+        z = self.axes['z']
+        if z.count == 0:
+            report['z_column'] = False
+        else:
+            report['z'] = self.z_report()
+
+        integrity: Dict[str, Any] = {'rows': self.rows, 'stuck_frames': self.stuck_frames}
+        if self.device is not None:
+            # Device timestamps increase per tag: repeats are consecutive duplicates
+            integrity['unique_device_ts'] = self.rows - self.device.duplicates
+        if self.anchor_lost:
+            integrity['anchor_loss'] = {anchor_id: {'lost': lost, 'loss_pct': lost / self.rows * 100}
+                                        for anchor_id, lost in sorted(self.anchor_lost.items())}
+        report['integrity'] = integrity
+        report['checks'] = evaluate_checks(report)
+        return report
+
+
+def stream_session(csv_file, ground_truth=None, tag=None, start=None, end=None, chunk_rows=250_000):
+    """
+    Accumulate a position file chunk by chunk.
+
+    Args:
+        csv_file: Path to a uwb_positions_*.csv file
+        ground_truth: Optional (x, y) or (x, y, z) for the accuracy section
+        tag: Only this tag (default: all tags)
+        start, end: Optional time window (see position_loader.load_positions)
+        chunk_rows: Rows per chunk (bounds the memory)
+
+    Returns:
+        SessionStats of the file
+    """
+    header = read_header(csv_file)
+    columns = [col for col in ANALYSIS_COLUMNS if col not in ('z', 'device_timestamp') or col in header]
+    if 'z' not in header and ground_truth is not None:
+        ground_truth = ground_truth[:2]  # 2D accuracy only without a z column
+    columns += [col for col in header if col.startswith('anchor_') and col.endswith('_dist')]
+
+    stats = SessionStats(ground_truth)
+    for chunk in iter_position_chunks(csv_file, columns, np.float64, chunk_rows, start, end):
+        if tag is not None:
+            chunk = chunk[chunk['tag_id'] == tag]
+        stats.update(chunk)
+    return stats
+
+
+def stream_file(csv_file, ground_truth=None, chunk_rows=250_000):
+    """Worker: SessionStats of one file (None and a message on error)"""
+    try:
+        return stream_session(csv_file, ground_truth, chunk_rows=chunk_rows)
+    except Exception as e:
+        print(f"Error processing {csv_file}: {e}")
+        return None
+
+
+def stream_files(files, ground_truth=None, workers=None, chunk_rows=250_000):
+    """
+    Merged statistics of several files, one worker process per file.
+
+    Returns:
+        (merged SessionStats, number of files that could be read)
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(stream_file, files, [ground_truth] * len(files),
+                                        [chunk_rows] * len(files)))
+    else:
+        results = [stream_file(csv_file, ground_truth, chunk_rows) for csv_file in files]
+
+    merged = SessionStats(ground_truth)
+    read = 0
+    for stats in results:
+        if stats is not None:
+            merged.merge(stats)
+            read += 1
+    return merged, read
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Constant-memory statistics of one or more UWB position files')
+    parser.add_argument('files', nargs='+', help='Position files (merged into one report)')
+    parser.add_argument('--gt', type=float, nargs='+', metavar='COORD', default=None,
+                        help='Ground truth X Y [Z] for the accuracy section')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--chunk-rows', type=int, default=250_000, help='Rows per chunk (bounds the memory)')
+    parser.add_argument('--json', metavar='PATH', default=None, help='Save the report as JSON')
+    args = parser.parse_args()
+    if args.gt is not None and len(args.gt) not in (2, 3):
+        parser.error('--gt takes X Y or X Y Z')
+
+    stats, read = stream_files(args.files, args.gt, args.workers, args.chunk_rows)
+    if read == 0:
+        sys.exit(1)
+    report = stats.report()
+    report['file'] = os.path.basename(args.files[0]) if len(args.files) == 1 else f"{read} files"
+    print(format_analysis_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON report saved to: {args.json}")
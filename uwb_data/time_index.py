@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Time index for UWB position files (uwb_positions_*.csv)
+A sidecar file (uwb_positions_xxx.tidx) maps time to byte offset: one
+entry per block of rows with its offset, size and time range. Loaders use
+it to seek straight to the blocks that overlap a time window and read only
+those bytes. The collector writes the index while it appends rows; for
+other files it is built on first use and extended when the CSV has grown.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+INDEX_SUFFIX = '.tidx'
+INDEX_VERSION = 1
+BLOCK_ROWS = 2048           # Rows per entry (~150 KB of CSV, the seek granularity)
+TIMESTAMP_WIDTH = 23        # 'YYYY-mm-dd HH:MM:SS.fff' as written by the collector
+INDEX_COLUMNS = ['offset', 'bytes', 'rows', 'min_ms', 'max_ms']
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def index_path(csv_file):
+    """Sidecar index file of a position file"""
+    return os.path.splitext(csv_file)[0] + INDEX_SUFFIX
+
+
+def timestamp_ms(dt):
+    """Milliseconds since the epoch of a naive collector datetime"""
+    return (dt - _EPOCH) // timedelta(milliseconds=1)
+
+
+def parse_row_times(buffer, row_starts):
+    """
+    Timestamps of the rows starting at the given offsets of a bytes buffer.
+
+    Returns:
+        int64 array of milliseconds since the epoch
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if len(row_starts) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Fast path: fixed-width timestamps followed by a comma (collector format)
+    ends = row_starts + TIMESTAMP_WIDTH
+    if ends[-1] < len(data) and (data[ends] == ord(',')).all():
+        fields = np.ascontiguousarray(data[row_starts[:, np.newaxis] + np.arange(TIMESTAMP_WIDTH)])
+        return fields.view(f'S{TIMESTAMP_WIDTH}').ravel().astype('datetime64[ms]').astype(np.int64)
+
+    import pandas as pd
+    values = [buffer[start:buffer.index(b',', start)].decode('utf-8') for start in row_starts.tolist()]
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+
+
+def _make_blocks(starts, ends, times, block_rows):
+    """Index entries for rows grouped in consecutive blocks of block_rows"""
+    groups = np.arange(0, len(starts), block_rows)
+    last = np.minimum(groups + block_rows, len(starts)) - 1
+    blocks = np.empty((len(groups), len(INDEX_COLUMNS)), dtype=np.int64)
+    blocks[:, 0] = starts[groups]
+    blocks[:, 1] = ends[last] - starts[groups]
+    blocks[:, 2] = last - groups + 1
+    blocks[:, 3] = np.minimum.reduceat(times, groups)
+    blocks[:, 4] = np.maximum.reduceat(times, groups)
+    return blocks
+
+
+def scan_blocks(csv_file, offset, block_rows=BLOCK_ROWS, chunk_bytes=8 << 20):
+    """
+    Index entries of the complete rows from a byte offset to the end of file.
+
+    A trailing line without newline (still being written) is left out.
+
+    Returns:
+        (N, 5) int64 array with INDEX_COLUMNS
+    """
+    empty = np.empty(0, dtype=np.int64)
+    pending = (empty, empty, empty)     # Rows not yet in a full block
+    blocks = []
+
+    with open(csv_file, 'rb') as f:
+        f.seek(offset)
+        base = offset
+        carry = b''
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            buffer = carry + chunk
+            complete_end = buffer.rfind(b'\n') + 1
+            carry = buffer[complete_end:]
+            if complete_end == 0:
+                continue
+            buffer = buffer[:complete_end]
+
+            newlines = np.flatnonzero(np.frombuffer(buffer, dtype=np.uint8) == ord('\n'))
+            starts = np.concatenate(([0], newlines[:-1] + 1))
+            ends = newlines + 1
+            rows = np.flatnonzero(ends - starts > 1)   # Skip blank lines
+            starts, ends = starts[rows], ends[rows]
+            times = parse_row_times(buffer, starts)
+
+            pending = tuple(np.concatenate((old, new)) for old, new in
+                            zip(pending, (starts + base, ends + base, times)))
+            full = len(pending[0]) // block_rows * block_rows
+            if full:
+                pending_starts, pending_ends, pending_times = pending
+                blocks.append(_make_blocks(pending_starts[:full], pending_ends[:full], pending_times[:full],
+                                           block_rows))
+                pending = (pending_starts[full:], pending_ends[full:], pending_times[full:])
+            base += complete_end
+
+    pending_starts, pending_ends, pending_times = pending
+    if len(pending_starts):
+        blocks.append(_make_blocks(pending_starts, pending_ends, pending_times, block_rows))
+    if not blocks:
+        return np.empty((0, len(INDEX_COLUMNS)), dtype=np.int64)
+    return np.concatenate(blocks)
+
+
+def _data_start(csv_file):
+    """Byte offset of the first data row (after the header line)"""
+    with open(csv_file, 'rb') as f:
+        return len(f.readline())
+
+
+def parse_time_bound(value, session_start_ms):
+    """
+    Absolute time (ms since the epoch) of a --start/--end value.
+
+    Accepted forms: seconds from the session start ('90', 90.5),
+    'MM:SS' or 'HH:MM:SS' from the session start, or an absolute
+    'YYYY-mm-dd HH:MM:SS[.fff]' timestamp.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return session_start_ms + int(round(float(value) * 1000))
+
+    text = str(value).strip()
+    if '-' in text[1:]:
+        return int(np.datetime64(text, 'ms').astype(np.int64))
+
+    seconds = 0.0
+    try:
+        for part in text.split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}': use seconds, MM:SS, HH:MM:SS or 'YYYY-mm-dd HH:MM:SS'")
+    return session_start_ms + int(round(seconds * 1000))
+
+
+class TimeIndex:
+    """
+    Block index of a position file.
+
+    blocks holds one row per block of consecutive CSV rows (INDEX_COLUMNS);
+    timestamps only need to be roughly ordered: every block overlapping a
+    window is read and the rows are filtered exactly afterwards.
+    """
+
+    def __init__(self, blocks, data_start, block_rows=BLOCK_ROWS):
+        """
+        Args:
+            blocks: (N, 5) int64 array with INDEX_COLUMNS
+            data_start: Byte offset of the first data row
+            block_rows: Rows per block
+        """
+        self.blocks = np.asarray(blocks, dtype=np.int64).reshape(-1, len(INDEX_COLUMNS))
+        self.data_start = data_start
+        self.block_rows = block_rows
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @property
+    def end(self):
+        """Byte offset just after the last indexed row"""
+        if len(self.blocks) == 0:
+            return self.data_start
+        return int(self.blocks[-1, 0] + self.blocks[-1, 1])
+
+    @property
+    def rows(self):
+        return int(self.blocks[:, 2].sum())
+
+    def start_ms(self):
+        """Earliest timestamp of the session (ms since the epoch)"""
+        return int(self.blocks[:, 3].min()) if len(self.blocks) else None
+
+    def end_ms(self):
+        """Latest timestamp of the session (ms since the epoch)"""
+        return int(self.blocks[:, 4].max()) if len(self.blocks) else None
+
+    @classmethod
+    def build(cls, csv_file, block_rows=BLOCK_ROWS):
+        """Index a whole file"""
+        data_start = _data_start(csv_file)
+        return cls(scan_blocks(csv_file, data_start, block_rows), data_start, block_rows)
+
+    def extend(self, csv_file):
+        """Index the rows appended since the last scan (the last partial block is redone)"""
+        blocks = self.blocks
+        if len(blocks) and blocks[-1, 2] < self.block_rows:
+            blocks = blocks[:-1]
+        offset = int(blocks[-1, 0] + blocks[-1, 1]) if len(blocks) else self.data_start
+        self.blocks = np.concatenate((blocks, scan_blocks(csv_file, offset, self.block_rows)))
+
+    @classmethod
+    def load(cls, path):
+        """Read a sidecar index, None if missing or of another version"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                header = f.readline().split()
+                fields = dict(item.split('=', 1) for item in header if '=' in item)
+                if header[:3] != ['#', 'uwb-time-index', f'v{INDEX_VERSION}']:
+                    return None
+                f.readline()  # Column names
+                blocks = np.array([line.split(',') for line in f.read().split()], dtype=np.int64)
+            return cls(blocks, int(fields['data_start']), int(fields['block_rows']))
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+
+    def save(self, path):
+        """Write the sidecar atomically, returns the path or None"""
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(index_header(self.data_start, self.block_rows))
+                np.savetxt(f, self.blocks, fmt='%d', delimiter=',')
+            os.replace(tmp_path, path)
+            return path
+        except OSError:
+            return None
+
+    def is_valid_for(self, csv_file, size):
+        """Cheap staleness check: indexed bytes exist and the last block starts where expected"""
+        if self.end > size or self.data_start != _data_start(csv_file):
+            return False
+        if len(self.blocks) == 0:
+            return True
+        offset, _, _, min_ms, max_ms = (int(v) for v in self.blocks[-1])
+        with open(csv_file, 'rb') as f:
+            f.seek(offset)
+            line = f.readline()
+        try:
+            row_ms = parse_row_times(line, np.array([0]))[0]
+        except (ValueError, TypeError):
+            return False
+        return min_ms <= row_ms <= max_ms
+
+    @classmethod
+    def for_file(cls, csv_file, save=True):
+        """
+        Up-to-date index of a position file.
+
+        Reuses the sidecar when it is still valid, extends it when the CSV
+        has grown and rebuilds it otherwise (saving the result if it changed,
+        except while the collector may still be appending to the sidecar).
+        """
+        path = index_path(csv_file)
+        size = os.path.getsize(csv_file)
+        index = cls.load(path)
+
+        if index is not None and index.is_valid_for(csv_file, size):
+            if index.end == size:
+                return index
+            # Rows past the last entry and a CSV newer than the sidecar: the
+            # collector may still be writing it (TimeIndexWriter keeps it open),
+            # and replacing it would send the writer's next entries to an
+            # unlinked file. Extend in memory only.
+            if os.path.getmtime(csv_file) >= os.path.getmtime(path):
+                save = False
+            index.extend(csv_file)
+        else:
+            index = cls.build(csv_file)
+
+        if save:
+            index.save(path)
+        return index
+
+    def resolve_window(self, start=None, end=None):
+        """Absolute (start_ms, end_ms) of a window given as --start/--end values"""
+        session_start = self.start_ms() or 0
+        start_ms = parse_time_bound(start, session_start)
+        end_ms = parse_time_bound(end, session_start)
+        return (start_ms if start_ms is not None else session_start,
+                end_ms if end_ms is not None else (self.end_ms() or 0))
+
+    def byte_range(self, start_ms, end_ms):
+        """
+        Bytes holding every row with start_ms <= timestamp <= end_ms.
+
+        Returns:
+            (offset, length, rows) of the contiguous block span, or None if
+            no block overlaps the window
+        """
+        overlapping = np.flatnonzero((self.blocks[:, 4] >= start_ms) & (self.blocks[:, 3] <= end_ms))
+        if len(overlapping) == 0:
+            return None
+        first, last = overlapping[0], overlapping[-1]
+        offset = int(self.blocks[first, 0])
+        length = int(self.blocks[last, 0] + self.blocks[last, 1]) - offset
+        return offset, length, int(self.blocks[first:last + 1, 2].sum())
+
+
+def index_header(data_start, block_rows=BLOCK_ROWS):
+    """First two lines of a sidecar index"""
+    return (f"# uwb-time-index v{INDEX_VERSION} data_start={data_start} block_rows={block_rows}\n"
+            f"{','.join(INDEX_COLUMNS)}\n")
+
+
+class TimeIndexWriter:
+    """
+    Writes the sidecar index while rows are appended to a position file.
+
+    The caller reports every row it writes (timestamp and encoded size);
+    an entry is appended each time a block of rows is complete.
+    """
+
+    def __init__(self, csv_file, data_start, block_rows=BLOCK_ROWS):
+        """
+        Args:
+            csv_file: Position file being written
+            data_start: Size of the header already written
+            block_rows: Rows per index entry
+        """
+        self.path = index_path(csv_file)
+        self.block_rows = block_rows
+        self.offset = data_start
+        self._block = None
+        self.handle = open(self.path, 'w', encoding='utf-8', buffering=1)
+        self.handle.write(index_header(data_start, block_rows))
+
+    def add_row(self, row_ms, size):
+        """Account for one written row (timestamp in ms, size in bytes)"""
+        if self._block is None:
+            self._block = [self.offset, 0, 0, row_ms, row_ms]
+        block = self._block
+        block[1] += size
+        block[2] += 1
+        block[3] = min(block[3], row_ms)
+        block[4] = max(block[4], row_ms)
+        self.offset += size
+        if block[2] == self.block_rows:
+            self._write_block()
+
+    def _write_block(self):
+        if self.handle is None or self._block is None:
+            return  # Closed
+        self.handle.write(','.join(str(v) for v in self._block) + '\n')
+        self._block = None
+
+    def close(self):
+        """Write the last partial block and close the index"""
+        if self.handle is None:
+            return
+        if self._block is not None:
+            self._write_block()
+        self.handle.close()
+        self.handle = None
@@ -1,38 +1,131 @@
+"""
+Precision and accuracy of UWB positions against surveyed reference points
+Single point: validate_precision.py FILE X Y [--z Z]
+Survey: validate_precision.py --survey survey.csv, with one row per reference
+point (a session file, optionally a time window of it, and its ground truth):
+
+    point,file,x,y,z,start,end
+    P1,uwb_positions_20251125_120726.csv,2.25,3.50,,,
+    P2,uwb_positions_20251125_120726.csv,5.00,3.20,,60,120
+
+Points are evaluated in parallel (one worker per point, only the bytes of
+the window are read) with the vectorised metrics of session_analysis.
+Samples are plotted as 2D histograms, so the plots cost the same for any
+number of samples, and all points are combined into one accuracy map of
+the court.
+"""
+
 import pandas as pd
 import numpy as np
 import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict
 import matplotlib.pyplot as plt
+from matplotlib.colors import Normalize
+from matplotlib.patches import Circle
+
+from position_loader import load_positions, read_header
+from session_analysis import accuracy_metrics
+from time_index import TimeIndex
+
+# Indoor court (10.60 x 6.40 m) and anchors, as drawn by the replay
+COURT_BOUNDS = (0.0, 10.6, 0.0, 6.4)
+ANCHORS = {'A1': (0.0, 0.0), 'A2': (0.0, 6.40), 'A3': (4.7, 6.40),
+           'A4': (10.6, 6.40), 'A5': (10.6, 0.0), 'A6': (5.50, 0.0)}
+
+DENSITY_BINS = 60           # Cells per side of the per-point density plots
+COURT_CELL_M = 0.05         # Cell of the court-wide sample density
+MIN_DENSITY_HALF_WIDTH_M = 0.25
+
+
+def density_histogram(x, y, center, half_width, bins=DENSITY_BINS):
+    """
+    Sample counts on a square grid around a point.
+
+    Returns:
+        (counts[bins, bins] indexed [x, y], extent (x0, x1, y0, y1))
+    """
+    extent = (center[0] - half_width, center[0] + half_width,
+              center[1] - half_width, center[1] + half_width)
+    counts, _, _ = np.histogram2d(x, y, bins=bins, range=[extent[:2], extent[2:]])
+    return counts, extent
+
+
+def density_window(metrics, ground_truth):
+    """Center and half width of a density plot showing both the ground truth and the samples"""
+    gx, gy = ground_truth[:2]
+    center = ((gx + metrics['mean_x']) / 2, (gy + metrics['mean_y']) / 2)
+    half_width = (np.hypot(metrics['mean_x'] - gx, metrics['mean_y'] - gy) / 2 +
+                  3 * max(metrics['std_x'], metrics['std_y']))
+    return center, max(half_width, MIN_DENSITY_HALF_WIDTH_M)
+
+
+def court_histogram(x, y):
+    """Sample counts over the court (mergeable across points by summing)"""
+    x0, x1, y0, y1 = COURT_BOUNDS
+    bins = [int(round((x1 - x0) / COURT_CELL_M)), int(round((y1 - y0) / COURT_CELL_M))]
+    counts, _, _ = np.histogram2d(x, y, bins=bins, range=[[x0, x1], [y0, y1]])
+    return counts
+
+
+def draw_density(ax, counts, extent, cmap='viridis'):
+    """Draw a histogram as an image (empty cells transparent)"""
+    return ax.imshow(np.ma.masked_equal(counts.T, 0), origin='lower', extent=extent,
+                     cmap=cmap, interpolation='nearest', aspect='equal')
+
+
+def point_metrics(x, y, z, ground_truth):
+    """
+    Precision and accuracy of the samples of one reference point.
+
+    Args:
+        x, y, z: Position arrays (z None if the file has no z column)
+        ground_truth: (x, y) or (x, y, z)
+
+    Returns:
+        Dict with samples, mean/std per axis and session_analysis.accuracy_metrics
+    """
+    axes = [('x', x), ('y', y)] + ([('z', z)] if z is not None else [])
+    metrics: Dict[str, Any] = {'samples': int(len(x))}
+    for axis, values in axes:
+        metrics[f'mean_{axis}'] = float(values.mean())
+        metrics[f'std_{axis}'] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+    metrics.update(accuracy_metrics(x, y, z, ground_truth))
+    return metrics
+
+
+def load_point_samples(csv_file, start=None, end=None):
+    """x, y and z (None for files without z) of a session or a window of it"""
+    has_z = 'z' in read_header(csv_file)
+    df = load_positions(csv_file, columns=['x', 'y'] + (['z'] if has_z else []),
+                        float_dtype=np.float64, start=start, end=end)
+    return df['x'].to_numpy(), df['y'].to_numpy(), df['z'].to_numpy() if has_z else None
+
 
 def validate_precision(csv_file, true_x, true_y, true_z=None):
     print(f"\n=== UWB PRECISION VALIDATION ===")
     print(f"File: {os.path.basename(csv_file)}")
     print(f"Ground Truth: ({true_x}, {true_y}" + (f", {true_z})" if true_z is not None else ")"))
-    
+
     try:
-        df = pd.read_csv(csv_file)
-        
-        if df.empty:
+        x, y, z = load_point_samples(csv_file)
+
+        if len(x) == 0:
             print("Error: CSV is empty")
             return
 
-        # Calculate statistics
-        mean_x = df['x'].mean()
-        mean_y = df['y'].mean()
-        std_x = df['x'].std()
-        std_y = df['y'].std()
-        
-        # Errors
-        df['error_x'] = df['x'] - true_x
-        df['error_y'] = df['y'] - true_y
-        
-        if true_z is not None and 'z' in df.columns:
-            mean_z = df['z'].mean()
-            std_z = df['z'].std()
-            df['error_z'] = df['z'] - true_z
-            df['dist_error'] = np.sqrt(df['error_x']**2 + df['error_y']**2 + df['error_z']**2)
+        use_z = true_z is not None and z is not None
+        ground_truth = (true_x, true_y, true_z) if use_z else (true_x, true_y)
+        metrics = point_metrics(x, y, z if use_z else None, ground_truth)
+        mean_x, mean_y = metrics['mean_x'], metrics['mean_y']
+        std_x, std_y = metrics['std_x'], metrics['std_y']
+
+        if use_z:
+            mean_z, std_z = metrics['mean_z'], metrics['std_z']
             print("-" * 40)
-            print(f"SAMPLES:       {len(df)}")
+            print(f"SAMPLES:       {metrics['samples']}")
             print(f"MEAN POS:      ({mean_x:.3f}, {mean_y:.3f}, {mean_z:.3f})")
             print(f"OFFSET:        ({mean_x - true_x:.3f}, {mean_y - true_y:.3f}, {mean_z - true_z:.3f})")
             print("-" * 40)
@@ -41,59 +134,282 @@ def validate_precision(csv_file, true_x, true_y, true_z=None):
             print(f"  Y: {std_y:.3f} m")
             print(f"  Z: {std_z:.3f} m")
         else:
-            df['dist_error'] = np.sqrt(df['error_x']**2 + df['error_y']**2)
             print("-" * 40)
-            print(f"SAMPLES:       {len(df)}")
+            print(f"SAMPLES:       {metrics['samples']}")
             print(f"MEAN POS:      ({mean_x:.3f}, {mean_y:.3f})")
             print(f"OFFSET:        ({mean_x - true_x:.3f}, {mean_y - true_y:.3f})")
             print("-" * 40)
             print(f"PRECISION (Std Dev):")
             print(f"  X: {std_x:.3f} m")
             print(f"  Y: {std_y:.3f} m")
-        
-        mean_error = df['dist_error'].mean()
-        rmse = np.sqrt((df['dist_error']**2).mean())
-        cep95 = np.percentile(df['dist_error'], 95)
-        
+
+        dims = '3d' if use_z else '2d'
+        mean_error = metrics[f'mean_err_{dims}_m']
+        rmse = metrics[f'rmse_{dims}_m']
+        cep95 = metrics[f'cep95_{dims}_m']
+
         print("-" * 40)
-        print(f"ACCURACY (3D)" if true_z is not None else f"ACCURACY (2D)")
+        print(f"ACCURACY ({dims.upper()})")
         print(f"  Mean Error:  {mean_error:.3f} m")
         print(f"  RMSE:        {rmse:.3f} m")
         print(f"  CEP 95%:     {cep95:.3f} m")
         print("-" * 40)
-        
-        # Plot
-        plt.figure(figsize=(10, 8))
-        plt.scatter(df['x'], df['y'], alpha=0.5, label='Measurements', s=10)
-        plt.scatter(true_x, true_y, color='red', marker='x', s=100, label='Ground Truth', linewidths=3)
-        plt.scatter(mean_x, mean_y, color='green', marker='+', s=100, label='Mean Position', linewidths=3)
-        
+
+        # Plot: sample density instead of one marker per sample
+        counts, extent = density_histogram(x, y, *density_window(metrics, ground_truth))
+        fig, ax = plt.subplots(figsize=(10, 8))
+        image = draw_density(ax, counts, extent)
+        fig.colorbar(image, ax=ax, label='Samples per cell')
+        ax.scatter(true_x, true_y, color='red', marker='x', s=100, label='Ground Truth', linewidths=3)
+        ax.scatter(mean_x, mean_y, color='green', marker='+', s=100, label='Mean Position', linewidths=3)
+
         # Draw circle for CEP95 (2D projection)
-        circle = plt.Circle((true_x, true_y), cep95, color='red', fill=False, linestyle='--', label=f'CEP95 ({cep95:.2f}m)')
-        plt.gca().add_patch(circle)
-        
-        plt.axis('equal')
-        plt.grid(True)
-        plt.legend()
-        plt.title(f"UWB Validation\nRMSE: {rmse:.3f}m | StdDev: ({std_x:.3f}, {std_y:.3f})")
-        plt.xlabel("X (m)")
-        plt.ylabel("Y (m)")
-        
+        circle = Circle((true_x, true_y), cep95, color='red', fill=False, linestyle='--', label=f'CEP95 ({cep95:.2f}m)')
+        ax.add_patch(circle)
+
+        ax.grid(True)
+        ax.legend()
+        ax.set_title(f"UWB Validation\nRMSE: {rmse:.3f}m | StdDev: ({std_x:.3f}, {std_y:.3f})")
+        ax.set_xlabel("X (m)")
+        ax.set_ylabel("Y (m)")
+
         output_plot = csv_file.replace('.csv', '_validation.png')
-        plt.savefig(output_plot)
+        fig.savefig(output_plot)
+        plt.close(fig)
         print(f"Plot saved to: {output_plot}")
         # plt.show() # Uncomment if running locally with display
 
     except Exception as e:
         print(f"Error: {e}")
 
+
+# =============================================================================
+# === SURVEY (several reference points in one run) ===
+# =============================================================================
+
+def read_survey_manifest(manifest_file):
+    """
+    Reference points of a survey manifest.
+
+    Args:
+        manifest_file: CSV with columns file, x, y and optionally point, z,
+                       start, end (relative files are resolved against the
+                       manifest directory)
+
+    Returns:
+        List of dicts: point, file, ground_truth, start, end
+    """
+    manifest = pd.read_csv(manifest_file, dtype=str, keep_default_na=False, skipinitialspace=True)
+    missing = [col for col in ['file', 'x', 'y'] if col not in manifest.columns]
+    if missing:
+        raise ValueError(f"Survey manifest without columns: {missing}")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    points = []
+    for i, row in enumerate(manifest.to_dict('records')):
+        ground_truth = [float(row['x']), float(row['y'])]
+        if row.get('z', ''):
+            ground_truth.append(float(row['z']))
+        points.append({
+            'point': row.get('point', '') or f'P{i + 1}',
+            'file': os.path.join(base_dir, row['file']),
+            'ground_truth': ground_truth,
+            'start': row.get('start', '') or None,
+            'end': row.get('end', '') or None,
+        })
+    return points
+
+
+def survey_point(point):
+    """Worker: metrics and histograms of one reference point (no samples returned)"""
+    result = {'point': point['point'], 'file': os.path.basename(point['file']),
+              'ground_truth': point['ground_truth']}
+    try:
+        x, y, z = load_point_samples(point['file'], point['start'], point['end'])
+        if len(x) == 0:
+            result['error'] = 'no samples in the window'
+            return result
+
+        ground_truth = point['ground_truth']
+        if len(ground_truth) > 2 and z is None:
+            ground_truth = ground_truth[:2]  # File without z: 2D only
+        result.update(point_metrics(x, y, z if len(ground_truth) > 2 else None, ground_truth))
+
+        result['density'], result['density_extent'] = density_histogram(x, y, *density_window(result, ground_truth))
+        result['court_density'] = court_histogram(x, y)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def survey_row(result):
+    """Flat row of the survey table"""
+    row = {'point': result['point'], 'file': result['file']}
+    for axis, value in zip(['gt_x', 'gt_y', 'gt_z'], result['ground_truth']):
+        row[axis] = value
+    for key, value in result.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            row[key] = value
+    row['error'] = result.get('error', '')
+    return row
+
+
+def plot_court_map(results, output_plot):
+    """
+    Combined accuracy map: density of every survey sample over the court,
+    and per point the ground truth, the bias to the mean position and the
+    CEP95 circle, coloured by 2D RMSE.
+    """
+    valid = [r for r in results if 'error' not in r]
+    fig, ax = plt.subplots(figsize=(14, 9))
+    x0, x1, y0, y1 = COURT_BOUNDS
+
+    if valid:
+        total = sum(r['court_density'] for r in valid)
+        draw_density(ax, total, COURT_BOUNDS, cmap='Greys')
+
+        rmse = np.array([r['rmse_2d_m'] for r in valid])
+        norm = Normalize(0.0, max(float(rmse.max()), 0.1))
+        cmap = plt.get_cmap('RdYlGn_r')
+        for r, error in zip(valid, rmse):
+            gx, gy = r['ground_truth'][:2]
+            color = cmap(norm(error))
+            ax.add_patch(Circle((gx, gy), r['cep95_2d_m'], color=color, fill=False, linestyle='--'))
+            ax.annotate('', xy=(r['mean_x'], r['mean_y']), xytext=(gx, gy),
+                        arrowprops=dict(arrowstyle='->', color=color, lw=2))
+            ax.plot(gx, gy, 'x', color='black', markersize=8, mew=2)
+            ax.text(gx, gy + 0.12, f"{r['point']}\n{error * 100:.0f} cm", ha='center', va='bottom', fontsize=8)
+        fig.colorbar(plt.cm.ScalarMappable(norm=norm, cmap=cmap), ax=ax, label='RMSE 2D (m)')
+
+    ax.plot([x0, x0, x1, x1, x0], [y0, y1, y1, y0, y0], color='black', lw=1.5)
+    for anchor_id, (ax_x, ax_y) in ANCHORS.items():
+        ax.plot(ax_x, ax_y, 's', color='blue', markersize=10)
+        ax.text(ax_x, ax_y + 0.25, anchor_id, ha='center', va='bottom', fontsize=9)
+
+    ax.set_xlim(x0 - 0.5, x1 + 0.5)
+    ax.set_ylim(y0 - 0.5, y1 + 0.8)
+    ax.set_aspect('equal')
+    ax.grid(True, alpha=0.3)
+    ax.set_xlabel("X (m)")
+    ax.set_ylabel("Y (m)")
+    ax.set_title(f"UWB Survey Accuracy Map ({len(valid)} points)\n"
+                 "x = ground truth, arrow = bias to mean position, dashed = CEP95")
+    fig.savefig(output_plot, dpi=120)
+    plt.close(fig)
+
+
+def plot_point_densities(results, output_plot, max_cols=6):
+    """Grid with the sample density of every point around its ground truth"""
+    valid = [r for r in results if 'error' not in r]
+    if not valid:
+        return
+    cols = min(max_cols, len(valid))
+    rows = (len(valid) + cols - 1) // cols
+    fig, axes = plt.subplots(rows, cols, figsize=(3.2 * cols, 3.2 * rows), squeeze=False)
+    for ax, r in zip(axes.ravel(), valid):
+        gx, gy = r['ground_truth'][:2]
+        draw_density(ax, r['density'], r['density_extent'])
+        ax.plot(gx, gy, 'rx', markersize=8, mew=2)
+        ax.plot(r['mean_x'], r['mean_y'], 'g+', markersize=10, mew=2)
+        ax.add_patch(Circle((gx, gy), r['cep95_2d_m'], color='red', fill=False, linestyle='--'))
+        ax.set_title(f"{r['point']}: RMSE {r['rmse_2d_m'] * 100:.0f} cm\n"
+                     f"std ({r['std_x'] * 100:.0f}, {r['std_y'] * 100:.0f}) cm", fontsize=9)
+        ax.tick_params(labelsize=7)
+    for ax in axes.ravel()[len(valid):]:
+        ax.axis('off')
+    fig.tight_layout()
+    fig.savefig(output_plot, dpi=100)
+    plt.close(fig)
+
+
+def validate_survey(manifest_file, output_dir=None, workers=None):
+    """
+    Evaluate every reference point of a survey manifest.
+
+    Args:
+        manifest_file: Survey CSV (see read_survey_manifest)
+        output_dir: Where survey_summary.csv, survey_map.png and
+                    survey_points.png are written (default: next to the manifest)
+        workers: Worker processes (default: all cores)
+
+    Returns:
+        Summary DataFrame (one row per point)
+    """
+    points = read_survey_manifest(manifest_file)
+    if not points:
+        print(f"No reference points in {manifest_file}")
+        return None
+    output_dir = output_dir or os.path.dirname(os.path.abspath(manifest_file))
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"\n=== UWB SURVEY VALIDATION ===")
+    print(f"Manifest: {os.path.basename(manifest_file)} ({len(points)} points)")
+    t0 = time.perf_counter()
+
+    # Time indexes are built once here, not concurrently by the workers
+    for csv_file in {p['file'] for p in points if p['start'] is not None or p['end'] is not None}:
+        if os.path.isfile(csv_file):
+            TimeIndex.for_file(csv_file)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(points)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(survey_point, points))
+    else:
+        results = [survey_point(point) for point in points]
+
+    table = pd.DataFrame([survey_row(result) for result in results])
+    leading = [col for col in ['point', 'file', 'gt_x', 'gt_y', 'gt_z', 'samples'] if col in table.columns]
+    table = table[leading + [col for col in table.columns if col not in leading + ['error']] + ['error']]
+    table['samples'] = table['samples'].astype('Int64') if 'samples' in table.columns else pd.NA
+
+    print(f"{'Point':<8} | {'Ground truth':<14} | {'Samples':>8} | {'Bias X':>7} | {'Bias Y':>7} | "
+          f"{'Std X':>6} | {'Std Y':>6} | {'RMSE 2D':>7} | {'CEP95':>6}")
+    print("-" * 96)
+    for result in results:
+        truth = ', '.join(f"{v:.2f}" for v in result['ground_truth'][:2])
+        if 'error' in result:
+            print(f"{result['point']:<8} | {truth:<14} | ERROR: {result['error']}")
+            continue
+        print(f"{result['point']:<8} | {truth:<14} | {result['samples']:>8} | {result['bias_x_m']:>7.3f} | "
+              f"{result['bias_y_m']:>7.3f} | {result['std_x']:>6.3f} | {result['std_y']:>6.3f} | "
+              f"{result['rmse_2d_m']:>7.3f} | {result['cep95_2d_m']:>6.3f}")
+
+    valid = table[table['error'] == '']
+    if len(valid):
+        print("-" * 96)
+        print(f"Survey RMSE 2D: mean {valid['rmse_2d_m'].mean():.3f} m | worst {valid['rmse_2d_m'].max():.3f} m "
+              f"({valid.loc[valid['rmse_2d_m'].idxmax(), 'point']}) | mean CEP95 {valid['cep95_2d_m'].mean():.3f} m")
+
+    summary_csv = os.path.join(output_dir, 'survey_summary.csv')
+    table.to_csv(summary_csv, index=False, float_format='%.4f')
+    plot_court_map(results, os.path.join(output_dir, 'survey_map.png'))
+    plot_point_densities(results, os.path.join(output_dir, 'survey_points.png'))
+
+    print(f"\nPoints: {len(points)} | Errors: {len(points) - len(valid)} | Workers: {workers} | "
+          f"Time: {time.perf_counter() - t0:.2f}s")
+    print(f"Summary saved to: {summary_csv}")
+    print(f"Plots saved to: {os.path.join(output_dir, 'survey_map.png')}, survey_points.png")
+    return table
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Validate UWB precision against ground truth")
-    parser.add_argument("file", help="Path to CSV file with positions")
-    parser.add_argument("x", type=float, help="Ground truth X coordinate")
-    parser.add_argument("y", type=float, help="Ground truth Y coordinate")
+    parser.add_argument("file", nargs='?', help="Path to CSV file with positions")
+    parser.add_argument("x", type=float, nargs='?', help="Ground truth X coordinate")
+    parser.add_argument("y", type=float, nargs='?', help="Ground truth Y coordinate")
     parser.add_argument("--z", type=float, help="Ground truth Z coordinate (optional)", default=None)
-    
+    parser.add_argument("--survey", metavar='MANIFEST', default=None,
+                        help="Survey CSV with one reference point per row (point,file,x,y,z,start,end)")
+    parser.add_argument("--output", metavar='DIR', default=None,
+                        help="Directory of the survey table and plots (default: next to the manifest)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --survey (default: all cores)")
+
     args = parser.parse_args()
-    
-    validate_precision(args.file, args.x, args.y, args.z)
+
+    if args.survey:
+        validate_survey(args.survey, args.output, args.workers)
+    elif args.file is None or args.y is None:
+        parser.error("give FILE X Y, or --survey MANIFEST")
+    else:
+        validate_precision(args.file, args.x, args.y, args.z)